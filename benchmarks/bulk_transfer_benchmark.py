@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del trasferimento di file grandi tra due nodi dello stesso host: throughput della pubblicazione
+e del recupero di un file, per diverse dimensioni e per contenuto testuale o binario.
+
+Uso: python -m benchmarks.bulk_transfer_benchmark [numero di ripetizioni]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+from benchmarks.transport_benchmark import create_node
+from chord_model.simple_file import SimpleFile
+from network.async_runtime import NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO
+from network.tcp_port_manager import TCPPortManager
+
+FILE_SIZES = (64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+
+
+def measure_transfer(client, server_info, file, repetitions):
+    """
+    Funzione per la misura del throughput di pubblicazione e recupero di un file
+
+    :param client: il nodo che pubblica e recupera il file
+    :param server_info: node info del nodo che conserva il file
+    :param file: il file da trasferire
+    :param repetitions: numero di trasferimenti per direzione
+    :return: throughput di pubblicazione e di recupero in MB/s
+    """
+
+    size = file.get_data().__len__()
+    requests_handler = client.tcp_requests_handler()
+
+    start_time = time.perf_counter()
+    for key in range(0, repetitions):
+        requests_handler.send_publish_request(server_info, key, file)
+    publish_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for key in range(0, repetitions):
+        requests_handler.send_file_request(server_info, key)
+    fetch_time = time.perf_counter() - start_time
+
+    megabytes = size * repetitions / (1024 * 1024)
+    return megabytes / publish_time, megabytes / fetch_time
+
+
+def main(repetitions=10):
+    port_manager = TCPPortManager()
+
+    print(f"{'Engine':<10}{'Data':<8}{'Size (KB)':>12}{'Publish (MB/s)':>18}{'Fetch (MB/s)':>16}")
+
+    for network_engine in (NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO):
+        server = create_node(port_manager, network_engine, False)
+        client = create_node(port_manager, network_engine, False)
+        server_info = server.get_node_info()
+
+        for size in FILE_SIZES:
+            for data in ("x" * size, bytes(size)):
+                file = SimpleFile("benchmark", data)
+                (publish_rate, fetch_rate) = measure_transfer(client, server_info, file, repetitions)
+
+                data_type = "str" if isinstance(data, str) else "bytes"
+                print(f"{network_engine:<10}{data_type:<8}{size // 1024:>12,}{publish_rate:>18,.1f}{fetch_rate:>16,.1f}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            client.terminate()
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv.__len__() > 1 else 10)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della compressione dei messaggi: byte sul filo e tempo di codifica + decodifica di un file
+per ogni algoritmo, e banda di pareggio. Sotto questa banda il tempo risparmiato nella trasmissione
+supera il tempo speso per comprimere e decomprimere, quindi la compressione conviene.
+
+Uso: python -m benchmarks.compression_benchmark [numero di iterazioni]
+"""
+
+import os
+import sys
+import time
+
+from chord_model.node_info import NodeInfo
+from chord_model.simple_file import SimpleFile
+from network.message_codec import COMPRESSIONS, COMPRESSION_NONE, encode_message, decode_message
+from network.messages import *
+
+FILE_SIZES = (4 * 1024, 64 * 1024, 1024 * 1024)
+
+
+def build_sample_files(size):
+    """
+    Funzione per la costruzione di file di contenuto diverso e della dimensione richiesta
+
+    :param size: dimensione in byte dei file
+    :return: lista di tuple (descrizione, file)
+    """
+
+    words = [f"word{i % 997:03d} " for i in range(0, size // 4)]
+    text = "".join(words)[:size]
+    log = "".join(f"2024-01-01 12:00:{i % 60:02d} INFO node {50000 + i % 32} stabilized\n"
+                  for i in range(0, size // 40))[:size]
+
+    return [
+        ("text", SimpleFile("text.txt", text)),
+        ("log", SimpleFile("node.log", log)),
+        ("random", SimpleFile("random.bin", os.urandom(size))),
+    ]
+
+
+def measure_round_trip(message, compression, iterations):
+    """
+    Funzione per la misura del tempo medio di codifica e decodifica di un messaggio
+
+    :param message: il messaggio da misurare
+    :param compression: algoritmo di compressione
+    :param iterations: numero di esecuzioni
+    :return: dimensione del payload in byte e tempo medio in secondi
+    """
+
+    payload = encode_message(message, compression=compression)
+    assert decode_message(payload).get_file().get_data() == message.get_file().get_data()
+
+    start_time = time.perf_counter()
+    for i in range(0, iterations):
+        decode_message(encode_message(message, compression=compression))
+    elapsed_time = time.perf_counter() - start_time
+
+    return payload.__len__(), elapsed_time / iterations
+
+
+def main(iterations=20):
+    sender = NodeInfo(port=50001)
+    destination = NodeInfo(port=50002)
+
+    print(f"{'File':<8}{'Size (KB)':>10}  {'Compression':<12}{'Bytes':>10}{'Time (ms)':>11}{'Break-even (MB/s)':>19}")
+
+    for size in FILE_SIZES:
+        for (description, file) in build_sample_files(size):
+            message = FileAnswerMessage(sender, destination, 1, file)
+            (plain_size, plain_time) = measure_round_trip(message, COMPRESSION_NONE, iterations)
+
+            for compression in COMPRESSIONS:
+                (payload_size, elapsed_time) = measure_round_trip(message, compression, iterations)
+
+                saved_bytes = plain_size - payload_size
+                extra_time = elapsed_time - plain_time
+                if compression == COMPRESSION_NONE:
+                    break_even = "-"
+                elif saved_bytes <= 0:
+                    break_even = "never"
+                else:
+                    break_even = f"{saved_bytes / max(extra_time, 1e-9) / (1024 * 1024):,.1f}"
+
+                print(f"{description:<8}{size // 1024:>10}  {compression:<12}{payload_size:>10}"
+                      f"{elapsed_time * 1000:>11.3f}{break_even:>19}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv.__len__() > 1 else 20)
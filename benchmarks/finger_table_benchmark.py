@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della ricerca del finger precedente più vicino a una key: scansione delle CONST_M entry della finger table
+(dalla più lontana) contro ricerca binaria nell'indice ordinato dei finger distinti, per anelli di diverse dimensioni.
+
+Uso: python -m benchmarks.finger_table_benchmark [numero di ricerche]
+"""
+
+import bisect
+import random
+import sys
+import time
+
+from chord_model.finger_table import FingerTable
+from chord_model.node_info import NodeInfo
+from utilities.chord_utils import CONST_M, compute_finger
+
+RING_SIZES = (16, 256, 4096)
+
+
+def build_finger_table(ring_size):
+    """
+    Funzione per la costruzione della finger table stabilizzata di un nodo in un anello di nodi casuali
+
+    :param ring_size: numero di nodi dell'anello
+    :return: tupla (node info del nodo, la sua finger table)
+    """
+
+    node_infos = sorted((NodeInfo(port=50000 + i) for i in range(0, ring_size)), key=NodeInfo.get_node_id)
+    node_ids = [node_info.get_node_id() for node_info in node_infos]
+    my_node_info = random.choice(node_infos)
+
+    finger_table = FingerTable(my_node_info)
+    for index in range(1, CONST_M + 1):
+        # il finger è il successore dell'inizio del suo intervallo, il primo nodo se si supera l'ultimo
+        position = bisect.bisect_left(node_ids, compute_finger(my_node_info.get_node_id(), index))
+        finger_table.insert_finger_by_index(index, node_infos[position % ring_size])
+
+    return my_node_info, finger_table
+
+
+def scan_closest_preceding_finger(my_node_info, finger_table, key):
+    """
+    Funzione con la ricerca per scansione della finger table, come in Node.closest_preceding_finger prima dell'indice
+
+    :param my_node_info: node info del nodo
+    :param finger_table: la finger table del nodo
+    :param key: la chiave del nodo o file
+    :return: il closest preceding finger
+    """
+
+    for i in range(CONST_M, 0, -1):  # da m a 1
+        finger = finger_table.get_finger(i)
+        if finger:
+            if my_node_info.get_node_id() <= finger.get_node_id() <= key:
+                return finger
+    return my_node_info
+
+
+def indexed_closest_preceding_finger(my_node_info, finger_table, key):
+    """
+    Funzione con la ricerca binaria nell'indice dei finger distinti, come in Node.closest_preceding_finger
+
+    :param my_node_info: node info del nodo
+    :param finger_table: la finger table del nodo
+    :param key: la chiave del nodo o file
+    :return: il closest preceding finger
+    """
+
+    finger = finger_table.get_closest_preceding_finger(my_node_info.get_node_id(), key)
+    if finger:
+        return finger
+    return my_node_info
+
+
+def measure(search_function, my_node_info, finger_table, keys):
+    """
+    Funzione per la misura del tempo medio di una ricerca
+
+    :param search_function: la funzione di ricerca
+    :param my_node_info: node info del nodo
+    :param finger_table: la finger table del nodo
+    :param keys: le key da cercare
+    :return: tempo medio in microsecondi
+    """
+
+    start_time = time.perf_counter()
+    for key in keys:
+        search_function(my_node_info, finger_table, key)
+    elapsed_time = time.perf_counter() - start_time
+
+    return elapsed_time / keys.__len__() * 1000000
+
+
+def main(lookups=20000):
+    random.seed(1)
+
+    print(f"{'Nodes':>8}{'Distinct fingers':>18}{'Scan (us)':>12}{'Bisect (us)':>13}{'Speedup':>10}")
+
+    for ring_size in RING_SIZES:
+        (my_node_info, finger_table) = build_finger_table(ring_size)
+
+        # metà delle key segue l'id del nodo, dove la ricerca trova sempre un finger
+        keys = [random.randrange(my_node_info.get_node_id(), 2 ** CONST_M) if i % 2
+                else random.randrange(0, 2 ** CONST_M) for i in range(0, lookups)]
+
+        for key in keys[:1000]:
+            assert scan_closest_preceding_finger(my_node_info, finger_table, key).get_node_id() == \
+                   indexed_closest_preceding_finger(my_node_info, finger_table, key).get_node_id()
+
+        distinct_fingers = finger_table.get_preceding_fingers(0, 2 ** CONST_M).__len__()
+        scan_time = measure(scan_closest_preceding_finger, my_node_info, finger_table, keys)
+        bisect_time = measure(indexed_closest_preceding_finger, my_node_info, finger_table, keys)
+
+        print(f"{ring_size:>8}{distinct_fingers:>18}{scan_time:>12.2f}{bisect_time:>13.2f}{scan_time / bisect_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv.__len__() > 1 else 20000)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dei codec dei messaggi: throughput di codifica / decodifica e byte per messaggio, binario contro pickle.
+
+Uso: python -m benchmarks.message_codec_benchmark [numero di iterazioni]
+"""
+
+import sys
+import time
+
+from chord_model.node_info import NodeInfo
+from chord_model.simple_file import SimpleFile
+from exceptions.exceptions import NodeOverloadedError
+from network.message_codec import CODECS, encode_message, decode_message
+from network.messages import *
+from utilities.chord_utils import hash_function
+
+
+def build_sample_messages():
+    """
+    Funzione per la costruzione di un insieme di messaggi rappresentativo del traffico di un nodo
+
+    :return: lista di tuple (descrizione, messaggio)
+    """
+
+    sender = NodeInfo(port=50001)
+    destination = NodeInfo(port=50002)
+    successor = NodeInfo(port=50003)
+    files = {hash_function(f"file_{i}.txt"): SimpleFile(f"file_{i}.txt", "Lorem ipsum dolor sit amet " * 4)
+             for i in range(0, 4)}
+
+    return [
+        ("ping request", PingRequestMessage(destination, sender, 1)),
+        ("search key successor request", SearchKeySuccessorRequestMessage(destination, hash_function("key"),
+                                                                           sender, 2)),
+        ("search key successor answer", SearchKeySuccessorAnswerMessage(sender, destination, successor, 2)),
+        ("get predecessor answer (None)", GetPredecessorAnswerMessage(sender, destination, None, 3)),
+        ("notify answer (4 files)", NotifyAnswerMessage(sender, destination, 4, files)),
+        ("error answer", ErrorAnswerMessage(sender, destination, 5, NodeOverloadedError())),
+    ]
+
+
+def measure(function, argument, iterations):
+    """
+    Funzione per la misura del throughput di una funzione
+
+    :param function: la funzione da misurare
+    :param argument: l'argomento della funzione
+    :param iterations: numero di esecuzioni
+    :return: esecuzioni al secondo
+    """
+
+    start_time = time.perf_counter()
+    for i in range(0, iterations):
+        function(argument)
+    elapsed_time = time.perf_counter() - start_time
+
+    return iterations / elapsed_time
+
+
+def main(iterations=20000):
+    print(f"{'Message':<32}{'Codec':<8}{'Bytes':>8}{'Encode msg/s':>16}{'Decode msg/s':>16}")
+
+    for (description, message) in build_sample_messages():
+        for codec in CODECS:
+            payload = encode_message(message, codec)
+            assert type(decode_message(payload)) is type(message)
+
+            encode_rate = measure(lambda m: encode_message(m, codec), message, iterations)
+            decode_rate = measure(decode_message, payload, iterations)
+
+            print(f"{description:<32}{codec:<8}{payload.__len__():>8}{encode_rate:>16,.0f}{decode_rate:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv.__len__() > 1 else 20000)
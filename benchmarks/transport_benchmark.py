@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dei trasporti tra nodi dello stesso host: latenza di andata e ritorno e throughput delle RPC,
+Unix domain socket contro TCP.
+
+Uso: python -m benchmarks.transport_benchmark [numero di richieste] [numero di client concorrenti]
+"""
+
+import contextlib
+import io
+import sys
+import threading
+import time
+
+from chord_model.node import Node
+from chord_model.node_info import NodeInfo
+from network.async_runtime import NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO
+from network.tcp_port_manager import TCPPortManager
+
+
+def create_node(port_manager, network_engine, unix_sockets):
+    """
+    Funzione per la creazione di un nodo isolato, su una porta libera
+
+    :param port_manager: il gestore delle porte TCP
+    :param network_engine: motore di rete del nodo
+    :param unix_sockets: se impostato a True, il nodo usa i Unix domain socket
+    :return: il nodo creato
+    """
+
+    port = port_manager.get_free_port()
+    node = Node(NodeInfo(port=port), periodic_operations_timeout=300000, network_engine=network_engine,
+                unix_sockets=unix_sockets)
+
+    # le stampe dell'inizializzazione non interessano il benchmark
+    with contextlib.redirect_stdout(io.StringIO()):
+        node.initialize()
+
+    return node
+
+
+def measure_latency(client, server_info, requests_number):
+    """
+    Funzione per la misura della latenza di andata e ritorno di richieste sequenziali
+
+    :param client: il nodo che invia le richieste
+    :param server_info: node info del nodo di destinazione
+    :param requests_number: numero di richieste
+    :return: latenza media in microsecondi
+    """
+
+    start_time = time.perf_counter()
+    for i in range(0, requests_number):
+        client.tcp_requests_handler().send_ping(server_info)
+    elapsed_time = time.perf_counter() - start_time
+
+    return elapsed_time / requests_number * 1000000
+
+
+def measure_throughput(client, server_info, requests_number, clients_number):
+    """
+    Funzione per la misura del throughput di richieste inviate da più thread concorrenti
+
+    :param client: il nodo che invia le richieste
+    :param server_info: node info del nodo di destinazione
+    :param requests_number: numero totale di richieste
+    :param clients_number: numero di thread concorrenti
+    :return: richieste al secondo
+    """
+
+    requests_per_client = max(1, requests_number // clients_number)
+    threads = [threading.Thread(target=measure_latency, args=(client, server_info, requests_per_client))
+               for i in range(0, clients_number)]
+
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed_time = time.perf_counter() - start_time
+
+    return requests_per_client * clients_number / elapsed_time
+
+
+def main(requests_number=2000, clients_number=8):
+    port_manager = TCPPortManager()
+
+    print(f"{'Engine':<10}{'Transport':<12}{'RTT (us)':>12}{'Throughput (req/s)':>22}")
+
+    for network_engine in (NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO):
+        for unix_sockets in (True, False):
+            server = create_node(port_manager, network_engine, unix_sockets)
+            client = create_node(port_manager, network_engine, unix_sockets)
+            server_info = server.get_node_info()
+
+            # riscaldamento: apertura delle connessioni verso il server
+            measure_latency(client, server_info, 100)
+
+            latency = measure_latency(client, server_info, requests_number)
+            throughput = measure_throughput(client, server_info, requests_number, clients_number)
+
+            transport = "unix" if unix_sockets else "tcp"
+            print(f"{network_engine:<10}{transport:<12}{latency:>12,.1f}{throughput:>22,.0f}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                client.terminate()
+                server.terminate()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv.__len__() > 1 else 2000,
+         int(sys.argv[2]) if sys.argv.__len__() > 2 else 8)
@@ -9,6 +9,13 @@ class Chord:
     """
 
     def __init__(self, max_node_initialization_retries=1, max_file_publish_retires=5, periodic_operations_timeout=10000,
+                 network_engine=NETWORK_ENGINE_THREADS, worker_pool_size=16, worker_queue_size=256,
+                 overload_policy=OVERLOAD_POLICY_REJECT, codec=CODEC_BINARY, server_backlog=128, unix_sockets=True,
+                 send_retry_backoff=10, circuit_breaker_threshold=3, circuit_breaker_reset_timeout=2000,
+                 compression=COMPRESSION_NONE, compression_threshold=COMPRESSION_THRESHOLD, max_inflight_requests=256,
+                 max_inflight_requests_per_destination=32, max_inbound_requests=256, maintenance_workers=4,
+                 lookup_mode=LOOKUP_MODE_RECURSIVE, lookup_parallelism=1, lookup_hop_timeout=500,
+                 lookup_cache_size=1024, lookup_cache_ttl=30000, join_mode=JOIN_MODE_SEQUENTIAL, join_parallelism=8,
                  debug_mode=False):
         """
         Funzione __init__ della classe. Inizializza tutti gli attributi interni
@@ -16,6 +23,29 @@ class Chord:
         :param max_node_initialization_retries: il massimo numero di tentativi di inizializzazione di un nodo (opzionale)
         :param max_file_publish_retires: il massimo numero di tentativi di pubblicazione di un file (opzionale)
         :param periodic_operations_timeout: intervallo tra le operazioni periodiche del nodo in ms (opzionale)
+        :param network_engine: motore di rete dei nodi, "threads", "asyncio" o "loopback" (opzionale)
+        :param worker_pool_size: numero di thread di ogni nodo per l'elaborazione dei messaggi ricevuti (opzionale)
+        :param worker_queue_size: massimo numero di messaggi ricevuti in attesa di elaborazione in ogni nodo (opzionale)
+        :param overload_policy: politica da applicare quando la coda di un nodo è piena, "reject" o "backpressure" (opzionale)
+        :param codec: codec con cui i nodi serializzano i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param server_backlog: massimo numero di connessioni in ingresso in attesa di essere accettate da un nodo (opzionale)
+        :param unix_sockets: se impostato a True, i nodi dello stesso host comunicano tramite Unix domain socket (opzionale)
+        :param send_retry_backoff: attesa massima in ms dopo il primo tentativo di invio fallito, raddoppiata a ogni tentativo (opzionale)
+        :param circuit_breaker_threshold: messaggi non recapitati consecutivi dopo i quali un nodo è considerato irraggiungibile, 0 per disabilitare (opzionale)
+        :param circuit_breaker_reset_timeout: tempo in ms dopo il quale un nodo irraggiungibile viene ricontattato (opzionale)
+        :param compression: algoritmo con cui i nodi comprimono i messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param max_inflight_requests: massimo numero di richieste inviate da un nodo in attesa di risposta, 0 per non porre limiti (opzionale)
+        :param max_inflight_requests_per_destination: massimo numero di richieste di un nodo in attesa di risposta da uno stesso nodo, 0 per non porre limiti (opzionale)
+        :param max_inbound_requests: massimo numero di richieste ricevute in elaborazione in un nodo per corsia di priorità, oltre il quale si risponde "busy" (opzionale)
+        :param maintenance_workers: thread del pool di un nodo riservati ai messaggi di manutenzione (opzionale)
+        :param lookup_mode: modalità di ricerca del successore di una key, "recursive", "iterative" o "forwarded" (opzionale)
+        :param lookup_parallelism: nodi interrogati contemporaneamente a ogni passo della ricerca iterativa (opzionale)
+        :param lookup_hop_timeout: timeout massimo in ms di ogni passo della ricerca iterativa (opzionale)
+        :param lookup_cache_size: massimo numero di responsabili delle key memorizzati nella cache delle ricerche di ogni nodo, 0 per disabilitarla (opzionale)
+        :param lookup_cache_ttl: tempo in ms dopo il quale un responsabile memorizzato nella cache scade (opzionale)
+        :param join_mode: modalità di inizializzazione della finger table dei nuovi nodi, "sequential" o "parallel" (opzionale)
+        :param join_parallelism: massimo numero di finger cercati contemporaneamente in modalità "parallel" (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
@@ -28,6 +58,29 @@ class Chord:
         except InvalidPeriodicOperationsTimeoutError:
             raise InvalidPeriodicOperationsTimeoutError
         self.__periodic_operations_timeout = periodic_operations_timeout
+        self.__network_engine = network_engine
+        self.__worker_pool_size = worker_pool_size
+        self.__worker_queue_size = worker_queue_size
+        self.__overload_policy = overload_policy
+        self.__codec = codec
+        self.__server_backlog = server_backlog
+        self.__unix_sockets = unix_sockets
+        self.__send_retry_backoff = send_retry_backoff
+        self.__circuit_breaker_threshold = circuit_breaker_threshold
+        self.__circuit_breaker_reset_timeout = circuit_breaker_reset_timeout
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+        self.__max_inflight_requests = max_inflight_requests
+        self.__max_inflight_requests_per_destination = max_inflight_requests_per_destination
+        self.__max_inbound_requests = max_inbound_requests
+        self.__maintenance_workers = maintenance_workers
+        self.__lookup_mode = lookup_mode
+        self.__lookup_parallelism = lookup_parallelism
+        self.__lookup_hop_timeout = lookup_hop_timeout
+        self.__lookup_cache_size = lookup_cache_size
+        self.__lookup_cache_ttl = lookup_cache_ttl
+        self.__join_mode = join_mode
+        self.__join_parallelism = join_parallelism
 
         self.__debug_mode = debug_mode
 
@@ -58,6 +111,21 @@ class Chord:
         new_node_info = NodeInfo(port=port)
         try:
             new_node = Node(new_node_info, periodic_operations_timeout=self.__periodic_operations_timeout,
+                            network_engine=self.__network_engine, worker_pool_size=self.__worker_pool_size,
+                            worker_queue_size=self.__worker_queue_size, overload_policy=self.__overload_policy,
+                            codec=self.__codec, server_backlog=self.__server_backlog, unix_sockets=self.__unix_sockets,
+                            send_retry_backoff=self.__send_retry_backoff,
+                            circuit_breaker_threshold=self.__circuit_breaker_threshold,
+                            circuit_breaker_reset_timeout=self.__circuit_breaker_reset_timeout,
+                            compression=self.__compression, compression_threshold=self.__compression_threshold,
+                            max_inflight_requests=self.__max_inflight_requests,
+                            max_inflight_requests_per_destination=self.__max_inflight_requests_per_destination,
+                            max_inbound_requests=self.__max_inbound_requests,
+                            maintenance_workers=self.__maintenance_workers, lookup_mode=self.__lookup_mode,
+                            lookup_parallelism=self.__lookup_parallelism,
+                            lookup_hop_timeout=self.__lookup_hop_timeout,
+                            lookup_cache_size=self.__lookup_cache_size, lookup_cache_ttl=self.__lookup_cache_ttl,
+                            join_mode=self.__join_mode, join_parallelism=self.__join_parallelism,
                             debug_mode=self.__debug_mode)
         except AlreadyUsedPortError:
             raise AlreadyUsedPortError  # la gestione dell'eccezione viene rimandata al chiamante
@@ -396,6 +464,42 @@ class Chord:
         except KeyError:
             raise NoNodeFoundOnPortError
 
+    def print_node_worker_pool_status(self, node_port):
+        """
+        Metodo di debug per la stampa delle metriche del pool di worker di un dato nodo
+
+        :param node_port: porta TCP del nodo
+        """
+
+        try:
+            self.__node_dict[node_port].print_worker_pool_status()
+        except KeyError:
+            raise NoNodeFoundOnPortError
+
+    def print_node_stats(self, node_port):
+        """
+        Metodo di debug per la stampa delle statistiche del traffico di un dato nodo
+
+        :param node_port: porta TCP del nodo
+        """
+
+        try:
+            self.__node_dict[node_port].print_stats()
+        except KeyError:
+            raise NoNodeFoundOnPortError
+
+    def print_node_rtt_estimates(self, node_port):
+        """
+        Metodo di debug per la stampa delle stime del RTT di un dato nodo verso gli altri nodi
+
+        :param node_port: porta TCP del nodo
+        """
+
+        try:
+            self.__node_dict[node_port].print_rtt_estimates()
+        except KeyError:
+            raise NoNodeFoundOnPortError
+
     def set_debug_mode(self, debug_mode):
         """
         Metodo per abilitare / disabilitare la modalità di debug.
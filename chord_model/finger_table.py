@@ -1,10 +1,16 @@
+import bisect
+import threading
+
 from exceptions.exceptions import NoneNodeErrorError
 from utilities.chord_utils import *
 
 
 class FingerTable:
     """
-    Classe che gestisce la fingertable di un nodo all'interno della rete chord
+    Classe che gestisce la fingertable di un nodo all'interno della rete chord.
+    Oltre alle CONST_M entry, molte delle quali si riferiscono agli stessi pochi nodi, la tabella mantiene
+    un indice dei nodi distinti ordinato per id, aggiornato a ogni modifica: la ricerca del finger precedente
+    più vicino a una key è così una ricerca binaria, invece di una scansione delle CONST_M entry.
     """
 
     def __init__(self, my_node_info):
@@ -15,6 +21,11 @@ class FingerTable:
         self.__table_dict = {key: None for key in range(1, CONST_M + 1)}
         self.__my_node_info = my_node_info
 
+        # indice dei finger distinti: tupla (id in ordine crescente, node info corrispondenti).
+        # Viene sostituito per intero a ogni modifica, così che chi lo legge non debba acquisire il lock
+        self.__finger_index = ((), ())
+        self.__lock = threading.Lock()
+
     def add_finger(self, new_finger):
         """
         Funzione per l'aggiunta di un nuovo nodo alla finger table.
@@ -25,19 +36,23 @@ class FingerTable:
 
         i = self.__my_node_info.get_node_id()
 
-        for j in range(1, CONST_M + 1):
-            try:
-                if new_finger.get_node_id() >= (i + 2 ** (j - 1)) % 2 ** CONST_M:
-
-                    # Il finger può essere none solo se la tabella è vuota
-                    if self.__table_dict[j] is None or new_finger.get_node_id() < self.__table_dict[j].get_node_id():
-                        self.__table_dict[j] = new_finger
-                    else:
-                        # Il finger che stiamo guardando ha un id più piccolo (e lo stesso varrà per i successivi),
-                        # dunque non va sostituito
-                        break
-            except AttributeError:
-                raise NoneNodeErrorError
+        with self.__lock:
+            for j in range(1, CONST_M + 1):
+                try:
+                    if new_finger.get_node_id() >= (i + 2 ** (j - 1)) % 2 ** CONST_M:
+
+                        # Il finger può essere none solo se la tabella è vuota
+                        if self.__table_dict[j] is None or new_finger.get_node_id() < self.__table_dict[j].get_node_id():
+                            self.__table_dict[j] = new_finger
+                        else:
+                            # Il finger che stiamo guardando ha un id più piccolo (e lo stesso varrà per i successivi),
+                            # dunque non va sostituito
+                            break
+                except AttributeError:
+                    self._update_finger_index()
+                    raise NoneNodeErrorError
+
+            self._update_finger_index()
 
     def insert_finger_by_index(self, index, new_finger):
         """
@@ -49,7 +64,10 @@ class FingerTable:
         """
 
         assert 1 <= index <= CONST_M
-        self.__table_dict[index] = new_finger
+
+        with self.__lock:
+            self.__table_dict[index] = new_finger
+            self._update_finger_index()
 
     def get_finger(self, index):
         """
@@ -63,6 +81,47 @@ class FingerTable:
         assert 1 <= index <= CONST_M
         return self.__table_dict[index]
 
+    def get_closest_preceding_finger(self, lower_bound, key):
+        """
+        Funzione per la ricerca del finger con l'id più grande compreso tra lower_bound e key (estremi inclusi)
+
+        :param lower_bound: id minimo del finger
+        :param key: la chiave del nodo o file
+        :return: il finger trovato, None se nessun finger cade nell'intervallo
+        """
+
+        (finger_ids, finger_node_infos) = self.__finger_index
+
+        index = bisect.bisect_right(finger_ids, key) - 1
+        if index >= 0 and finger_ids[index] >= lower_bound:
+            return finger_node_infos[index]
+        return None
+
+    def get_preceding_fingers(self, lower_bound, key):
+        """
+        Funzione per ottenere i finger distinti compresi tra lower_bound e key (estremi inclusi)
+
+        :param lower_bound: id minimo dei finger
+        :param key: la chiave del nodo o file
+        :return: lista dei finger, dal più vicino alla key
+        """
+
+        (finger_ids, finger_node_infos) = self.__finger_index
+
+        start = bisect.bisect_left(finger_ids, lower_bound)
+        end = bisect.bisect_right(finger_ids, key)
+        return finger_node_infos[start:end][::-1]
+
+    def _update_finger_index(self):
+        """
+        Metodo interno per la ricostruzione dell'indice dei finger distinti dopo una modifica della tabella.
+        Nota: da chiamare con il lock acquisito
+        """
+
+        fingers = {finger.get_node_id(): finger for finger in self.__table_dict.values() if finger is not None}
+        finger_ids = sorted(fingers)
+        self.__finger_index = (tuple(finger_ids), tuple(fingers[finger_id] for finger_id in finger_ids))
+
     def contains_finger(self, node_info):
         """
         Funzione per verificare se un determinato nodo è contenuto nella finger table
@@ -100,7 +159,10 @@ class FingerTable:
         :param finger_info: node_info del finger da rimuovere
         """
 
-        for j in range(1, CONST_M + 1):
-            if self.__table_dict[j] is not None:
-                if finger_info.get_node_id() == self.__table_dict[j].get_node_info().get_node_id():
-                    self.__table_dict[j] = None
\ No newline at end of file
+        with self.__lock:
+            for j in range(1, CONST_M + 1):
+                if self.__table_dict[j] is not None:
+                    if finger_info.get_node_id() == self.__table_dict[j].get_node_info().get_node_id():
+                        self.__table_dict[j] = None
+
+            self._update_finger_index()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+
+
+class LookupCache:
+    """
+    Cache dei responsabili delle key già risolte da un nodo.
+    Ogni voce associa a un nodo responsabile l'intervallo di key che gli appartiene, dalla più piccola key
+    risolta verso di lui (che si estende verso il suo predecessore man mano che se ne risolvono altre) fino al suo id.
+    Le voci scadono dopo un tempo massimo e, superata la dimensione massima, vengono rimosse quelle usate meno
+    di recente. Una voce può essere superata dai cambiamenti dell'anello: il nodo responsabile verifica sempre
+    le richieste ricevute tramite la cache, e chi la usa rimuove le voci smentite.
+    """
+
+    def __init__(self, max_size=1024, ttl=30000, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param max_size: massimo numero di nodi responsabili memorizzati, 0 per disabilitare la cache (opzionale)
+        :param ttl: tempo in ms dopo il quale una voce scade (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__max_size = max_size
+        self.__ttl = ttl / 1000
+
+        # id del responsabile -> [key più piccola dell'intervallo, node info del responsabile, scadenza],
+        # dalla voce usata meno di recente
+        self.__entries = OrderedDict()
+        # id dei responsabili in ordine crescente, per la ricerca dell'intervallo di una key
+        self.__owner_ids = list()
+        self.__lock = threading.Lock()
+
+        # metriche
+        self.__hits_number = 0
+        self.__misses_number = 0
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def get(self, key):
+        """
+        Metodo per ottenere il responsabile di una key, se è memorizzato e non scaduto
+
+        :param key: la chiave del file
+        :return: il node info del responsabile della key, None se non è noto
+        """
+
+        if self.__max_size <= 0:
+            return None
+
+        with self.__lock:
+            # il candidato è il responsabile con l'id più piccolo non inferiore alla key
+            index = bisect.bisect_left(self.__owner_ids, key)
+
+            if index < self.__owner_ids.__len__():
+                owner_node_id = self.__owner_ids[index]
+                (lowest_key, owner_node_info, expiry_time) = self.__entries[owner_node_id]
+
+                if expiry_time <= time.monotonic():
+                    self._remove(owner_node_id)
+                elif lowest_key <= key:
+                    self.__entries.move_to_end(owner_node_id)
+                    self.__hits_number += 1
+                    return owner_node_info
+
+            self.__misses_number += 1
+            return None
+
+    def put(self, key, owner_node_info):
+        """
+        Metodo per memorizzare il responsabile di una key appena risolta.
+        Le key oltre l'ultimo nodo dell'anello non vengono memorizzate.
+
+        :param key: la chiave del file
+        :param owner_node_info: node info del nodo responsabile della key
+        """
+
+        owner_node_id = owner_node_info.get_node_id()
+
+        if self.__max_size <= 0 or owner_node_id < key:
+            return
+
+        with self.__lock:
+            # i responsabili memorizzati tra la key e il nuovo responsabile sono smentiti
+            index = bisect.bisect_left(self.__owner_ids, key)
+            while index < self.__owner_ids.__len__() and self.__owner_ids[index] < owner_node_id:
+                self._remove(self.__owner_ids[index])
+
+            expiry_time = time.monotonic() + self.__ttl
+            entry = self.__entries.get(owner_node_id)
+
+            if entry is None:
+                bisect.insort(self.__owner_ids, owner_node_id)
+                self.__entries[owner_node_id] = [key, owner_node_info, expiry_time]
+            else:
+                entry[0] = min(entry[0], key)
+                entry[1] = owner_node_info
+                entry[2] = expiry_time
+                self.__entries.move_to_end(owner_node_id)
+
+            # l'intervallo del responsabile successivo non può comprendere quello appena esteso
+            index = bisect.bisect_right(self.__owner_ids, owner_node_id)
+            if index < self.__owner_ids.__len__():
+                next_entry = self.__entries[self.__owner_ids[index]]
+                next_entry[0] = max(next_entry[0], owner_node_id + 1)
+
+            while self.__entries.__len__() > self.__max_size:
+                self._remove(next(iter(self.__entries)))
+
+    def invalidate_owner(self, owner_node_info):
+        """
+        Metodo per rimuovere un responsabile smentito: non è più responsabile della key richiesta o non risponde
+
+        :param owner_node_info: node info del nodo responsabile
+        """
+
+        with self.__lock:
+            if owner_node_info.get_node_id() in self.__entries:
+                self._remove(owner_node_info.get_node_id())
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: Lookup cache entry of the node on port {owner_node_info.get_port()} invalidated")
+
+    def invalidate(self):
+        """
+        Metodo per svuotare la cache, quando cambiano i nodi vicini e quindi gli intervalli dell'anello
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__owner_ids.clear()
+
+    def _remove(self, owner_node_id):
+        """
+        Metodo interno per la rimozione di una voce.
+        Nota: da chiamare con il lock acquisito
+
+        :param owner_node_id: id del nodo responsabile
+        """
+
+        del self.__entries[owner_node_id]
+        del self.__owner_ids[bisect.bisect_left(self.__owner_ids, owner_node_id)]
+
+    def get_len(self):
+        with self.__lock:
+            return self.__entries.__len__()
+
+    def get_hits_number(self):
+        with self.__lock:
+            return self.__hits_number
+
+    def get_misses_number(self):
+        with self.__lock:
+            return self.__misses_number
+
+    def set_debug_mode(self, debug_mode):
+        self.__debug_mode = debug_mode
@@ -1,14 +1,20 @@
+import asyncio
 import random
 import copy
 from time import sleep
 
 from chord_model.file_system import FileSystem
 from chord_model.finger_table import *
+from chord_model.lookup_cache import LookupCache
+from chord_model.node_periodic_operations_task import NodePeriodicOperationsTask
 from chord_model.node_periodic_operations_thread import NodePeriodicOperationsThread
 from chord_model.successor_list import SuccessorList
 from exceptions.exceptions import FileKeyError, NoPrecedessorFoundError, NoSuccessorFoundError, \
     ImpossibleInitializationError, TCPRequestTimerExpiredError, TCPRequestSendError, FileSuccessorNotFoundError, \
-    ImpossibleFilePublishError, FileNotFoundInChordError
+    ImpossibleFilePublishError, FileNotFoundInChordError, KeyNotOwnedError
+from network.async_runtime import NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO, NETWORK_ENGINE_LOOPBACK
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD
+from network.message_worker_pool import OVERLOAD_POLICY_REJECT
 from network.request_sender_handler import RequestSenderHandler
 
 
@@ -18,7 +24,15 @@ class Node:
     """
 
     def __init__(self, node_info, file_path="", tcp_request_timeout=5000,
-                 periodic_operations_timeout=5000, max_successor_number=3, debug_mode=False):
+                 periodic_operations_timeout=5000, max_successor_number=3, network_engine=NETWORK_ENGINE_THREADS,
+                 worker_pool_size=16, worker_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT, codec=CODEC_BINARY,
+                 server_backlog=128, unix_sockets=True, send_retry_backoff=10, circuit_breaker_threshold=3,
+                 circuit_breaker_reset_timeout=2000, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, max_inflight_requests=256,
+                 max_inflight_requests_per_destination=32, max_inbound_requests=256, maintenance_workers=4,
+                 lookup_mode=LOOKUP_MODE_RECURSIVE, lookup_parallelism=1, lookup_hop_timeout=500,
+                 lookup_cache_size=1024, lookup_cache_ttl=30000, join_mode=JOIN_MODE_SEQUENTIAL, join_parallelism=8,
+                 debug_mode=False):
         """
         Funzione __init__ della classe. Inizializza tutti gli attributi interni.
 
@@ -27,6 +41,29 @@ class Node:
         :param tcp_request_timeout: timeout per le richieste TCP in arrivo in ms (opzionale)
         :param periodic_operations_timeout: intervallo tra le operazioni periodiche del nodo in ms (opzionale)
         :param max_successor_number: massimo numero di successori memorizzati (opzionale)
+        :param network_engine: motore di rete del nodo, "threads", "asyncio" o "loopback" (opzionale)
+        :param worker_pool_size: numero di thread per l'elaborazione dei messaggi ricevuti (opzionale)
+        :param worker_queue_size: massimo numero di messaggi ricevuti in attesa di elaborazione (opzionale)
+        :param overload_policy: politica da applicare quando la coda è piena, "reject" o "backpressure" (opzionale)
+        :param codec: codec con cui il nodo serializza i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param server_backlog: massimo numero di connessioni in ingresso in attesa di essere accettate (opzionale)
+        :param unix_sockets: se impostato a True, il nodo comunica con i nodi dello stesso host tramite Unix domain socket (opzionale)
+        :param send_retry_backoff: attesa massima in ms dopo il primo tentativo di invio fallito, raddoppiata a ogni tentativo (opzionale)
+        :param circuit_breaker_threshold: messaggi non recapitati consecutivi dopo i quali un nodo è considerato irraggiungibile, 0 per disabilitare (opzionale)
+        :param circuit_breaker_reset_timeout: tempo in ms dopo il quale un nodo irraggiungibile viene ricontattato (opzionale)
+        :param compression: algoritmo con cui il nodo comprime i messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param max_inflight_requests: massimo numero di richieste inviate in attesa di risposta, 0 per non porre limiti (opzionale)
+        :param max_inflight_requests_per_destination: massimo numero di richieste in attesa di risposta da uno stesso nodo, 0 per non porre limiti (opzionale)
+        :param max_inbound_requests: massimo numero di richieste ricevute in elaborazione per corsia di priorità, oltre il quale si risponde "busy" (opzionale)
+        :param maintenance_workers: thread del pool riservati ai messaggi di manutenzione (opzionale)
+        :param lookup_mode: modalità di ricerca del successore di una key, "recursive", "iterative" o "forwarded" (opzionale)
+        :param lookup_parallelism: nodi interrogati contemporaneamente a ogni passo della ricerca iterativa (opzionale)
+        :param lookup_hop_timeout: timeout massimo in ms di ogni passo della ricerca iterativa (opzionale)
+        :param lookup_cache_size: massimo numero di responsabili delle key memorizzati nella cache delle ricerche, 0 per disabilitarla (opzionale)
+        :param lookup_cache_ttl: tempo in ms dopo il quale un responsabile memorizzato nella cache scade (opzionale)
+        :param join_mode: modalità di inizializzazione della finger table all'ingresso nella rete, "sequential" o "parallel" (opzionale)
+        :param join_parallelism: massimo numero di finger cercati contemporaneamente in modalità "parallel" (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
@@ -55,6 +92,33 @@ class Node:
 
         self.__periodic_operations_timeout = periodic_operations_timeout
         self.__tcp_request_timeout = tcp_request_timeout
+        self.__network_engine = network_engine
+        self.__worker_pool_size = worker_pool_size
+        self.__worker_queue_size = worker_queue_size
+        self.__overload_policy = overload_policy
+        self.__codec = codec
+        self.__server_backlog = server_backlog
+        self.__unix_sockets = unix_sockets
+        self.__send_retry_backoff = send_retry_backoff
+        self.__circuit_breaker_threshold = circuit_breaker_threshold
+        self.__circuit_breaker_reset_timeout = circuit_breaker_reset_timeout
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+        self.__max_inflight_requests = max_inflight_requests
+        self.__max_inflight_requests_per_destination = max_inflight_requests_per_destination
+        self.__max_inbound_requests = max_inbound_requests
+        self.__maintenance_workers = maintenance_workers
+
+        # ricerca del successore
+        self.__lookup_mode = lookup_mode
+        self.__lookup_parallelism = lookup_parallelism
+        self.__lookup_hop_timeout = lookup_hop_timeout
+        self.__lookup_cache = LookupCache(lookup_cache_size, lookup_cache_ttl, debug_mode)
+
+        # ingresso nella rete
+        self.__join_mode = join_mode
+        self.__join_parallelism = join_parallelism
+        self.__join_duration = None
 
         # Processo per gestione delle operazioni periodiche
         self.__node_periodic_operations_manager = None
@@ -142,6 +206,15 @@ class Node:
 
         return self.__im_alone
 
+    def get_join_duration(self):
+        """
+        Metodo getter per la durata dell'inizializzazione del nodo
+
+        :return: la durata in ms dell'inizializzazione, None se non è ancora terminata
+        """
+
+        return self.__join_duration
+
     # ************************** METODI NODO CHORD *******************************
 
     def initialize(self, other_node_info=None):
@@ -152,13 +225,36 @@ class Node:
         """
 
         print(f"\nInitialization of Node with Port {self.__node_info.get_port()}: Started")
+        start_time = current_millis_time()
 
         self.__tcp_request_sender_handler = RequestSenderHandler(self, self.__tcp_request_timeout,
+                                                                 network_engine=self.__network_engine,
+                                                                 worker_pool_size=self.__worker_pool_size,
+                                                                 worker_queue_size=self.__worker_queue_size,
+                                                                 overload_policy=self.__overload_policy,
+                                                                 codec=self.__codec,
+                                                                 server_backlog=self.__server_backlog,
+                                                                 unix_sockets=self.__unix_sockets,
+                                                                 send_retry_backoff=self.__send_retry_backoff,
+                                                                 circuit_breaker_threshold=self.__circuit_breaker_threshold,
+                                                                 circuit_breaker_reset_timeout=self.__circuit_breaker_reset_timeout,
+                                                                 compression=self.__compression,
+                                                                 compression_threshold=self.__compression_threshold,
+                                                                 max_inflight_requests=self.__max_inflight_requests,
+                                                                 max_inflight_requests_per_destination=self.__max_inflight_requests_per_destination,
+                                                                 max_inbound_requests=self.__max_inbound_requests,
+                                                                 maintenance_workers=self.__maintenance_workers,
                                                                  debug_mode=self.__debug_mode)
 
-        # Processo per gestione delle operazioni periodiche
-        self.__node_periodic_operations_manager = NodePeriodicOperationsThread(self, self.__periodic_operations_timeout,
-                                                                               debug_mode=self.__debug_mode)
+        # Processo (o task asyncio) per gestione delle operazioni periodiche
+        if self.__network_engine in (NETWORK_ENGINE_ASYNCIO, NETWORK_ENGINE_LOOPBACK):
+            self.__node_periodic_operations_manager = NodePeriodicOperationsTask(self,
+                                                                                 self.__periodic_operations_timeout,
+                                                                                 debug_mode=self.__debug_mode)
+        else:
+            self.__node_periodic_operations_manager = NodePeriodicOperationsThread(self,
+                                                                                   self.__periodic_operations_timeout,
+                                                                                   debug_mode=self.__debug_mode)
 
         if not other_node_info:
             self._initialize_with_no_friends()
@@ -166,9 +262,10 @@ class Node:
             self._initialize_with_a_friend(other_node_info)
 
         self.__node_periodic_operations_manager.start()
+        self.__join_duration = current_millis_time() - start_time
 
         print(
-            f"Initialization of Node with Port {self.__node_info.get_port()}: Completed\nHere's the new Node's ID: {self.__node_info.get_node_id()}")
+            f"Initialization of Node with Port {self.__node_info.get_port()}: Completed in {self.__join_duration} ms\nHere's the new Node's ID: {self.__node_info.get_node_id()}")
 
     def _initialize_with_no_friends(self):
         """
@@ -246,24 +343,11 @@ class Node:
                 self.__successor_node_list.insert(i, self.__node_info)
 
         print(f"Initializing the Node Finger Table...")
-        sleep(0.1)
-        # inizializzazione finger table
-        for i in range(1, CONST_M + 1):  # da 1 a M compreso
-
-            computed_key = compute_finger(self.__node_info.get_node_id(), i)
-            try:
-                finger_node_info = self.__tcp_request_sender_handler.send_search_key_successor_request(
-                    self.__successor_node_list.get_first(),
-                    computed_key)
-
-                if finger_node_info:
-                    self.__finger_table.add_finger(finger_node_info)
-            except (TCPRequestTimerExpiredError, TCPRequestSendError):
-                # pass
-                self._repopulate_successor_list(0)
-
-            if i % 10 == 0:
-                print(f"Inizialized {i} Fingers out of {CONST_M}")
+        if self.__join_mode == JOIN_MODE_PARALLEL:
+            self._initialize_finger_table_in_parallel()
+        else:
+            sleep(0.1)
+            self._initialize_finger_table_sequentially()
 
         # informo il mio amico che non è più solo nella rete
         try:
@@ -292,6 +376,117 @@ class Node:
                 for key in new_files_dict.keys():
                     self.__file_system.put_file(key, new_files_dict[key])
 
+    def _initialize_finger_table_sequentially(self):
+        """
+        Metodo per l'inizializzazione della finger table, cercando un finger alla volta.
+        Nota: metodo interno
+        """
+
+        for i in range(1, CONST_M + 1):  # da 1 a M compreso
+
+            computed_key = compute_finger(self.__node_info.get_node_id(), i)
+            try:
+                finger_node_info = self.__tcp_request_sender_handler.send_search_key_successor_request(
+                    self.__successor_node_list.get_first(),
+                    computed_key)
+
+                if finger_node_info:
+                    self.__finger_table.add_finger(finger_node_info)
+            except (TCPRequestTimerExpiredError, TCPRequestSendError):
+                # pass
+                self._repopulate_successor_list(0)
+
+            if i % 10 == 0:
+                print(f"Inizialized {i} Fingers out of {CONST_M}")
+
+    def _initialize_finger_table_in_parallel(self):
+        """
+        Metodo per l'inizializzazione della finger table con ricerche contemporanee, fino a join_parallelism alla volta.
+        Come nell'articolo di Chord, un finger il cui inizio cade nell'intervallo dell'anello tra il nodo e l'ultimo
+        finger trovato coincide con quest'ultimo e non viene cercato: le ricerche sono così poche più
+        del numero di finger distinti, invece di CONST_M.
+        Come in fix_finger, ogni finger viene inserito in base al suo indice.
+        Nota: metodo interno
+        """
+
+        my_node_id = self.__node_info.get_node_id()
+
+        # anche il primo finger viene cercato, come nella modalità sequenziale: il successore trovato all'ingresso
+        # potrebbe non essere aggiornato, e coprirebbe tutti i finger successivi fino al suo id.
+        # Il primo finger viene cercato da solo, perché quelli immediatamente successivi coincidono quasi sempre con esso
+        previous_finger_node_info = None
+        batch_size = 1
+
+        index = 1
+        lookups_number = 0
+
+        while index <= CONST_M:
+            # i finger coperti dall'ultimo trovato vengono copiati, gli altri (fino a join_parallelism) cercati insieme
+            batch_indexes = list()
+            while index <= CONST_M and batch_indexes.__len__() < batch_size:
+                if previous_finger_node_info and \
+                        self._is_finger_covered(compute_finger(my_node_id, index), previous_finger_node_info):
+                    self.__finger_table.insert_finger_by_index(index, previous_finger_node_info)
+                else:
+                    batch_indexes.append(index)
+                index += 1
+
+            if not batch_indexes:
+                break
+
+            batch_starts = [compute_finger(my_node_id, batch_index) for batch_index in batch_indexes]
+            answers = self.__tcp_request_sender_handler.send_search_key_successor_requests(
+                self.__successor_node_list.get_first(), batch_starts)
+            lookups_number += batch_starts.__len__()
+
+            # le ricerche fallite vengono ripetute, una volta, dopo aver aggiornato la lista dei successori
+            failed_positions = [position for (position, (_, exception)) in enumerate(answers) if exception]
+            if failed_positions:
+                self._repopulate_successor_list(0)
+
+                retried_answers = self.__tcp_request_sender_handler.send_search_key_successor_requests(
+                    self.__successor_node_list.get_first(), [batch_starts[position] for position in failed_positions])
+                lookups_number += failed_positions.__len__()
+
+                for (position, retried_answer) in zip(failed_positions, retried_answers):
+                    answers[position] = retried_answer
+
+            for (batch_index, (finger_node_info, _)) in zip(batch_indexes, answers):
+                if finger_node_info:
+                    self.__finger_table.insert_finger_by_index(batch_index, finger_node_info)
+                    previous_finger_node_info = finger_node_info
+
+            # se la ricerca del primo finger è fallita, i successivi vengono confrontati con il successore
+            if previous_finger_node_info is None:
+                previous_finger_node_info = self.__successor_node_list.get_first()
+            batch_size = self.__join_parallelism
+
+            print(f"Inizialized {index - 1} Fingers out of {CONST_M}")
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: {self.__node_info.get_port()}: finger table initialized with {lookups_number} lookups")
+
+    def _is_finger_covered(self, start, previous_finger_node_info):
+        """
+        Funzione per verificare se l'inizio di un finger cade nell'intervallo dell'anello tra il nodo corrente
+        (escluso) e il nodo di un finger precedente (incluso): in questo caso i due finger coincidono.
+        Un finger precedente errato, che precede il proprio inizio, non copre così nessun altro finger.
+        Nota: metodo interno
+
+        :param start: inizio del finger da verificare
+        :param previous_finger_node_info: node info del finger precedente
+        :return: True se il finger coincide con il precedente, False altrimenti
+        """
+
+        my_node_id = self.__node_info.get_node_id()
+        previous_finger_node_id = previous_finger_node_info.get_node_id()
+
+        # un finger che punta al nodo stesso renderebbe l'intervallo l'intero anello
+        if previous_finger_node_id == my_node_id:
+            return False
+
+        return is_in_ring_interval(start, my_node_id, previous_finger_node_id)
+
     def terminate(self):
         """
         Metodo responsabile della terminazione del nodo corrente.
@@ -360,7 +555,230 @@ class Node:
 
     def find_key_successor(self, key):
         """
-        Funzione per la ricerca del nodo predecessore di una determinata key
+        Funzione per la ricerca del nodo predecessore di una determinata key.
+        In modalità "iterative" la ricerca è guidata dal nodo stesso, senza inoltri (vedi _find_key_successor_iteratively);
+        in modalità "forwarded" la risposta arriva direttamente dal nodo responsabile (vedi _find_key_successor_forwarded)
+
+        :param key: la chiave del nodo o file
+        :return: il predecessore della key
+        """
+
+        if self.__lookup_mode == LOOKUP_MODE_ITERATIVE:
+            return self._find_key_successor_iteratively(key)
+        if self.__lookup_mode == LOOKUP_MODE_FORWARDED:
+            return self._find_key_successor_forwarded(key)
+
+        return self._find_key_successor_recursively(key)
+
+    def _find_key_successor_recursively(self, key):
+        """
+        Ricerca ricorsiva del nodo predecessore di una determinata key: ogni nodo del percorso inoltra la ricerca
+        al successivo e ne attende la risposta.
+        Nota: metodo interno
+
+        :param key: la chiave del nodo o file
+        :return: il predecessore della key
+        """
+
+        lookup = self._find_key_successor_steps(key)
+        (lookup_step, argument) = (lookup.send, None)
+
+        while True:
+            (lookup_finished, result) = advance_lookup(lookup_step, argument)
+            if lookup_finished:
+                return result
+
+            # inoltro della ricerca al nodo indicato
+            try:
+                argument = self.__tcp_request_sender_handler.send_search_key_successor_request(result, key)
+                lookup_step = lookup.send
+            except TCPRequestTimerExpiredError:
+                (lookup_step, argument) = (lookup.throw, TCPRequestTimerExpiredError)
+            except TCPRequestSendError:
+                (lookup_step, argument) = (lookup.throw, TCPRequestSendError)
+
+    async def async_find_key_successor(self, key):
+        """
+        Versione awaitable di find_key_successor, per il motore di rete asyncio.
+        Gli inoltri della ricerca vengono attesi sull'event loop, senza occupare alcun thread;
+        la logica locale viene eseguita nel pool di thread del runtime.
+
+        :param key: la chiave del nodo o file
+        :return: il predecessore della key
+        """
+
+        async_request_sender_handler = self.__tcp_request_sender_handler.get_async_request_sender_handler()
+        loop = asyncio.get_running_loop()
+
+        lookup = self._find_key_successor_steps(key)
+        (lookup_step, argument) = (lookup.send, None)
+
+        while True:
+            (lookup_finished, result) = await loop.run_in_executor(None, advance_lookup, lookup_step, argument)
+            if lookup_finished:
+                return result
+
+            # inoltro della ricerca al nodo indicato
+            try:
+                argument = await async_request_sender_handler.send_search_key_successor_request(result, key)
+                lookup_step = lookup.send
+            except TCPRequestTimerExpiredError:
+                (lookup_step, argument) = (lookup.throw, TCPRequestTimerExpiredError)
+            except TCPRequestSendError:
+                (lookup_step, argument) = (lookup.throw, TCPRequestSendError)
+
+    def find_key_successor_with_callback(self, key, callback):
+        """
+        Versione non bloccante di find_key_successor, per il pool di worker del motore di rete "threads".
+        Gli inoltri della ricerca non occupano alcun worker: ogni passo viene eseguito all'arrivo
+        della risposta del passo precedente.
+
+        :param key: la chiave del nodo o file
+        :param callback: funzione invocata con il predecessore della key
+        """
+
+        lookup = self._find_key_successor_steps(key)
+        self._continue_key_successor_search(lookup, key, lookup.send, None, callback)
+
+    def _continue_key_successor_search(self, lookup, key, lookup_step, argument, callback):
+        """
+        Metodo interno per l'esecuzione di un passo della ricerca non bloccante del successore di una key.
+        Nota: metodo interno
+
+        :param lookup: il generatore della ricerca
+        :param key: la chiave del nodo o file
+        :param lookup_step: metodo send o throw del generatore
+        :param argument: risposta dell'inoltro precedente o eccezione da sollevare nel generatore
+        :param callback: funzione invocata con il predecessore della key
+        """
+
+        (lookup_finished, result) = advance_lookup(lookup_step, argument)
+        if lookup_finished:
+            callback(result)
+            return
+
+        def forward_completed(successor_node_info, exception):
+            if exception:
+                self._continue_key_successor_search(lookup, key, lookup.throw, exception, callback)
+            else:
+                self._continue_key_successor_search(lookup, key, lookup.send, successor_node_info, callback)
+
+        # inoltro della ricerca al nodo indicato
+        self.__tcp_request_sender_handler.send_search_key_successor_request_with_callback(result, key,
+                                                                                          forward_completed)
+
+    def _find_key_successor_iteratively(self, key):
+        """
+        Ricerca iterativa del nodo predecessore di una determinata key.
+        Il nodo chiede a ogni nodo del percorso il successore della key, se lo conosce, o i nodi a cui proseguire,
+        e guida la ricerca da sé: nessun nodo resta in attesa del resto del percorso.
+        A ogni passo vengono interrogati fino a lookup_parallelism nodi contemporaneamente, ognuno con un timeout
+        limitato; se nessuno risponde, la ricerca prosegue dai nodi alternativi già noti senza ricominciare.
+        Nota: metodo interno
+
+        :param key: la chiave del nodo o file
+        :return: il predecessore della key, None se la ricerca non è riuscita
+        """
+
+        (successor_node_info, next_hop_node_infos) = self.get_next_hops(key)
+        queried_ports = {self.__node_info.get_port()}
+        hops = 0
+
+        while successor_node_info is None and hops < LOOKUP_MAX_HOPS:
+            # i nodi da interrogare sono i più vicini alla key tra quelli non ancora interrogati
+            hop_node_infos = [node_info for node_info in next_hop_node_infos
+                              if node_info.get_port() not in queried_ports][:self.__lookup_parallelism]
+            if not hop_node_infos:
+                break
+
+            queried_ports.update(node_info.get_port() for node_info in hop_node_infos)
+            hops += 1
+
+            answers = self.__tcp_request_sender_handler.send_next_hop_requests(hop_node_infos, key,
+                                                                               self.__lookup_hop_timeout / 1000)
+
+            # la prima risposta, nell'ordine di vicinanza alla key, è quella che fa avanzare di più la ricerca;
+            # i nodi già noti restano in coda come alternative
+            for (answer, exception) in answers:
+                if not exception:
+                    (successor_node_info, new_next_hop_node_infos) = answer
+                    next_hop_node_infos = new_next_hop_node_infos + next_hop_node_infos
+                    break
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: {self.__node_info.get_port()}: iterative lookup of the key {key} completed in {hops} hops"
+                  f"{'' if successor_node_info else ' without finding its successor'}")
+
+        return successor_node_info
+
+    def _find_key_successor_forwarded(self, key):
+        """
+        Ricerca inoltrata del nodo predecessore di una determinata key.
+        La ricerca viene inoltrata di nodo in nodo senza che nessun nodo intermedio attenda l'esito del resto
+        del percorso: il nodo responsabile della key risponde direttamente a questo nodo.
+        Se la risposta non arriva (un nodo del percorso è caduto), la ricerca viene ripetuta in modo ricorsivo.
+        Nota: metodo interno
+
+        :param key: la chiave del nodo o file
+        :return: il predecessore della key, None se la ricerca non è riuscita
+        """
+
+        (successor_node_info, next_hop_node_infos) = self.get_next_hops(key)
+        if successor_node_info or not next_hop_node_infos:
+            return successor_node_info
+
+        try:
+            return self.__tcp_request_sender_handler.send_forwarded_lookup_request(next_hop_node_infos, key)
+        except TCPRequestTimerExpiredError:
+            pass
+        except TCPRequestSendError:
+            pass
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: {self.__node_info.get_port()}: forwarded lookup of the key {key} lost, "
+                  f"searching it recursively")
+
+        return self._find_key_successor_recursively(key)
+
+    def get_next_hops(self, key):
+        """
+        Funzione per il passo locale di una ricerca iterativa: il successore della key, se il nodo lo conosce,
+        altrimenti i nodi a cui proseguire la ricerca, dal più vicino alla key (lo stesso a cui la ricerca
+        ricorsiva verrebbe inoltrata) ai finger precedenti e al primo successore, usati come alternative
+
+        :param key: la chiave del nodo o file
+        :return: la tupla (successore della key o None, lista dei nodi a cui proseguire la ricerca)
+        """
+
+        lookup = self._find_key_successor_steps(key)
+        (lookup_finished, result) = advance_lookup(lookup.send, None)
+        if lookup_finished:
+            return result, []
+
+        lookup.close()
+
+        candidate_node_infos = [result]
+        candidate_node_infos.extend(self.__finger_table.get_preceding_fingers(self.__node_info.get_node_id(), key))
+        candidate_node_infos.append(self.__successor_node_list.get_first())
+
+        next_hop_node_infos = list()
+        for node_info in candidate_node_infos:
+            if next_hop_node_infos.__len__() == LOOKUP_MAX_NEXT_HOPS:
+                break
+            if node_info is None or node_info.get_node_id() == self.__node_info.get_node_id():
+                continue
+            if all(node_info.get_node_id() != next_hop_node_info.get_node_id()
+                   for next_hop_node_info in next_hop_node_infos):
+                next_hop_node_infos.append(node_info)
+
+        return None, next_hop_node_infos
+
+    def _find_key_successor_steps(self, key):
+        """
+        Generatore con la logica di ricerca del nodo predecessore di una determinata key.
+        Ogni inoltro della ricerca a un altro nodo viene restituito con yield al chiamante, che lo esegue
+        e rimanda nel generatore la risposta (o l'eccezione TCP ricevuta).
+        Nota: metodo interno
 
         :param key: la chiave del nodo o file
         :return: il predecessore della key
@@ -402,8 +820,7 @@ class Node:
                     # della ricerca del successore, ma il suo predecessore è in realtà un candidato
                     # Mando avanti la query e prima o poi raggiungerà il nodo corretto
                     try:
-                        return self.__tcp_request_sender_handler.send_search_key_successor_request(
-                            self.__successor_node_list.get_first(), key)
+                        return (yield self.__successor_node_list.get_first())
                     except (TCPRequestTimerExpiredError, TCPRequestSendError):
                         self._repopulate_successor_list(0)
                         return None
@@ -426,15 +843,13 @@ class Node:
             if closest_predecessor_node_info.get_node_id() == self.__node_info.get_node_id():
 
                 try:
-                    successor_node_info = self.__tcp_request_sender_handler.send_search_key_successor_request(
-                        self.__successor_node_list.get_first(), key)
+                    successor_node_info = (yield self.__successor_node_list.get_first())
 
                 except (TCPRequestTimerExpiredError, TCPRequestSendError):
                     successor_node_info = self._search_the_smallest_node_in_chord()
             else:
                 try:
-                    successor_node_info = self.__tcp_request_sender_handler.send_search_key_successor_request(
-                        closest_predecessor_node_info, key)
+                    successor_node_info = (yield closest_predecessor_node_info)
 
                 except (TCPRequestTimerExpiredError, TCPRequestSendError):
                     try:
@@ -443,8 +858,7 @@ class Node:
                         # else:
                         #     return self.__tcp_request_sender_handler.send_search_key_successor_request(
                         #         self.__successor_node_list.get_first(), key)
-                        return self.__tcp_request_sender_handler.send_search_key_successor_request(
-                            self.__successor_node_list.get_first(), key)
+                        return (yield self.__successor_node_list.get_first())
                     except (TCPRequestTimerExpiredError, TCPRequestSendError):
                         self._repopulate_successor_list(0)
 
@@ -452,19 +866,37 @@ class Node:
 
     def closest_preceding_finger(self, key):
         """
-        Funzione per la ricerca del finger precedente più vicino a una key
+        Funzione per la ricerca del finger precedente più vicino a una key:
+        il finger con l'id più grande compreso tra l'id del nodo e la key
 
         :param key: la chiave del nodo o file
         :return il closest preceding finger
         """
 
-        for i in range(CONST_M, 0, -1):  # da m a 1
-            finger = self.__finger_table.get_finger(i)
-            if finger:
-                if self.__node_info.get_node_id() <= finger.get_node_id() <= key:
-                    return finger
+        finger = self.__finger_table.get_closest_preceding_finger(self.__node_info.get_node_id(), key)
+        if finger:
+            return finger
         return self.__node_info
 
+    def is_responsible_for_the_key(self, key):
+        """
+        Funzione per verificare se il nodo è responsabile di una key secondo l'ordine dell'anello:
+        la key deve cadere tra l'id del predecessore (escluso) e quello del nodo (incluso).
+        Se il predecessore non è noto, coincide con il nodo stesso o il nodo si crede solo, l'intervallo sarebbe
+        l'intero anello: il nodo non può garantire di essere il responsabile e la verifica fallisce.
+
+        :param key: chiave da verificare
+        :return: True se il nodo è sicuramente responsabile della key, False altrimenti
+        """
+
+        predecessor_node_info = self.__predecessor_node
+        if predecessor_node_info is None or self.__im_alone or \
+                predecessor_node_info.get_node_id() == self.__node_info.get_node_id():
+            return False
+
+        # se il nodo è il primo della rete, l'intervallo comprende anche le key oltre l'ultimo nodo
+        return is_in_ring_interval(key, predecessor_node_info.get_node_id(), self.__node_info.get_node_id())
+
     def _am_i_responsable_for_the_key(self, predecessor_node_id, key):
         """
         Funzione per verificare se sono responsabile di una determinata key, confrontandomi con l'id del mio predecessor
@@ -496,6 +928,9 @@ class Node:
 
         assert 0 <= index_of_invalid_node < self.__CONST_MAX_SUCC_NUMBER
 
+        # un successore non risponde: gli intervalli delle key memorizzati nella cache non sono più affidabili
+        self.__lookup_cache.invalidate()
+
         index_of_possible_working_successor_node = index_of_invalid_node + 1
         found_a_working_successor = False
 
@@ -642,6 +1077,7 @@ class Node:
 
         if new_predecessor_node_info:
             self.set_predecessor(new_predecessor_node_info)
+            self.__lookup_cache.invalidate()
 
     def notify_leaving_successor(self, new_successor_node_info):
         """
@@ -654,6 +1090,7 @@ class Node:
 
         self.__successor_node_list.replace(self.__successor_node_list.get_first(), new_successor_node_info)
         self.__finger_table.insert_finger_by_index(1, new_successor_node_info)  # Gli indici partono da 1!
+        self.__lookup_cache.invalidate()
 
     def _get_the_first_working_finger(self, start_index):
         """
@@ -690,6 +1127,7 @@ class Node:
         """
 
         potential_successor = self.__successor_node_list.get_first()
+        old_successor = potential_successor
 
         try:
             # chiedo al mio successore chi è il suo predecessore
@@ -720,6 +1158,10 @@ class Node:
         except NoPrecedessorFoundError:
             return  # non devo fare altro
 
+        # se il successore è cambiato, gli intervalli delle key memorizzati nella cache non sono più affidabili
+        if self.__successor_node_list.get_first().get_node_id() != old_successor.get_node_id():
+            self.__lookup_cache.invalidate()
+
         # verifico se il predecessore del mio successore sono io
         if potential_successor.get_node_id() == self.__node_info.get_node_id():
             return  # è tutto ok. non devo fare altro
@@ -752,11 +1194,13 @@ class Node:
 
         if not self.__predecessor_node or self.__predecessor_node.get_node_id() < potential_new_predecessor_node_info.get_node_id():
             self.__predecessor_node = potential_new_predecessor_node_info
+            self.__lookup_cache.invalidate()
 
         elif self.__predecessor_node.get_node_id() > self.__node_info.get_node_id() > potential_new_predecessor_node_info.get_node_id():
             # siamo nel caso in cui il nodo corrente è il primo nodo della rete, ed il predecessore è l'ultimo
             # il nuovo predecessore diventerà il primo nodo della rete
             self.__predecessor_node = potential_new_predecessor_node_info
+            self.__lookup_cache.invalidate()
 
     def fix_finger(self):
         """
@@ -843,6 +1287,12 @@ class Node:
         :param file: file da pubblicare
         """
 
+        (sent, _, rejected_owner_node_info) = self._send_to_cached_key_owner(
+            key, lambda owner_node_info: self.__tcp_request_sender_handler.send_publish_request(owner_node_info, key,
+                                                                                               file, True))
+        if sent:
+            return
+
         successor_node_info = self.find_key_successor(key)
 
         if not successor_node_info:
@@ -861,6 +1311,7 @@ class Node:
                 self.__tcp_request_sender_handler.send_publish_request(successor_node_info, key, file)
             except (TCPRequestTimerExpiredError, TCPRequestSendError):
                 raise ImpossibleFilePublishError
+            self._cache_key_owner(key, successor_node_info, rejected_owner_node_info)
         else:
             self.put_file_here(key, file)
 
@@ -884,6 +1335,13 @@ class Node:
         :return file: il file cercato
         """
 
+        # un responsabile memorizzato che non ha il file potrebbe non essere aggiornato: la ricerca viene ripetuta
+        (sent, file, rejected_owner_node_info) = self._send_to_cached_key_owner(
+            key, lambda owner_node_info: self.__tcp_request_sender_handler.send_file_request(owner_node_info, key, True),
+            True)
+        if sent:
+            return file
+
         successor_node_info = self.find_key_successor(key)
 
         if not successor_node_info:
@@ -907,6 +1365,9 @@ class Node:
                 file = self.__tcp_request_sender_handler.send_file_request(successor_node_info, key)
             except (TCPRequestTimerExpiredError, TCPRequestSendError):
                 return None
+            # una ricerca che non ha trovato il file non conferma il responsabile
+            if file is not None:
+                self._cache_key_owner(key, successor_node_info, rejected_owner_node_info)
         return file
 
     def get_my_file(self, key):
@@ -931,6 +1392,12 @@ class Node:
         :param key: chiave del file da eliminare
         """
 
+        (sent, _, rejected_owner_node_info) = self._send_to_cached_key_owner(
+            key, lambda owner_node_info: self.__tcp_request_sender_handler.send_delete_file_request(owner_node_info,
+                                                                                                    key, True))
+        if sent:
+            return
+
         successor_node_info = self.find_key_successor(key)
 
         if not successor_node_info:
@@ -947,6 +1414,8 @@ class Node:
                 self.__tcp_request_sender_handler.send_delete_file_request(successor_node_info, key)
             except (TCPRequestTimerExpiredError, TCPRequestSendError):
                 pass
+            else:
+                self._cache_key_owner(key, successor_node_info, rejected_owner_node_info)
 
     def delete_my_file(self, key):
         """
@@ -961,6 +1430,53 @@ class Node:
         except FileKeyError:
             pass
 
+    def _send_to_cached_key_owner(self, key, send_request, none_is_miss=False):
+        """
+        Metodo per l'invio di una richiesta su un file al responsabile della key memorizzato nella cache delle ricerche,
+        senza ripetere la ricerca del successore. Il destinatario verifica di essere ancora il responsabile della key:
+        se non lo è, o non risponde, viene rimosso dalla cache e la richiesta va ripetuta dopo una nuova ricerca.
+        Nota: metodo interno
+
+        :param key: chiave del file
+        :param send_request: funzione che invia la richiesta al node info indicato e ne restituisce l'esito
+        :param none_is_miss: se impostato a True, un esito None smentisce il responsabile come un rifiuto (opzionale)
+        :return: tupla (True se la richiesta è andata a buon fine, esito della richiesta,
+                 node info del responsabile rimosso dalla cache o None)
+        """
+
+        owner_node_info = self.__lookup_cache.get(key)
+        if owner_node_info is None:
+            return False, None, None
+
+        try:
+            result = send_request(owner_node_info)
+            if result is not None or not none_is_miss:
+                return True, result, None
+        except KeyNotOwnedError:
+            pass
+        except (TCPRequestTimerExpiredError, TCPRequestSendError):
+            pass
+
+        self.__lookup_cache.invalidate_owner(owner_node_info)
+        return False, None, owner_node_info
+
+    def _cache_key_owner(self, key, owner_node_info, rejected_owner_node_info=None):
+        """
+        Metodo per memorizzare nella cache delle ricerche il responsabile di una key appena risolta.
+        Un responsabile appena smentito non viene memorizzato di nuovo, anche se la ricerca lo indica ancora:
+        la ricerca e la sua verifica non concordano, e la cache costerebbe un passo in più a ogni richiesta.
+        Nota: metodo interno
+
+        :param key: chiave del file
+        :param owner_node_info: node info del responsabile della key
+        :param rejected_owner_node_info: node info del responsabile appena rimosso dalla cache (opzionale)
+        """
+
+        if rejected_owner_node_info and rejected_owner_node_info.get_node_id() == owner_node_info.get_node_id():
+            return
+
+        self.__lookup_cache.put(key, owner_node_info)
+
     # *********************** METODI PER LA STAMPA *****************************
 
     def print_status(self):
@@ -1043,6 +1559,89 @@ class Node:
 
         print(f"\nDEBUG: The TCP Server's Process Status is {self.__tcp_request_sender_handler.is_tcp_server_alive()}")
 
+    def print_worker_pool_status(self):
+        """
+        Metodo di debug per la stampa delle metriche del pool di worker che elabora i messaggi ricevuti
+        e del costo di elaborazione di ogni tipo di messaggio
+        """
+
+        print(
+            f"Node IP: {self.__node_info.get_ip()}\nNode Port: {self.__node_info.get_port()}\nNode ID: {self.__node_info.get_node_id()}\n")
+
+        worker_pool = self.__tcp_request_sender_handler.get_worker_pool()
+
+        if worker_pool is None:
+            print("No Worker Pool: the node's messages are processed by the asyncio network engine")
+        else:
+            worker_pool.print_status()
+
+        print()
+        self.__tcp_request_sender_handler.get_message_handler().print_handler_stats()
+
+    def get_stats(self):
+        """
+        Metodo per ottenere le statistiche del traffico del nodo: messaggi e byte inviati e ricevuti per tipo
+        di messaggio (le risposte sono contabilizzate con il tipo della richiesta), byte per categoria di traffico,
+        istogrammi della latenza delle RPC per tipo, richieste scadute per nodo e connessioni accettate,
+        oltre allo stato della tabella delle richieste in attesa di risposta e dei limiti alle richieste in volo
+
+        :return: dizionario delle statistiche
+        """
+
+        stats = self.__tcp_request_sender_handler.get_stats().get_stats()
+
+        pending_requests = self.__tcp_request_sender_handler.get_pending_requests()
+        stats["pending_requests"] = pending_requests.get_len()
+        stats["late_answers"] = pending_requests.get_late_answers_number()
+        stats["expired_requests"] = pending_requests.get_expired_requests_number()
+
+        inflight_limiter = self.__tcp_request_sender_handler.get_inflight_limiter()
+        stats["inflight_requests"] = inflight_limiter.get_inflight_requests_number()
+        stats["max_inflight_requests"] = inflight_limiter.get_max_inflight_requests_number()
+        stats["throttled_requests"] = inflight_limiter.get_throttled_requests_number()
+        stats["inbound_requests"] = self.__tcp_request_sender_handler.get_message_handler().get_inbound_requests_number()
+        stats["lookup_cache_entries"] = self.__lookup_cache.get_len()
+        stats["lookup_cache_hits"] = self.__lookup_cache.get_hits_number()
+        stats["lookup_cache_misses"] = self.__lookup_cache.get_misses_number()
+        stats["join_duration"] = self.__join_duration
+
+        return stats
+
+    def print_stats(self):
+        """
+        Metodo di debug per la stampa delle statistiche del traffico del nodo
+        """
+
+        print(
+            f"Node IP: {self.__node_info.get_ip()}\nNode Port: {self.__node_info.get_port()}\nNode ID: {self.__node_info.get_node_id()}\n")
+
+        self.__tcp_request_sender_handler.get_stats().print_status()
+
+        pending_requests = self.__tcp_request_sender_handler.get_pending_requests()
+        print(f"\nPending Requests: {pending_requests.get_len()} "
+              f"(late answers discarded: {pending_requests.get_late_answers_number()}, "
+              f"expired requests: {pending_requests.get_expired_requests_number()})")
+
+        inflight_limiter = self.__tcp_request_sender_handler.get_inflight_limiter()
+        print(f"In-flight Requests: {inflight_limiter.get_inflight_requests_number()} "
+              f"(max: {inflight_limiter.get_max_inflight_requests_number()}, "
+              f"throttled: {inflight_limiter.get_throttled_requests_number()})")
+        print(f"Inbound Requests in Progress: "
+              f"{self.__tcp_request_sender_handler.get_message_handler().get_inbound_requests_number()}")
+        print(f"Lookup Cache: {self.__lookup_cache.get_len()} owners "
+              f"(hits: {self.__lookup_cache.get_hits_number()}, misses: {self.__lookup_cache.get_misses_number()})")
+        print(f"Join Duration: {self.__join_duration} ms")
+
+    def print_rtt_estimates(self):
+        """
+        Metodo di debug per la stampa delle stime del RTT verso i nodi contattati, da cui dipendono i timeout delle richieste
+        """
+
+        print(
+            f"Node IP: {self.__node_info.get_ip()}\nNode Port: {self.__node_info.get_port()}\nNode ID: {self.__node_info.get_node_id()}\n")
+
+        self.__tcp_request_sender_handler.get_rtt_estimator().print_status()
+
     def set_debug_mode(self, debug_mode):
         """
         Metodo per abilitare / disabilitare la modalità di debug.
@@ -1054,6 +1653,7 @@ class Node:
         self.__debug_mode = debug_mode
 
         self.__file_system.set_debug_mode(debug_mode)
+        self.__lookup_cache.set_debug_mode(debug_mode)
         self.__tcp_request_sender_handler.set_debug_mode(debug_mode)
         self.__node_periodic_operations_manager.set_debug_mode(debug_mode)
 
@@ -9,18 +9,23 @@ class NodeInfo:
     - id hashato
     """
 
-    def __init__(self, ip="127.0.0.1", port="1234"):
+    def __init__(self, ip="127.0.0.1", port="1234", node_id=None):
         """
         Funzione __init__ della classe. Inizializza tutti gli attributi interni
 
         :param ip: ip del nodo
         :param port: porta TCP del nodo
+        :param node_id: id già calcolato del nodo, per evitare di ricalcolare l'hash (opzionale)
         """
 
         self.__ip = ip
         self.__port = port
-        # L'assegnazione del node id viene fatta solo per chiarezza, visto che la funzione lo aggiorna già
-        self.__node_id = self._update_node_id()  # hashato
+
+        if node_id is None:
+            # L'assegnazione del node id viene fatta solo per chiarezza, visto che la funzione lo aggiorna già
+            self.__node_id = self._update_node_id()  # hashato
+        else:
+            self.__node_id = node_id
 
     def get_ip(self):
         """
@@ -0,0 +1,125 @@
+import asyncio
+
+from exceptions.exceptions import InvalidPeriodicOperationsTimeoutError
+from network.async_runtime import get_async_runtime
+from utilities.chord_utils import periodic_op_timeout_is_valid
+
+
+class NodePeriodicOperationsTask:
+    """
+    Classe per la gestione delle operazioni periodiche di un nodo tramite un task asyncio.
+    Espone la stessa interfaccia di NodePeriodicOperationsThread: l'attesa tra un'esecuzione e l'altra avviene
+    sull'event loop condiviso, mentre le operazioni del nodo vengono eseguite in un pool di thread del runtime.
+    """
+
+    def __init__(self, this_node, periodic_operations_timeout=5000, debug_mode=False):
+        """
+        Metodo init della classe. Inizializzazione degli attributi interni
+
+        :param this_node: riferimento al proprio nodo
+        :param periodic_operations_timeout: intervallo tra le operazioni periodiche del nodo in ms (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__this_node = this_node
+        self.__runtime = get_async_runtime()
+        self.__future = None
+        self.__stop_event = None
+        self.__stopped = False
+
+        # Timeout operazioni chord periodiche
+        self.__periodic_operations_timeout = periodic_operations_timeout
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def start(self):
+        """
+        Avvio del task sull'event loop condiviso
+        """
+
+        self.__future = self.__runtime.submit(self._run())
+
+    async def _run(self):
+        """
+        Corpo del task. Gestisce la chiamata periodica ai metodi del nodo
+        """
+
+        self.__stop_event = asyncio.Event()
+
+        while not self.__stopped:
+            # Attendo la prossima esecuzione (l'attesa viene interrotta da stop)
+            try:
+                await asyncio.wait_for(self.__stop_event.wait(), self.__periodic_operations_timeout / 1000)
+            except asyncio.TimeoutError:
+                pass
+
+            if self.__stopped:
+                break
+
+            await self.__runtime.run_periodic_operation(self._run_periodic_operations)
+
+    def _run_periodic_operations(self):
+        """
+        Esecuzione delle operazioni periodiche del nodo, nel pool di thread del runtime a loro dedicato
+        """
+
+        if not self.__this_node.check_if_im_alone():
+            if self.__debug_mode:
+                print(
+                    f"\nDEBUG: Running the Periodic Operations of the Node with Port {self.__this_node.get_node_info().get_port()}...")
+
+            self.__this_node.stabilize()
+            self.__this_node.fix_finger()
+            self.__this_node.check_predecessor()
+            self.__this_node.fix_successor_list()
+            self.__this_node.check_if_im_alone()
+
+    def stop(self):
+        """
+        Richiesta di terminazione del task
+        """
+
+        self.__stopped = True
+
+        if self.__stop_event:
+            self.__runtime.call_soon(self.__stop_event.set)
+
+    def stopped(self):
+        return self.__stopped
+
+    def join(self):
+        """
+        Attesa della terminazione del task.
+        Nota: non va invocato dall'interno delle operazioni periodiche del nodo stesso
+        """
+
+        if self.__future:
+            self.__future.result()
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
+
+    def set_periodic_operations_timeout(self, periodic_operations_timeout):
+        """
+        Metodo per la modifica del timeout tra le operazioni periodiche.
+        E' possibile scegliere un timeout tra 500ms (0.5s) e 300000ms (5min)
+
+        :param periodic_operations_timeout: intervallo tra le operazioni periodiche del nodo in ms
+        """
+
+        try:
+            periodic_op_timeout_is_valid(periodic_operations_timeout)
+        except InvalidPeriodicOperationsTimeoutError:
+            raise InvalidPeriodicOperationsTimeoutError
+
+        self.__periodic_operations_timeout = periodic_operations_timeout
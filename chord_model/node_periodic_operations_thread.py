@@ -39,9 +39,16 @@ class NodePeriodicOperationsThread(Thread):
         """
 
         while not self._stop_event.is_set():
-            if self.__periodic_operations_timeout < current_millis_time() - self.__last_execution_time and not self.__this_node.check_if_im_alone():
-                self.__last_execution_time = current_millis_time()
+            remaining_time = self.__periodic_operations_timeout - (current_millis_time() - self.__last_execution_time)
 
+            # Attendo la prossima esecuzione senza consumare CPU (l'attesa viene interrotta da stop)
+            if remaining_time > 0:
+                self._stop_event.wait(remaining_time / 1000)
+                continue
+
+            self.__last_execution_time = current_millis_time()
+
+            if not self.__this_node.check_if_im_alone():
                 if self.__debug_mode:
                     print(
                         f"\nDEBUG: Running the Periodic Operations of the Node with Port {self.__this_node.get_node_info().get_port()}...")
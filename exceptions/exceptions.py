@@ -82,6 +82,22 @@ class InvalidMessageTypeError(Exception):
     pass
 
 
+class TCPConnectionClosedError(Exception):
+    """
+    Eccezione generata durante la lettura da una connessione TCP:
+    la connessione è stata chiusa o non è più utilizzabile
+    """
+    pass
+
+
+class NodeOverloadedError(Exception):
+    """
+    Eccezione generata quando un nodo non può elaborare una richiesta ricevuta:
+    la coda dei messaggi in attesa di elaborazione è piena
+    """
+    pass
+
+
 # ************************** ECCEZIONI CHORD *******************************
 
 class FileKeyError(Exception):
@@ -176,3 +192,11 @@ class FileNotFoundInChordError(Exception):
     Eccezione generata nel tentativo ricerca di un file. File non trovato
     """
     pass
+
+
+class KeyNotOwnedError(Exception):
+    """
+    Eccezione generata quando un nodo riceve una richiesta per una key di cui non è responsabile:
+    il mittente ha usato un responsabile non più aggiornato
+    """
+    pass
@@ -2,6 +2,10 @@
 # -*- coding: utf-8 -*-
 from chord_model.simple_file import SimpleFile
 from network.tcp_port_manager import *
+from network.async_runtime import NETWORK_ENGINES
+from network.message_worker_pool import OVERLOAD_POLICIES
+from network.message_codec import CODECS, COMPRESSIONS
+from utilities.chord_utils import LOOKUP_MODES, LOOKUP_MAX_NEXT_HOPS, JOIN_MODES
 from chord_model.chord import *
 from exceptions.exceptions import *
 import sys
@@ -18,6 +22,29 @@ assert DEBUG_MODE is True or DEBUG_MODE is False
 assert DEBUG_MENU_ENABLED is True or DEBUG_MENU_ENABLED is False
 assert 1 <= MAX_INITALIZATION_RETRIES <= 1000
 assert 100 <= PERIODIC_OP_TIMEOUT <= 300000
+assert NETWORK_ENGINE in NETWORK_ENGINES
+assert 1 <= WORKER_POOL_SIZE <= 1000
+assert 1 <= WORKER_QUEUE_SIZE <= 100000
+assert OVERLOAD_POLICY in OVERLOAD_POLICIES
+assert MESSAGE_CODEC in CODECS
+assert 0 <= SERVER_BACKLOG <= 65535
+assert UNIX_SOCKETS is True or UNIX_SOCKETS is False
+assert 0 <= SEND_RETRY_BACKOFF <= 10000
+assert 0 <= CIRCUIT_BREAKER_THRESHOLD <= 1000
+assert 0 <= CIRCUIT_BREAKER_RESET_TIMEOUT <= 300000
+assert MESSAGE_COMPRESSION in COMPRESSIONS
+assert 0 <= COMPRESSION_THRESHOLD <= 256 * 1024 * 1024
+assert 0 <= MAX_INFLIGHT_REQUESTS <= 100000
+assert 0 <= MAX_INFLIGHT_REQUESTS_PER_DESTINATION <= 100000
+assert 0 <= MAX_INBOUND_REQUESTS <= 100000
+assert 1 <= MAINTENANCE_WORKERS <= 1000
+assert LOOKUP_MODE in LOOKUP_MODES
+assert 1 <= LOOKUP_PARALLELISM <= LOOKUP_MAX_NEXT_HOPS
+assert 10 <= LOOKUP_HOP_TIMEOUT <= 60000
+assert 0 <= LOOKUP_CACHE_SIZE <= 1000000
+assert 100 <= LOOKUP_CACHE_TTL <= 3600000
+assert JOIN_MODE in JOIN_MODES
+assert 1 <= JOIN_PARALLELISM <= 32
 
 
 # ********+++++******* Gestione Funzioni menu principale ********************
@@ -318,6 +345,87 @@ def debug_menu_print_node_file_system():
         exit_from_the_application(chord)
 
 
+def debug_menu_print_node_worker_pool_status():
+    try:
+        selected_port = int(input(f"\nWhat's the TCP port of the node?\n"))
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+        # il programma dovrebbe terminare prima di questo return
+        # inserito solo per sopprimere un warning
+        return
+    except ValueError:
+        print("ERROR: Invalid Port Value!")
+        return
+
+    try:
+        chord.print_node_worker_pool_status(selected_port)
+    except NoNodeFoundOnPortError:
+        print("ERROR: No node found on this TCP port!")
+        # libero la porta tcp
+        try:
+            tcp_port_manager.mark_port_as_free(selected_port)
+        except (FreeingNonUsedRegisteredTCPPortError, FreeingNonUsedDynamicTCPPortError, InvalidTCPPortError):
+            pass
+        except KeyboardInterrupt:
+            exit_from_the_application(chord)
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+
+
+def debug_menu_print_node_rtt_estimates():
+    try:
+        selected_port = int(input(f"\nWhat's the TCP port of the node?\n"))
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+        # il programma dovrebbe terminare prima di questo return
+        # inserito solo per sopprimere un warning
+        return
+    except ValueError:
+        print("ERROR: Invalid Port Value!")
+        return
+
+    try:
+        chord.print_node_rtt_estimates(selected_port)
+    except NoNodeFoundOnPortError:
+        print("ERROR: No node found on this TCP port!")
+        # libero la porta tcp
+        try:
+            tcp_port_manager.mark_port_as_free(selected_port)
+        except (FreeingNonUsedRegisteredTCPPortError, FreeingNonUsedDynamicTCPPortError, InvalidTCPPortError):
+            pass
+        except KeyboardInterrupt:
+            exit_from_the_application(chord)
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+
+
+def debug_menu_print_node_stats():
+    try:
+        selected_port = int(input(f"\nWhat's the TCP port of the node?\n"))
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+        # il programma dovrebbe terminare prima di questo return
+        # inserito solo per sopprimere un warning
+        return
+    except ValueError:
+        print("ERROR: Invalid Port Value!")
+        return
+
+    try:
+        chord.print_node_stats(selected_port)
+    except NoNodeFoundOnPortError:
+        print("ERROR: No node found on this TCP port!")
+        # libero la porta tcp
+        try:
+            tcp_port_manager.mark_port_as_free(selected_port)
+        except (FreeingNonUsedRegisteredTCPPortError, FreeingNonUsedDynamicTCPPortError, InvalidTCPPortError):
+            pass
+        except KeyboardInterrupt:
+            exit_from_the_application(chord)
+    except KeyboardInterrupt:
+        exit_from_the_application(chord)
+
+
 def debug_menu_set_node_periodic_operations_timeout():
     try:
         operations_timeout = int(
@@ -350,15 +458,15 @@ def debug_menu(debug_mode):
             "\nWARNING: You're in the Debug Menu.\nThe use of the debugging commands could make the application stop working properly.\nUse these commands at your own risk!")
 
         if debug_mode:
-            debug_menu_message = "\nSelect a Debug Operation:\n [1] Print the Status Summary of a Node\n [2] Print the Finger Table of a Node\n [3] Print the Loneliness Status of a Node\n [4] Print the File System of a Node\n [5] Set the Nodes Periodic Operations Timeout\n [6] Disable the Debug Output Messages\n [0] Exit from the Debug Menu\n"
+            debug_menu_message = "\nSelect a Debug Operation:\n [1] Print the Status Summary of a Node\n [2] Print the Finger Table of a Node\n [3] Print the Loneliness Status of a Node\n [4] Print the File System of a Node\n [5] Set the Nodes Periodic Operations Timeout\n [6] Disable the Debug Output Messages\n [7] Print the Worker Pool Status of a Node\n [8] Print the RTT Estimates of a Node\n [9] Print the Traffic Statistics of a Node\n [0] Exit from the Debug Menu\n"
         else:
-            debug_menu_message = "\nSelect a Debug Operation:\n [1] Print the Status Summary of a Node\n [2] Print the Finger Table of a Node\n [3] Print the Loneliness Status of a Node\n [4] Print the File System of a Node\n [5] Set the Nodes Periodic Operations Timeout\n [6] Enable the Debug Output Messages\n [0] Exit from the Debug Menu\n"
+            debug_menu_message = "\nSelect a Debug Operation:\n [1] Print the Status Summary of a Node\n [2] Print the Finger Table of a Node\n [3] Print the Loneliness Status of a Node\n [4] Print the File System of a Node\n [5] Set the Nodes Periodic Operations Timeout\n [6] Enable the Debug Output Messages\n [7] Print the Worker Pool Status of a Node\n [8] Print the RTT Estimates of a Node\n [9] Print the Traffic Statistics of a Node\n [0] Exit from the Debug Menu\n"
 
         # Stampa del menù di selezione
         try:
             debug_selected_op = input(debug_menu_message)
 
-            if int(debug_selected_op) not in range(0, 6):  # fino a 9
+            if int(debug_selected_op) not in range(0, 10):  # fino a 9
                 raise ValueError
             else:
                 debug_selected_op = debug_selected_op[0]
@@ -400,6 +508,15 @@ def debug_menu(debug_mode):
 
             chord.set_debug_mode(debug_mode)
 
+        elif int(debug_selected_op) == 7:  # print delle metriche del pool di worker di un nodo
+            debug_menu_print_node_worker_pool_status()
+
+        elif int(debug_selected_op) == 8:  # print delle stime del RTT di un nodo
+            debug_menu_print_node_rtt_estimates()
+
+        elif int(debug_selected_op) == 9:  # print delle statistiche del traffico di un nodo
+            debug_menu_print_node_stats()
+
         elif int(debug_selected_op) == 0:  # exit
             debug_menu_exit_flag = True
         else:
@@ -415,7 +532,19 @@ if __name__ == "__main__":
     new_node = None
     selected_op = None
 
-    chord = Chord(periodic_operations_timeout=PERIODIC_OP_TIMEOUT, debug_mode=DEBUG_MODE)
+    chord = Chord(periodic_operations_timeout=PERIODIC_OP_TIMEOUT, network_engine=NETWORK_ENGINE,
+                  worker_pool_size=WORKER_POOL_SIZE, worker_queue_size=WORKER_QUEUE_SIZE,
+                  overload_policy=OVERLOAD_POLICY, codec=MESSAGE_CODEC, server_backlog=SERVER_BACKLOG,
+                  unix_sockets=UNIX_SOCKETS, send_retry_backoff=SEND_RETRY_BACKOFF,
+                  circuit_breaker_threshold=CIRCUIT_BREAKER_THRESHOLD,
+                  circuit_breaker_reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT, compression=MESSAGE_COMPRESSION,
+                  compression_threshold=COMPRESSION_THRESHOLD, max_inflight_requests=MAX_INFLIGHT_REQUESTS,
+                  max_inflight_requests_per_destination=MAX_INFLIGHT_REQUESTS_PER_DESTINATION,
+                  max_inbound_requests=MAX_INBOUND_REQUESTS, maintenance_workers=MAINTENANCE_WORKERS,
+                  lookup_mode=LOOKUP_MODE, lookup_parallelism=LOOKUP_PARALLELISM,
+                  lookup_hop_timeout=LOOKUP_HOP_TIMEOUT, lookup_cache_size=LOOKUP_CACHE_SIZE,
+                  lookup_cache_ttl=LOOKUP_CACHE_TTL, join_mode=JOIN_MODE, join_parallelism=JOIN_PARALLELISM,
+                  debug_mode=DEBUG_MODE)
     tcp_port_manager = TCPPortManager()
 
     while not exit_flag:
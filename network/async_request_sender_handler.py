@@ -0,0 +1,338 @@
+import asyncio
+import time
+
+from network.circuit_breaker import backoff_delay
+from network.inflight_limiter import BUSY_MAX_RETRIES, is_busy_answer
+from network.messages import *
+from network.priority_lanes import message_lane
+
+
+class AsyncRequestSenderHandler:
+    """
+    Classe per l'invio delle richieste TCP di un nodo chord tramite coroutine.
+    Espone gli stessi metodi send_* di RequestSenderHandler in versione awaitable: l'attesa della risposta
+    non occupa alcun thread. Condivide con il RequestSenderHandler del nodo i ticket e le richieste in attesa.
+    """
+
+    def __init__(self, my_node_info, ticket_generator, pending_requests, async_socket_node, rtt_estimator, node_stats,
+                 inflight_limiter, send_retry_backoff):
+        """
+        Funzione init della classe. Inizializzazione degli attributi.
+
+        :param my_node_info: node info del nodo corrispondente
+        :param ticket_generator: funzione per la generazione di nuovi ticket
+        :param pending_requests: tabella delle richieste in attesa di risposta
+        :param async_socket_node: socket node asyncio del nodo
+        :param rtt_estimator: stima del RTT verso gli altri nodi, da cui si ricavano i timeout delle richieste
+        :param node_stats: contabilità del traffico del nodo
+        :param inflight_limiter: limite alle richieste in attesa di risposta, condiviso con il RequestSenderHandler
+        :param send_retry_backoff: attesa massima in secondi prima di ritentare una richiesta rifiutata, raddoppiata a ogni tentativo
+        """
+
+        self.__my_node_info = my_node_info
+        self.__ticket_generator = ticket_generator
+        self.__pending_requests = pending_requests
+        self.__async_socket_node = async_socket_node
+        self.__rtt_estimator = rtt_estimator
+        self.__stats = node_stats
+        self.__inflight_limiter = inflight_limiter
+        self.__send_retry_backoff = send_retry_backoff
+
+    # ************************ METODI MESSAGGI CHORD *****************************
+
+    async def send_notify(self, destination_node_info):
+        """
+        Creazione e invio di un messaggio di notifica
+
+        :param destination_node_info: node info del nodo di destinazione
+        :return files: dizionario degli eventuali file che ora sono assegnati al nodo sender
+        """
+
+        notify_request_message = NotifyRequestMessage(destination_node_info, self.__my_node_info,
+                                                      self.__ticket_generator())
+        answer = await self._send_request_and_wait_answer(destination_node_info, notify_request_message)
+
+        return answer.get_files()
+
+    async def send_get_predecessor_request(self, destination_node_info):
+        """
+        Creazione e invio di un messaggio get predecessor request.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :return: il predecessore del nodo destinatario, se esiste
+        """
+
+        predecessor_request_message = GetPredecessorRequestMessage(destination_node_info, self.__my_node_info,
+                                                                   self.__ticket_generator())
+        answer = await self._send_request_and_wait_answer(destination_node_info, predecessor_request_message)
+
+        return answer.get_predecessor_node_info()
+
+    async def send_get_first_successor_request(self, destination_node_info):
+        """
+        Creazione e invio di un messaggio first successor request.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :return: il primo successore del nodo destinatario, se esiste
+        """
+
+        first_successor_request_message = GetFirstSuccessorRequestMessage(destination_node_info, self.__my_node_info,
+                                                                          self.__ticket_generator())
+        answer = await self._send_request_and_wait_answer(destination_node_info, first_successor_request_message)
+
+        return answer.get_successor_node_info()
+
+    async def send_search_key_successor_request(self, destination_node_info, key):
+        """
+        Creazione e invio di un messaggio search successor request.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param key: la chiave del nodo di cui il mittente sta cercando il successore
+        :return: il successore del nodo destinatario, se esiste
+        """
+
+        successor_request_message = SearchKeySuccessorRequestMessage(destination_node_info, key, self.__my_node_info,
+                                                                     self.__ticket_generator())
+        answer = await self._send_request_and_wait_answer(destination_node_info, successor_request_message)
+
+        return answer.get_successor_node_info()
+
+    async def forward_lookup_request(self, request_message, next_hop_node_infos):
+        """
+        Inoltro di un messaggio forwarded lookup al primo dei nodi indicati che risulti raggiungibile,
+        senza attendere alcuna risposta.
+
+        :param request_message: il messaggio forwarded lookup ricevuto
+        :param next_hop_node_infos: lista dei node info dei nodi a cui inoltrare la ricerca, in ordine di preferenza
+        :return: True se la ricerca è stata inoltrata, False se nessun nodo è raggiungibile
+        """
+
+        for destination_node_info in next_hop_node_infos:
+            forwarded_lookup_message = ForwardedLookupRequestMessage(destination_node_info, request_message.get_key(),
+                                                                     self.__my_node_info, request_message.get_ticket(),
+                                                                     request_message.get_originator_node_info(),
+                                                                     request_message.get_hops() + 1)
+            try:
+                await self.__async_socket_node.async_send_request(destination_node_info.get_port(),
+                                                                  forwarded_lookup_message)
+            except TCPRequestSendError:
+                continue
+
+            self.__stats.add_sent_message(forwarded_lookup_message.get_type(),
+                                          forwarded_lookup_message.get_wire_size())
+            return True
+
+        return False
+
+    async def send_forwarded_lookup_answer(self, request_message, successor_node_info):
+        """
+        Creazione e invio della risposta a una ricerca inoltrata, direttamente al nodo che l'ha avviata
+
+        :param request_message: il messaggio forwarded lookup ricevuto
+        :param successor_node_info: node info del successore della key, None se non è stato trovato
+        """
+
+        originator_node_info = request_message.get_originator_node_info()
+        answer = SearchKeySuccessorAnswerMessage(originator_node_info, self.__my_node_info, successor_node_info,
+                                                 request_message.get_ticket())
+        try:
+            await self.__async_socket_node.async_send_request(originator_node_info.get_port(), answer)
+        except TCPRequestSendError:
+            return
+
+        self.__stats.add_sent_message(request_message.get_type(), answer.get_wire_size())
+
+    async def send_youre_not_alone_anymore_request(self, destination_node_info):
+        """
+        Creazione e invio di un messaggio you're not alone anymore request.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :return: lo stato di solitudine precedente del nodo destinatario
+        """
+
+        youre_not_alone_anymore_request_message = YoureNotAloneRequestMessage(destination_node_info,
+                                                                              self.__my_node_info,
+                                                                              self.__ticket_generator())
+        answer = await self._send_request_and_wait_answer(destination_node_info,
+                                                          youre_not_alone_anymore_request_message)
+
+        return answer.destination_node_was_alone()
+
+    async def send_leaving_predecessor_request(self, destination_node_info, new_predecessor_node_info, files):
+        """
+        Creazione e invio di un messaggio leaving predecessor.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param new_predecessor_node_info: node info del nuovo predecessore
+        :param files: file da trasferire
+        """
+
+        leaving_request_message = LeavingPredecessorRequestMessage(destination_node_info, self.__my_node_info,
+                                                                   self.__ticket_generator(),
+                                                                   new_predecessor_node_info, files)
+        await self._send_request_and_wait_answer(destination_node_info, leaving_request_message)
+
+    async def send_leaving_successor_request(self, destination_node_info, new_successor_node_info):
+        """
+        Creazione e invio di un messaggio leaving successor.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param new_successor_node_info: node info del nuovo nodo successore
+        """
+
+        leaving_request_message = LeavingSuccessorRequestMessage(destination_node_info, self.__my_node_info,
+                                                                 self.__ticket_generator(), new_successor_node_info)
+        await self._send_request_and_wait_answer(destination_node_info, leaving_request_message)
+
+    # ************************ METODI MESSAGGI FILE *****************************
+
+    async def send_publish_request(self, destination_node_info, key, file, owner_check=False):
+        """
+        Creazione e invio di un messaggio file publish.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param key: chiave del file da pubblicare
+        :param file: il file da pubblicare
+        :param owner_check: se True, il destinatario rifiuta la richiesta se non è responsabile della key (opzionale)
+        """
+
+        file_publish_request_message = FilePublishRequestMessage(destination_node_info, self.__my_node_info,
+                                                                 self.__ticket_generator(), key, file, owner_check)
+        await self._send_request_and_wait_answer(destination_node_info, file_publish_request_message)
+
+    async def send_file_request(self, destination_node_info, key, owner_check=False):
+        """
+        Creazione e invio di un messaggio file request
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param key: chiave del file richiesto
+        :param owner_check: se True, il destinatario rifiuta la richiesta se non è responsabile della key (opzionale)
+        :return file: il file richiesto
+        """
+
+        file_request_message = FileRequestMessage(destination_node_info, self.__my_node_info,
+                                                  self.__ticket_generator(), key, owner_check)
+        answer = await self._send_request_and_wait_answer(destination_node_info, file_request_message)
+
+        return answer.get_file()
+
+    async def send_delete_file_request(self, destination_node_info, key, owner_check=False):
+        """
+        Creazione e invio di un messaggio file delete.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param key: chiave del file da eliminare
+        :param owner_check: se True, il destinatario rifiuta la richiesta se non è responsabile della key (opzionale)
+        """
+
+        file_delete_request_message = FileDeleteRequestMessage(destination_node_info, self.__my_node_info,
+                                                               self.__ticket_generator(), key, owner_check)
+        await self._send_request_and_wait_answer(destination_node_info, file_delete_request_message)
+
+    # ************************ METODI MESSAGGI RETE *****************************
+
+    async def send_ping(self, destination_node_info):
+        """
+        Creazione e invio di un messaggio ping.
+
+        :param destination_node_info: node info del nodo di destinazione
+        """
+
+        ping_request_message = PingRequestMessage(destination_node_info, self.__my_node_info,
+                                                  self.__ticket_generator())
+        await self._send_request_and_wait_answer(destination_node_info, ping_request_message)
+
+    # ******************* METODI INTERNI PER GESTIONE MESSAGGI *********************
+
+    async def _send_request_and_wait_answer(self, destination_node_info, request_message):
+        """
+        Coroutine interna per l'invio di una richiesta e l'attesa della relativa risposta.
+        Se il nodo ha raggiunto il limite di richieste in volo, o se il destinatario risponde "busy"
+        (NodeOverloadedError), la richiesta viene ritentata con un'attesa esponenziale fino a BUSY_MAX_RETRIES volte.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :return answer: il messaggio di risposta
+        """
+
+        destination_port = destination_node_info.get_port()
+        lane = message_lane(request_message.get_type())
+        retries = 0
+
+        while True:
+            if self.__inflight_limiter.try_acquire(destination_port, lane):
+                try:
+                    answer = await self._send_request_attempt(destination_port, request_message)
+                finally:
+                    self.__inflight_limiter.release(destination_port)
+
+                if not is_busy_answer(answer) or retries >= BUSY_MAX_RETRIES:
+                    break
+            elif retries >= BUSY_MAX_RETRIES:
+                raise TCPRequestSendError
+
+            retries += 1
+            await asyncio.sleep(backoff_delay(retries, self.__send_retry_backoff))
+
+        # Processo la risposta
+        try:
+            answer.check()
+        except TCPRequestSendError:
+            raise TCPRequestSendError
+
+        return answer
+
+    async def _send_request_attempt(self, destination_port, request_message):
+        """
+        Coroutine interna per un singolo tentativo di invio di una richiesta e l'attesa della relativa risposta.
+        Il completamento della richiesta in attesa risolve un future dell'event loop.
+
+        :param destination_port: porta del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :return answer: il messaggio di risposta, da verificare
+        """
+
+        message_ticket = request_message.get_ticket()
+        loop = asyncio.get_running_loop()
+        answer_future = loop.create_future()
+
+        timeout = self.__rtt_estimator.get_timeout(destination_port, request_message.get_type()) / 1000
+
+        pending_request = self.__pending_requests.register(message_ticket, destination_port, request_message.get_type(),
+                                                           timeout)
+        pending_request.add_done_callback(lambda: loop.call_soon_threadsafe(_resolve_future, answer_future))
+
+        start_time = time.monotonic()
+
+        try:
+            await self.__async_socket_node.async_send_request(destination_port, request_message)
+            self.__stats.add_sent_message(request_message.get_type(), request_message.get_wire_size())
+            await asyncio.wait_for(answer_future, max(0.0, start_time + timeout - time.monotonic()))
+        except asyncio.TimeoutError:
+            # La richiesta è andata in timeout
+            self.__rtt_estimator.add_timeout(destination_port)
+            self.__stats.add_timeout(destination_port)
+            raise TCPRequestTimerExpiredError
+        finally:
+            self.__pending_requests.remove(message_ticket)
+
+        # La connessione verso il destinatario è stata persa prima della risposta
+        if pending_request.is_failed():
+            raise TCPRequestSendError
+
+        rtt = (time.monotonic() - start_time) * 1000
+        self.__rtt_estimator.add_sample(destination_port, request_message.get_type(), rtt)
+        self.__stats.add_rpc_latency(request_message.get_type(), rtt)
+
+        return pending_request.get_answer()
+
+
+def _resolve_future(future):
+    """
+    Funzione interna per la risoluzione di un future non ancora completato (o cancellato per timeout)
+
+    :param future: il future da risolvere
+    """
+
+    if not future.done():
+        future.set_result(None)
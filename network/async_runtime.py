@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+
+# *********** MOTORI DI RETE *********
+NETWORK_ENGINE_THREADS = "threads"  # un thread per server, connessione e operazioni periodiche di ogni nodo
+NETWORK_ENGINE_ASYNCIO = "asyncio"  # un unico event loop condiviso da tutti i nodi del processo
+NETWORK_ENGINE_LOOPBACK = "loopback"  # messaggi consegnati in memoria tra i nodi dello stesso processo, senza TCP
+NETWORK_ENGINES = (NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO, NETWORK_ENGINE_LOOPBACK)
+
+
+class AsyncRuntime:
+    """
+    Runtime asyncio condiviso dai nodi del processo.
+    Un solo thread esegue l'event loop che gestisce server, connessioni e operazioni periodiche di tutti i nodi;
+    la logica bloccante di chord viene eseguita da un pool di thread di dimensione limitata.
+    """
+
+    def __init__(self, max_workers=64, max_periodic_workers=8):
+        """
+        Funzione __init__ della classe. Avvia l'event loop in un thread dedicato.
+
+        :param max_workers: massimo numero di thread per l'esecuzione della logica bloccante dei nodi (opzionale)
+        :param max_periodic_workers: massimo numero di thread per le operazioni periodiche dei nodi (opzionale)
+        """
+
+        self.__loop = asyncio.new_event_loop()
+        self.__executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chord-worker")
+        self.__loop.set_default_executor(self.__executor)
+
+        # Le operazioni periodiche (stabilize in primis) hanno un pool separato, così da non essere bloccate
+        # da ricerche che saturano il pool principale: sono loro a correggere lo stato della rete
+        self.__periodic_executor = ThreadPoolExecutor(max_workers=max_periodic_workers,
+                                                      thread_name_prefix="chord-periodic")
+
+        self.__loop_thread = Thread(target=self._run_loop, name="chord-event-loop", daemon=True)
+        self.__loop_thread.start()
+
+    def _run_loop(self):
+        """
+        Metodo interno eseguito dal thread dell'event loop
+        """
+
+        asyncio.set_event_loop(self.__loop)
+        self.__loop.run_forever()
+
+    def get_loop(self):
+        return self.__loop
+
+    def is_loop_thread(self):
+        """
+        Metodo per verificare se il thread corrente è quello dell'event loop
+
+        :return: True se il chiamante è in esecuzione sull'event loop, False altrimenti
+        """
+
+        return threading.current_thread() is self.__loop_thread
+
+    def submit(self, coroutine):
+        """
+        Metodo per la schedulazione di una coroutine sull'event loop da un thread qualsiasi
+
+        :param coroutine: la coroutine da eseguire
+        :return: il concurrent.futures.Future associato
+        """
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.__loop)
+
+    def run_coroutine(self, coroutine, timeout=None):
+        """
+        Metodo per eseguire una coroutine sull'event loop attendendone il risultato.
+        Nota: non va invocato dal thread dell'event loop
+
+        :param coroutine: la coroutine da eseguire
+        :param timeout: tempo massimo di attesa in secondi (opzionale)
+        :return: il risultato della coroutine
+        """
+
+        assert not self.is_loop_thread()
+
+        return self.submit(coroutine).result(timeout)
+
+    def run_in_executor(self, function, *args):
+        """
+        Metodo per eseguire una funzione bloccante nel pool di thread del runtime.
+        Può essere invocato sia dall'event loop sia da altri thread.
+
+        :param function: la funzione da eseguire
+        :param args: gli argomenti della funzione
+        :return: il future associato
+        """
+
+        return self.__executor.submit(function, *args)
+
+    async def run_periodic_operation(self, function):
+        """
+        Coroutine per eseguire un'operazione periodica di un nodo nel pool di thread dedicato.
+        Da invocare dall'event loop.
+
+        :param function: la funzione da eseguire
+        :return: il risultato della funzione
+        """
+
+        return await self.__loop.run_in_executor(self.__periodic_executor, function)
+
+    def call_soon(self, callback, *args):
+        """
+        Metodo per la schedulazione thread-safe di una callback sull'event loop
+
+        :param callback: la funzione da eseguire
+        :param args: gli argomenti della funzione
+        """
+
+        self.__loop.call_soon_threadsafe(callback, *args)
+
+
+_async_runtime = None
+_async_runtime_lock = threading.Lock()
+
+
+def get_async_runtime():
+    """
+    Funzione per ottenere il runtime asyncio condiviso, creandolo al primo utilizzo
+
+    :return: il runtime asyncio del processo
+    """
+
+    global _async_runtime
+
+    with _async_runtime_lock:
+        if _async_runtime is None:
+            _async_runtime = AsyncRuntime()
+
+    return _async_runtime
@@ -0,0 +1,528 @@
+import asyncio
+import os
+import time
+
+from exceptions.exceptions import *
+from network.async_runtime import get_async_runtime
+from network.circuit_breaker import CircuitBreaker, backoff_delay
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD, encode_message_segments, \
+    decode_message
+from network.node_stats import NodeStats
+from network.priority_lanes import message_lane
+from network.tcp_socket_module import FRAME_HEADER, FRAME_MAX_SIZE, UNIX_SOCKETS_AVAILABLE, unix_socket_path
+
+
+def _build_frame(message, codec=CODEC_BINARY, compression=COMPRESSION_NONE, compression_threshold=COMPRESSION_THRESHOLD):
+    """
+    Funzione interna per la costruzione di un frame (header con la lunghezza + payload) a partire da un messaggio.
+    Il frame resta diviso in segmenti, da scrivere con writelines: il contenuto dei file grandi non viene copiato.
+
+    :param message: il messaggio da inviare
+    :param codec: codec con cui serializzare il messaggio (opzionale)
+    :param compression: algoritmo di compressione dei messaggi con file (opzionale)
+    :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+    :return: la lista dei segmenti del frame
+    """
+
+    segments = encode_message_segments(message, codec, compression, compression_threshold)
+    segments[0] = FRAME_HEADER.pack(sum(segment.__len__() for segment in segments)) + segments[0]
+    return segments
+
+
+async def _read_frame(reader):
+    """
+    Funzione interna per la lettura di un frame completo da uno stream asyncio
+
+    :param reader: lo stream da cui leggere
+    :return: il payload del frame
+    """
+
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (payload_size,) = FRAME_HEADER.unpack(header)
+
+    if payload_size > FRAME_MAX_SIZE:
+        raise TCPConnectionClosedError
+
+    return await reader.readexactly(payload_size)
+
+
+class AsyncTCPConnection:
+    """
+    Connessione accettata dal server asyncio, su cui vengono riscritte le risposte alle richieste ricevute
+    """
+
+    def __init__(self, writer, runtime, codec=CODEC_BINARY, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param writer: lo stream di scrittura della connessione
+        :param runtime: il runtime asyncio
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__writer = writer
+        self.__runtime = runtime
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def send_message(self, message):
+        """
+        Funzione per l'invio di un messaggio sulla connessione. Può essere invocata da qualsiasi thread:
+        la scrittura del frame, che è atomica, viene eseguita dall'event loop.
+
+        :param message: il messaggio da inviare
+        """
+
+        if self.__writer.is_closing():
+            raise TCPRequestSendError
+
+        frame = _build_frame(message, self.__codec, self.__compression, self.__compression_threshold)
+        self.__runtime.call_soon(self._write, frame)
+
+    def _write(self, frame):
+        if not self.__writer.is_closing():
+            self.__writer.writelines(frame)
+
+    def close(self):
+        self.__writer.close()
+
+
+class AsyncRPCChannel:
+    """
+    Canale RPC multiplexato verso un altro nodo, gestito dall'event loop.
+    Le risposte vengono lette da un task dedicato e associate alle richieste tramite il ticket.
+    """
+
+    def __init__(self, port, reader, writer, answer_handler, closed_handler):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param port: porta del nodo remoto
+        :param reader: lo stream di lettura della connessione
+        :param writer: lo stream di scrittura della connessione
+        :param answer_handler: funzione invocata per ogni risposta ricevuta
+        :param closed_handler: funzione invocata (una sola volta) alla chiusura del canale
+        """
+
+        self.__port = port
+        self.__reader = reader
+        self.__writer = writer
+        self.__answer_handler = answer_handler
+        self.__closed_handler = closed_handler
+        self.__closed = False
+        self.__last_activity_time = time.monotonic()
+
+        # ticket delle richieste scritte sul canale e ancora senza risposta: alla chiusura falliscono solo queste
+        self.__pending_tickets = set()
+
+        self.__reader_task = asyncio.ensure_future(self._read_answers())
+
+    def get_port(self):
+        return self.__port
+
+    def is_closed(self):
+        return self.__closed
+
+    def get_pending_tickets(self):
+        return list(self.__pending_tickets)
+
+    def is_idle(self, idle_timeout):
+        return time.monotonic() - self.__last_activity_time > idle_timeout
+
+    async def send_frame(self, frame, ticket=None):
+        """
+        Metodo per l'invio di un frame sul canale. Non attende la risposta.
+
+        :param frame: il frame da inviare
+        :param ticket: ticket della richiesta, se il frame ne contiene una che attende risposta (opzionale)
+        """
+
+        if self.__closed:
+            raise TCPRequestSendError
+
+        if ticket is not None:
+            self.__pending_tickets.add(ticket)
+
+        try:
+            self.__writer.writelines(frame)
+            await self.__writer.drain()
+        except (ConnectionError, OSError):
+            # la richiesta non è stata consegnata e verrà ritentata su un altro canale: non deve fallire con questo
+            if ticket is not None:
+                self.__pending_tickets.discard(ticket)
+            self.close()
+            raise TCPRequestSendError
+
+        self.__last_activity_time = time.monotonic()
+
+    async def _read_answers(self):
+        """
+        Task di lettura delle risposte
+        """
+
+        try:
+            while not self.__closed:
+                answer = decode_message(await _read_frame(self.__reader))
+                self.__last_activity_time = time.monotonic()
+
+                if answer is not None:
+                    self.__pending_tickets.discard(answer.get_ticket())
+                    self.__answer_handler(answer)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, TCPConnectionClosedError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Metodo per la chiusura del canale. Da invocare dall'event loop.
+        """
+
+        if self.__closed:
+            return
+        self.__closed = True
+
+        self.__writer.close()
+        self.__closed_handler(self)
+
+
+class AsyncSocketNode:
+    """
+    Classe per la gestione del server socket di un nodo tramite il runtime asyncio condiviso.
+    Espone la stessa interfaccia di SocketNode, ma non utilizza thread dedicati:
+    server, connessioni e canali RPC di tutti i nodi sono gestiti dallo stesso event loop.
+    """
+
+    def __init__(self, this_node, this_msg_handler, port, send_message_max_retries=5, connect_timeout=1,
+                 connection_idle_timeout=30, codec=CODEC_BINARY, server_backlog=128,
+                 unix_sockets=True, send_retry_backoff=0.01, circuit_breaker_threshold=3,
+                 circuit_breaker_reset_timeout=2, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, node_stats=None, debug_mode=False):
+        """
+        Metodo init della classe. Inizializzazione degli attributi interni e avvio del server asyncio.
+
+        :param this_node: nodo di riferimento
+        :param this_msg_handler: riferimento al proprio message handler
+        :param port: porta del nodo
+        :param send_message_max_retries: massimo numero di tentativi di invio di un messaggio (opzionale)
+        :param connect_timeout: timeout in secondi per l'apertura di una nuova connessione (opzionale)
+        :param connection_idle_timeout: tempo in secondi dopo il quale un canale inutilizzato viene sostituito (opzionale)
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param server_backlog: massimo numero di connessioni in ingresso in attesa di essere accettate (opzionale)
+        :param unix_sockets: se impostato a True, i nodi dello stesso host comunicano tramite Unix domain socket (opzionale)
+        :param send_retry_backoff: attesa massima in secondi dopo il primo tentativo di invio fallito, raddoppiata a ogni tentativo (opzionale)
+        :param circuit_breaker_threshold: messaggi non recapitati consecutivi dopo i quali un nodo è considerato irraggiungibile, 0 per disabilitare (opzionale)
+        :param circuit_breaker_reset_timeout: tempo in secondi dopo il quale un nodo irraggiungibile viene ricontattato (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param node_stats: contabilità del traffico del nodo, in cui registrare le connessioni accettate (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__this_node = this_node
+        self.__this_msg_handler = this_msg_handler
+        self.__port = port
+        self.__send_message_max_retries = send_message_max_retries
+        self.__send_retry_backoff = send_retry_backoff
+        self.__stats = node_stats if node_stats else NodeStats()
+        self.__circuit_breaker = CircuitBreaker(failure_threshold=circuit_breaker_threshold,
+                                                reset_timeout=circuit_breaker_reset_timeout, debug_mode=debug_mode)
+        self.__connect_timeout = connect_timeout
+        self.__connection_idle_timeout = connection_idle_timeout
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+        self.__server_backlog = server_backlog
+        self.__unix_sockets = unix_sockets and UNIX_SOCKETS_AVAILABLE
+        self.__unix_server = None
+        self.__runtime = get_async_runtime()
+
+        # Canali RPC verso gli altri nodi (uno per destinazione e corsia di priorità) e connessioni accettate,
+        # accessibili solo dall'event loop
+        self.__rpc_channels = dict()
+        self.__rpc_channels_locks = dict()
+        self.__accepted_writers = set()
+        self.__message_tasks = set()
+        self.__stopped = False
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+        try:
+            self.__server = self.__runtime.run_coroutine(self._start_server())
+        except OSError:
+            raise AlreadyUsedPortError(f"\nERROR: TCP server socket port {self.__port} is already in use!")
+
+        if self.__unix_sockets:
+            try:
+                self.__unix_server = self.__runtime.run_coroutine(self._start_unix_server())
+            except OSError:
+                # il nodo resta comunque raggiungibile via TCP
+                if self.__debug_mode:
+                    print(f"\nERROR: Unix domain socket {unix_socket_path(self.__port)} not available")
+
+    async def _start_server(self):
+        return await asyncio.start_server(self._handle_connection, host="0.0.0.0", port=self.__port,
+                                          backlog=self.__server_backlog, reuse_address=True)
+
+    async def _start_unix_server(self):
+        # la porta TCP è nostra: un eventuale file del socket è rimasto da un nodo terminato male
+        path = unix_socket_path(self.__port)
+        if os.path.exists(path):
+            os.unlink(path)
+
+        return await asyncio.start_unix_server(self._handle_connection, path=path, backlog=self.__server_backlog)
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Coroutine di gestione di una connessione in ingresso.
+        Ogni messaggio ricevuto viene elaborato in un task dell'event loop; la risposta viene scritta
+        sulla stessa connessione.
+
+        :param reader: lo stream di lettura della connessione
+        :param writer: lo stream di scrittura della connessione
+        """
+
+        connection = AsyncTCPConnection(writer, self.__runtime, codec=self.__codec, compression=self.__compression,
+                                        compression_threshold=self.__compression_threshold,
+                                        debug_mode=self.__debug_mode)
+        self.__accepted_writers.add(writer)
+        self.__stats.add_accepted_connection()
+
+        try:
+            while not self.__stopped:
+                payload = await asyncio.wait_for(_read_frame(reader), self.__connection_idle_timeout * 2)
+                message = decode_message(payload)
+
+                if self.__debug_mode:
+                    print(f"\nTCP Server on Port {self.__port}: New message received ({payload.__len__()} bytes)")
+
+                # Rimando la gestione del messaggio al layer chord, in un task dedicato
+                if message:
+                    message_task = asyncio.ensure_future(self.__this_msg_handler.async_process_message(message,
+                                                                                                      connection))
+                    self.__message_tasks.add(message_task)
+                    message_task.add_done_callback(self.__message_tasks.discard)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, OSError,
+                TCPConnectionClosedError):
+            pass
+        finally:
+            self.__accepted_writers.discard(writer)
+            writer.close()
+
+    # ************************** INVIO MESSAGGI *******************************
+
+    async def async_send_request(self, destination_port, message):
+        """
+        Coroutine per l'invio di una richiesta a un altro nodo sul canale RPC multiplexato verso di esso.
+        Non attende la risposta, che verrà consegnata al message handler.
+        Tra un tentativo e l'altro l'attesa cresce in modo esponenziale, con jitter; se il circuit breaker
+        considera la destinazione irraggiungibile l'invio fallisce subito.
+        Il circuit breaker conta i messaggi non recapitati dopo tutti i tentativi, non i singoli tentativi falliti.
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: la richiesta da inviare
+        """
+
+        frame = _build_frame(message, self.__codec, self.__compression, self.__compression_threshold)
+        lane = message_lane(message.get_type())
+        ticket = message.get_ticket() if message.is_ack() else None
+
+        if not self.__circuit_breaker.allow_request(destination_port):
+            if self.__debug_mode:
+                print(f"ERROR: Node with port {self.__port}: the node on port {destination_port} is unreachable.")
+            raise TCPRequestSendError
+
+        retries = 0
+        while retries < self.__send_message_max_retries:
+            try:
+                rpc_channel = await self._get_rpc_channel(destination_port, lane)
+                await rpc_channel.send_frame(frame, ticket)
+            except TCPRequestSendError:
+                retries += 1
+
+                if self.__debug_mode:
+                    print(
+                        f"ERROR: Node with port {self.__port}: message to the node on port {destination_port} not delivered. I\'ll retry soon.")
+
+                if retries < self.__send_message_max_retries:
+                    await asyncio.sleep(backoff_delay(retries, self.__send_retry_backoff))
+            else:
+                self.__circuit_breaker.record_success(destination_port)
+                return
+
+        self.__circuit_breaker.record_failure(destination_port)
+        raise TCPRequestSendError
+
+    def send_request(self, destination_port, message):
+        """
+        Versione bloccante di async_send_request, per i chiamanti esterni all'event loop
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: la richiesta da inviare
+        """
+
+        self.__runtime.run_coroutine(self.async_send_request(destination_port, message))
+
+    def send_message(self, destination_port, message):
+        """
+        Metodo per l'invio di un messaggio che non richiede risposta (es. una risposta da recapitare
+        al server del mittente)
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: il messaggio da inviare
+        """
+
+        self.send_request(destination_port, message)
+
+    async def _get_rpc_channel(self, destination_port, lane):
+        """
+        Coroutine interna per ottenere il canale RPC verso un nodo per una corsia di priorità,
+        aprendone uno nuovo se necessario
+
+        :param destination_port: porta del nodo di destinazione
+        :param lane: corsia di priorità della richiesta
+        :return: il canale RPC
+        """
+
+        if self.__stopped:
+            raise TCPRequestSendError
+
+        channel_key = (destination_port, lane)
+        destination_lock = self.__rpc_channels_locks.setdefault(channel_key, asyncio.Lock())
+
+        async with destination_lock:
+            rpc_channel = self.__rpc_channels.get(channel_key)
+
+            if rpc_channel and not rpc_channel.is_closed() and not rpc_channel.is_idle(self.__connection_idle_timeout):
+                return rpc_channel
+
+            if rpc_channel:
+                rpc_channel.close()
+
+            (reader, writer) = await self._open_connection(destination_port)
+
+            rpc_channel = AsyncRPCChannel(destination_port, reader, writer, self.__this_msg_handler.process_message,
+                                          lambda closed_channel: self._rpc_channel_closed(closed_channel, lane))
+            self.__rpc_channels[channel_key] = rpc_channel
+
+        return rpc_channel
+
+    async def _open_connection(self, destination_port):
+        """
+        Coroutine interna per l'apertura di una nuova connessione verso un nodo.
+        I nodi sono tutti sullo stesso host: se la destinazione ha un Unix domain socket in ascolto
+        viene preferito quest'ultimo, in caso contrario si usa TCP.
+
+        :param destination_port: porta del nodo di destinazione
+        :return: gli stream di lettura e scrittura della connessione
+        """
+
+        if self.__unix_sockets:
+            try:
+                return await asyncio.wait_for(asyncio.open_unix_connection(unix_socket_path(destination_port)),
+                                              self.__connect_timeout)
+            except (asyncio.TimeoutError, OSError):
+                pass
+
+        try:
+            return await asyncio.wait_for(asyncio.open_connection("localhost", destination_port),
+                                          self.__connect_timeout)
+        except (asyncio.TimeoutError, OSError):
+            if self.__debug_mode:
+                print(f"\nERROR: Connection to TCP Server on Port {destination_port} not available")
+            raise TCPRequestSendError
+
+    def _rpc_channel_closed(self, rpc_channel, lane):
+        """
+        Metodo interno invocato alla chiusura di un canale RPC.
+        Le richieste scritte su quel canale e in attesa di risposta vengono fatte fallire subito; non quelle
+        che verranno inviate sul canale che lo sostituisce.
+
+        :param rpc_channel: il canale chiuso
+        :param lane: corsia di priorità del canale
+        """
+
+        channel_key = (rpc_channel.get_port(), lane)
+        if self.__rpc_channels.get(channel_key) is rpc_channel:
+            del self.__rpc_channels[channel_key]
+
+        self.__this_msg_handler.connection_lost(rpc_channel.get_port(), lane, rpc_channel.get_pending_tickets())
+
+    # ************************** GESTIONE DEL CICLO DI VITA *******************************
+
+    def start(self):
+        """
+        Il server asyncio è già attivo dalla creazione dell'oggetto: metodo presente per compatibilità con SocketNode
+        """
+
+        pass
+
+    def tcp_server_close(self):
+        """
+        Funzione per la chiusura del server e di tutte le connessioni del nodo
+        """
+
+        if not self.__runtime.is_loop_thread():
+            self.__runtime.run_coroutine(self._close())
+
+    async def _close(self):
+        self.__stopped = True
+        self.__server.close()
+
+        if self.__unix_server:
+            self.__unix_server.close()
+            try:
+                os.unlink(unix_socket_path(self.__port))
+            except OSError:
+                pass
+
+        for rpc_channel in list(self.__rpc_channels.values()):
+            rpc_channel.close()
+
+        for writer in list(self.__accepted_writers):
+            writer.close()
+
+        await self.__server.wait_closed()
+        if self.__unix_server:
+            await self.__unix_server.wait_closed()
+
+    def stop(self):
+        self.__stopped = True
+
+    def stopped(self):
+        return self.__stopped
+
+    def join(self):
+        """
+        Nessun thread da attendere: metodo presente per compatibilità con SocketNode
+        """
+
+        pass
+
+    def is_alive(self):
+        return self.__server.is_serving()
+
+    def get_circuit_breaker(self):
+        return self.__circuit_breaker
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
+        self.__circuit_breaker.set_debug_mode(debug_mode)
@@ -0,0 +1,147 @@
+import random
+import threading
+import time
+
+# *********** STATI DEL CIRCUIT BREAKER *********
+CIRCUIT_CLOSED = "closed"  # la destinazione risponde: i messaggi vengono inviati normalmente
+CIRCUIT_OPEN = "open"  # la destinazione è considerata irraggiungibile: gli invii falliscono subito
+CIRCUIT_HALF_OPEN = "half-open"  # scaduto il periodo di attesa, un solo tentativo verifica se la destinazione è tornata
+
+# *********** BACKOFF *********
+MAX_BACKOFF_DELAY = 1  # limite superiore in secondi dell'attesa tra due tentativi di invio
+
+
+def backoff_delay(retry, base_delay, max_delay=MAX_BACKOFF_DELAY):
+    """
+    Funzione per il calcolo dell'attesa prima di un nuovo tentativo di invio.
+    L'attesa cresce in modo esponenziale con il numero di tentativi falliti ed è scelta casualmente
+    tra zero e il limite calcolato (full jitter), così che i nodi che hanno perso la stessa destinazione
+    non ritentino tutti nello stesso istante.
+
+    :param retry: numero di tentativi già falliti, a partire da 1
+    :param base_delay: attesa massima in secondi dopo il primo tentativo fallito
+    :param max_delay: limite superiore in secondi dell'attesa (opzionale)
+    :return: attesa in secondi
+    """
+
+    return random.uniform(0, min(max_delay, base_delay * (2 ** (retry - 1))))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per destinazione del socket node.
+    Dopo un certo numero di messaggi consecutivi non recapitati verso un nodo, nonostante i tentativi ripetuti,
+    il circuito si apre e gli invii successivi falliscono subito, senza tentare la connessione; trascorso il periodo
+    di attesa il circuito passa allo stato half-open e un solo messaggio decide se richiuderlo o riaprirlo.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=2, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param failure_threshold: numero di messaggi non recapitati consecutivi dopo il quale il circuito si apre, 0 per disabilitarlo (opzionale)
+        :param reset_timeout: tempo in secondi dopo il quale un circuito aperto ammette un nuovo tentativo (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__CONST_FAILURE_THRESHOLD = failure_threshold
+        self.__CONST_RESET_TIMEOUT = reset_timeout
+
+        # destinazione -> [stato, messaggi non recapitati consecutivi, istante di apertura del circuito]
+        self.__circuits = dict()
+        self.__lock = threading.Lock()
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def allow_request(self, destination_port):
+        """
+        Metodo per verificare se l'invio di un messaggio verso una destinazione è ammesso
+
+        :param destination_port: porta del nodo di destinazione
+        :return: True se l'invio è ammesso, False se la destinazione è considerata irraggiungibile
+        """
+
+        with self.__lock:
+            circuit = self.__circuits.get(destination_port)
+
+            if circuit is None or circuit[0] == CIRCUIT_CLOSED:
+                return True
+
+            # un solo messaggio per periodo di attesa verifica una destinazione in stato half-open
+            if time.monotonic() - circuit[2] < self.__CONST_RESET_TIMEOUT:
+                return False
+
+            circuit[0] = CIRCUIT_HALF_OPEN
+            circuit[2] = time.monotonic()
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: Circuit to the node on port {destination_port} half-open: probing the node")
+
+        return True
+
+    def record_success(self, destination_port):
+        """
+        Metodo per registrare un messaggio recapitato: il circuito verso la destinazione si richiude
+
+        :param destination_port: porta del nodo di destinazione
+        """
+
+        with self.__lock:
+            circuit = self.__circuits.pop(destination_port, None)
+
+        if self.__debug_mode and circuit is not None and circuit[0] != CIRCUIT_CLOSED:
+            print(f"\nDEBUG: Circuit to the node on port {destination_port} closed")
+
+    def record_failure(self, destination_port):
+        """
+        Metodo per registrare un messaggio non recapitato dopo tutti i tentativi, aprendo il circuito se necessario
+
+        :param destination_port: porta del nodo di destinazione
+        """
+
+        if self.__CONST_FAILURE_THRESHOLD == 0:
+            return
+
+        with self.__lock:
+            circuit = self.__circuits.setdefault(destination_port, [CIRCUIT_CLOSED, 0, 0.0])
+            circuit[1] += 1
+
+            if circuit[0] != CIRCUIT_HALF_OPEN and circuit[1] < self.__CONST_FAILURE_THRESHOLD:
+                return
+
+            circuit[0] = CIRCUIT_OPEN
+            circuit[2] = time.monotonic()
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: Circuit to the node on port {destination_port} open: the node is unreachable")
+
+    def get_state(self, destination_port):
+        """
+        :param destination_port: porta del nodo di destinazione
+        :return: lo stato del circuito verso la destinazione
+        """
+
+        with self.__lock:
+            circuit = self.__circuits.get(destination_port)
+            return circuit[0] if circuit else CIRCUIT_CLOSED
+
+    def get_open_circuits(self):
+        """
+        :return: la lista delle porte delle destinazioni con il circuito aperto o half-open
+        """
+
+        with self.__lock:
+            return [port for (port, circuit) in self.__circuits.items() if circuit[0] != CIRCUIT_CLOSED]
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
@@ -0,0 +1,171 @@
+import threading
+import time
+
+from exceptions.exceptions import NodeOverloadedError
+from network.priority_lanes import LANES, LANE_MAINTENANCE, lane_limit
+
+# *********** RISPOSTE "BUSY" *********
+# Un nodo sovraccarico risponde alle richieste con NodeOverloadedError: il mittente ritenta la richiesta
+# con un'attesa esponenziale (vedi backoff_delay) fino a questo numero di volte
+BUSY_MAX_RETRIES = 3
+
+
+def is_busy_answer(answer):
+    """
+    Funzione per verificare se una risposta segnala che il nodo destinatario è sovraccarico
+
+    :param answer: il messaggio di risposta
+    :return: True se la richiesta è stata rifiutata e può essere ritentata, False altrimenti
+    """
+
+    return isinstance(answer.get_exception(), NodeOverloadedError)
+
+
+class InflightLimiter:
+    """
+    Limite al numero di richieste inviate da un nodo e ancora in attesa di risposta, sia in totale sia verso
+    ogni singola destinazione. Una raffica di ricerche non può così occupare tutte le risorse del nodo,
+    né riversarsi per intero sui nodi successivi del percorso.
+    Le richieste degli utenti non possono occupare la quota dei limiti riservata alla manutenzione
+    (MAINTENANCE_RESERVED_SHARE): stabilizzazione e controllo dei nodi vicini trovano sempre un posto libero.
+    """
+
+    def __init__(self, max_requests=256, max_requests_per_destination=32, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param max_requests: massimo numero di richieste in volo, 0 per non porre limiti (opzionale)
+        :param max_requests_per_destination: massimo numero di richieste in volo verso uno stesso nodo, 0 per non porre limiti (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        # corsia di priorità -> (limite totale, limite per destinazione)
+        self.__lane_limits = {lane: (lane_limit(max_requests, lane), lane_limit(max_requests_per_destination, lane))
+                              for lane in LANES}
+
+        # destinazione -> richieste in volo
+        self.__inflight_requests = dict()
+        self.__inflight_requests_number = 0
+        self.__slot_released = threading.Condition()
+
+        # metriche
+        self.__max_inflight_requests_number = 0
+        self.__throttled_requests_number = 0
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def try_acquire(self, destination_port, lane=LANE_MAINTENANCE):
+        """
+        Metodo per occupare, se disponibile, un posto per una nuova richiesta verso una destinazione.
+        Non è mai bloccante.
+
+        :param destination_port: porta del nodo di destinazione
+        :param lane: corsia di priorità della richiesta (opzionale)
+        :return: True se la richiesta può essere inviata, False se uno dei limiti è stato raggiunto
+        """
+
+        with self.__slot_released:
+            if self._acquire(destination_port, lane):
+                return True
+
+            self.__throttled_requests_number += 1
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: In-flight limit reached, request to the node on port {destination_port} throttled")
+        return False
+
+    def acquire(self, destination_port, timeout, lane=LANE_MAINTENANCE):
+        """
+        Metodo per occupare un posto per una nuova richiesta verso una destinazione,
+        attendendo al più timeout secondi che se ne liberi uno.
+
+        :param destination_port: porta del nodo di destinazione
+        :param timeout: tempo massimo di attesa in secondi
+        :param lane: corsia di priorità della richiesta (opzionale)
+        :return: True se la richiesta può essere inviata, False se il tempo di attesa è scaduto
+        """
+
+        deadline = time.monotonic() + timeout
+
+        with self.__slot_released:
+            if self._acquire(destination_port, lane):
+                return True
+
+            self.__throttled_requests_number += 1
+
+            while True:
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    break
+
+                self.__slot_released.wait(remaining_time)
+                if self._acquire(destination_port, lane):
+                    return True
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: In-flight limit reached, request to the node on port {destination_port} not sent")
+        return False
+
+    def _acquire(self, destination_port, lane):
+        """
+        Metodo interno per l'occupazione di un posto, se entrambi i limiti della corsia lo consentono.
+        Nota: da chiamare con il lock acquisito
+
+        :param destination_port: porta del nodo di destinazione
+        :param lane: corsia di priorità della richiesta
+        :return: True se il posto è stato occupato, False altrimenti
+        """
+
+        destination_requests_number = self.__inflight_requests.get(destination_port, 0)
+        (max_requests, max_requests_per_destination) = self.__lane_limits[lane]
+
+        if 0 < max_requests <= self.__inflight_requests_number:
+            return False
+        if 0 < max_requests_per_destination <= destination_requests_number:
+            return False
+
+        self.__inflight_requests[destination_port] = destination_requests_number + 1
+        self.__inflight_requests_number += 1
+        self.__max_inflight_requests_number = max(self.__max_inflight_requests_number,
+                                                  self.__inflight_requests_number)
+        return True
+
+    def release(self, destination_port):
+        """
+        Metodo per liberare il posto di una richiesta completata, fallita o scaduta
+
+        :param destination_port: porta del nodo di destinazione
+        """
+
+        with self.__slot_released:
+            destination_requests_number = self.__inflight_requests.get(destination_port, 0)
+            if destination_requests_number == 0:
+                return
+
+            if destination_requests_number == 1:
+                del self.__inflight_requests[destination_port]
+            else:
+                self.__inflight_requests[destination_port] = destination_requests_number - 1
+
+            self.__inflight_requests_number -= 1
+            self.__slot_released.notify_all()
+
+    def get_inflight_requests_number(self):
+        with self.__slot_released:
+            return self.__inflight_requests_number
+
+    def get_max_inflight_requests_number(self):
+        with self.__slot_released:
+            return self.__max_inflight_requests_number
+
+    def get_throttled_requests_number(self):
+        """
+        :return: il numero di richieste che hanno trovato un limite raggiunto (e hanno atteso o sono fallite)
+        """
+
+        with self.__slot_released:
+            return self.__throttled_requests_number
+
+    def set_debug_mode(self, debug_mode):
+        self.__debug_mode = debug_mode
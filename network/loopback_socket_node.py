@@ -0,0 +1,287 @@
+import threading
+
+from exceptions.exceptions import *
+from network.message_worker_pool import MessageWorkerPool, OVERLOAD_POLICY_REJECT, OVERLOAD_POLICY_BACKPRESSURE
+from network.priority_lanes import message_lane
+
+
+class LoopbackNetwork:
+    """
+    Rete in memoria condivisa dai nodi del processo che usano il motore di rete "loopback".
+    Associa le porte ai socket node registrati; i messaggi sono elaborati da un unico pool di worker condiviso.
+    """
+
+    def __init__(self, max_workers=16, max_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT,
+                 maintenance_workers=4):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param max_workers: massimo numero di thread del pool condiviso (opzionale)
+        :param max_queue_size: massimo numero di messaggi in attesa di elaborazione nel pool condiviso (opzionale)
+        :param overload_policy: politica da applicare quando la coda del pool è piena (opzionale)
+        :param maintenance_workers: thread del pool condiviso riservati ai messaggi di manutenzione (opzionale)
+        """
+
+        self.__socket_nodes = dict()
+        self.__lock = threading.Lock()
+
+        self.__worker_pool = MessageWorkerPool(max_workers=max_workers, max_queue_size=max_queue_size,
+                                               overload_policy=overload_policy,
+                                               maintenance_workers=maintenance_workers, name="loopback")
+        self.__worker_pool.start()
+
+    def get_worker_pool(self):
+        return self.__worker_pool
+
+    def register(self, port, socket_node):
+        """
+        Metodo per la registrazione di un socket node sulla sua porta
+
+        :param port: porta del nodo
+        :param socket_node: il socket node
+        """
+
+        with self.__lock:
+            if port in self.__socket_nodes:
+                raise AlreadyUsedPortError(f"\nERROR: Loopback port {port} is already in use!")
+
+            self.__socket_nodes[port] = socket_node
+
+    def unregister(self, port, socket_node):
+        """
+        Metodo per la rimozione di un socket node dalla rete.
+        Le richieste che gli altri nodi stavano attendendo dal nodo rimosso vengono fatte fallire subito,
+        come alla chiusura di una connessione TCP.
+
+        :param port: porta del nodo
+        :param socket_node: il socket node
+        """
+
+        with self.__lock:
+            if self.__socket_nodes.get(port) is not socket_node:
+                return
+
+            del self.__socket_nodes[port]
+            socket_nodes = list(self.__socket_nodes.values())
+
+        for other_socket_node in socket_nodes:
+            other_socket_node.connection_lost(port)
+
+    def get_socket_node(self, port):
+        return self.__socket_nodes.get(port)
+
+
+_loopback_network = None
+_loopback_network_lock = threading.Lock()
+
+
+def get_loopback_network(max_workers=16, max_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT,
+                         maintenance_workers=4):
+    """
+    Funzione per ottenere la rete loopback del processo, creandola al primo utilizzo.
+    I parametri del pool di worker sono quelli del primo nodo che la crea.
+
+    :param max_workers: massimo numero di thread del pool condiviso (opzionale)
+    :param max_queue_size: massimo numero di messaggi in attesa di elaborazione nel pool condiviso (opzionale)
+    :param overload_policy: politica da applicare quando la coda del pool è piena (opzionale)
+    :param maintenance_workers: thread del pool condiviso riservati ai messaggi di manutenzione (opzionale)
+    :return: la rete loopback del processo
+    """
+
+    global _loopback_network
+
+    with _loopback_network_lock:
+        if _loopback_network is None:
+            _loopback_network = LoopbackNetwork(max_workers, max_queue_size, overload_policy, maintenance_workers)
+
+    return _loopback_network
+
+
+class LoopbackConnection:
+    """
+    Connessione in memoria verso il nodo mittente di una richiesta, su cui viene consegnata la risposta
+    """
+
+    def __init__(self, socket_node):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param socket_node: il socket node del nodo mittente
+        """
+
+        self.__socket_node = socket_node
+
+    def send_message(self, message):
+        """
+        Funzione per la consegna di una risposta al nodo mittente
+
+        :param message: il messaggio da consegnare
+        """
+
+        self.__socket_node.receive_answer(message)
+
+
+class LoopbackSocketNode:
+    """
+    Classe per lo scambio di messaggi in memoria tra nodi ospitati dallo stesso processo.
+    Espone la stessa interfaccia di SocketNode e AsyncSocketNode (il trasporto usato dal RequestSenderHandler):
+    i Message vengono consegnati così come sono, senza socket né serializzazione, tramite la coda
+    del pool di worker condiviso.
+    """
+
+    def __init__(self, this_node, this_msg_handler, port, worker_pool_size=16, worker_queue_size=256,
+                 overload_policy=OVERLOAD_POLICY_REJECT, maintenance_workers=4, debug_mode=False):
+        """
+        Metodo init della classe. Inizializzazione degli attributi interni e registrazione nella rete loopback.
+
+        :param this_node: nodo di riferimento
+        :param this_msg_handler: riferimento al proprio message handler
+        :param port: porta del nodo, usata solo come identificativo
+        :param worker_pool_size: numero di thread del pool condiviso, se è il primo nodo del processo (opzionale)
+        :param worker_queue_size: dimensione della coda del pool condiviso, se è il primo nodo del processo (opzionale)
+        :param overload_policy: politica da applicare quando la coda del pool è piena (opzionale)
+        :param maintenance_workers: thread del pool condiviso riservati alla manutenzione, se è il primo nodo del processo (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__this_node = this_node
+        self.__this_msg_handler = this_msg_handler
+        self.__port = port
+        self.__network = get_loopback_network(worker_pool_size, worker_queue_size, overload_policy,
+                                              maintenance_workers)
+        self.__worker_pool = self.__network.get_worker_pool()
+        self.__connection = LoopbackConnection(self)
+        self.__stopped = False
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+        self.__network.register(port, self)
+
+    # ************************** INVIO MESSAGGI *******************************
+
+    def send_request(self, destination_port, message):
+        """
+        Metodo per l'invio di una richiesta a un altro nodo. Non attende la risposta, che verrà consegnata
+        al message handler tramite la connessione loopback.
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: la richiesta da inviare
+        """
+
+        destination = self.__network.get_socket_node(destination_port)
+
+        if self.__stopped or destination is None:
+            if self.__debug_mode:
+                print(f"ERROR: Node with port {self.__port}: the node on port {destination_port} is not available.")
+            raise TCPRequestSendError
+
+        destination.receive_message(message, self.__connection)
+
+    def send_message(self, destination_port, message):
+        """
+        Metodo per l'invio di un messaggio che non richiede risposta
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: il messaggio da inviare
+        """
+
+        self.send_request(destination_port, message)
+
+    # ************************** RICEZIONE MESSAGGI *******************************
+
+    def receive_message(self, message, connection):
+        """
+        Metodo per l'accodamento di un messaggio ricevuto nel pool di worker.
+        In memoria non c'è una connessione da cui sospendere la lettura: con la politica "backpressure"
+        i messaggi in eccesso restano comunque in coda, con la politica "reject" vengono rifiutati.
+
+        :param message: il messaggio ricevuto
+        :param connection: la connessione verso il mittente, su cui inviare la risposta
+        """
+
+        if self.__stopped:
+            raise TCPRequestSendError
+
+        if self.__worker_pool.submit_message(self._process_message, message, connection,
+                                             lane=message_lane(message.get_type())):
+            return
+
+        if self.__worker_pool.get_overload_policy() == OVERLOAD_POLICY_BACKPRESSURE:
+            self.__worker_pool.submit(self._process_message, message, connection)
+        else:
+            self.__this_msg_handler.reject_message(message, connection)
+
+    def _process_message(self, message, connection):
+        # i messaggi ancora in coda quando il nodo viene fermato non vengono elaborati
+        if not self.__stopped:
+            self.__this_msg_handler.process_message(message, connection)
+
+    def receive_answer(self, message):
+        """
+        Metodo per la consegna di una risposta alla richiesta in attesa
+
+        :param message: la risposta
+        """
+
+        if self.__stopped:
+            raise TCPRequestSendError
+
+        self.__this_msg_handler.process_message(message)
+
+    def connection_lost(self, destination_port):
+        """
+        Metodo invocato dalla rete loopback quando un altro nodo viene rimosso
+
+        :param destination_port: porta del nodo rimosso
+        """
+
+        self.__this_msg_handler.connection_lost(destination_port)
+
+    def get_worker_pool(self):
+        return self.__worker_pool
+
+    # ************************** GESTIONE DEL CICLO DI VITA *******************************
+
+    def start(self):
+        """
+        Il nodo è raggiungibile dalla sua registrazione: metodo presente per compatibilità con SocketNode
+        """
+
+        pass
+
+    def tcp_server_close(self):
+        """
+        Funzione per la rimozione del nodo dalla rete loopback
+        """
+
+        self.__stopped = True
+        self.__network.unregister(self.__port, self)
+
+    def stop(self):
+        self.__stopped = True
+
+    def stopped(self):
+        return self.__stopped
+
+    def join(self):
+        """
+        Nessun thread da attendere: metodo presente per compatibilità con SocketNode
+        """
+
+        pass
+
+    def is_alive(self):
+        return not self.__stopped
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
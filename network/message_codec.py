@@ -0,0 +1,589 @@
+import lzma
+import pickle
+import struct
+import zlib
+
+import exceptions.exceptions as chord_exceptions
+from chord_model.node_info import NodeInfo
+from chord_model.simple_file import SimpleFile
+from network.messages import *
+
+# *********** CODEC DEI MESSAGGI *********
+CODEC_PICKLE = "pickle"  # serializzazione generica tramite pickle
+CODEC_BINARY = "binary"  # formato binario compatto, guidato dallo schema dei messaggi
+CODECS = (CODEC_PICKLE, CODEC_BINARY)
+
+# Il primo byte di un payload binario: i payload pickle (protocollo >= 2) iniziano sempre con 0x80,
+# quindi il decoder riconosce il formato di ogni messaggio e nodi con codec diversi possono comunicare
+BINARY_MAGIC = 0xCD
+
+# *********** FORMATO BINARIO *********
+# header: magic, codice del tipo di messaggio, flag, ticket
+_HEADER = struct.Struct("!BBBQ")
+# node info: byte di presenza, porta, id e lunghezza dell'ip (seguiti dall'ip)
+_NODE_INFO_HEADER = struct.Struct("!BH20sB")
+_UNSIGNED_BYTE = struct.Struct("!B")
+_UNSIGNED_INT = struct.Struct("!I")
+
+ID_SIZE = 20  # id e chiavi a 160 bit (SHA-1)
+
+_FLAG_EXCEPTION = 0x01  # il messaggio trasporta un'eccezione (nome della classe in coda al payload)
+_FLAG_ZLIB = 0x02  # il payload che segue l'header è compresso con zlib
+_FLAG_LZMA = 0x04  # il payload che segue l'header è compresso con lzma
+
+_VALUE_STR = 0
+_VALUE_BYTES = 1
+
+# *********** TRASFERIMENTO DEI FILE GRANDI *********
+# Il contenuto dei file da questa dimensione in su non viene copiato nel payload: resta un segmento a sé,
+# inviato direttamente dal buffer originale, e in ricezione viene letto tramite memoryview
+BULK_VALUE_SIZE = 64 * 1024
+
+# *********** COMPRESSIONE DEI MESSAGGI *********
+# Con il codec binario i messaggi che trasportano file possono essere compressi, se superano una soglia.
+# L'algoritmo è indicato nei flag dell'header: ogni nodo decomprime qualsiasi messaggio, qualunque sia la sua
+# impostazione, quindi nodi con compressioni diverse possono comunicare
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"  # veloce, adatta alle reti locali
+COMPRESSION_LZMA = "lzma"  # più lenta ma più efficace, adatta ai collegamenti lenti
+COMPRESSIONS = (COMPRESSION_NONE, COMPRESSION_ZLIB, COMPRESSION_LZMA)
+COMPRESSION_THRESHOLD = 4096  # dimensione minima in byte del payload perché venga compresso
+COMPRESSION_ZLIB_LEVEL = 1
+COMPRESSION_SAMPLE_SIZE = 4096  # i payload più grandi vengono compressi solo se un campione si riduce abbastanza
+COMPRESSION_MIN_SAMPLE_RATIO = 0.9  # rapporto massimo tra campione compresso e campione originale
+COMPRESSION_LZMA_PRESET = 0
+MAX_DECOMPRESSED_SIZE = 256 * 1024 * 1024  # limite alla dimensione di un payload decompresso
+
+_COMPRESSION_FLAGS = {COMPRESSION_ZLIB: _FLAG_ZLIB, COMPRESSION_LZMA: _FLAG_LZMA}
+
+# *********** TIPI DEI CAMPI *********
+FIELD_NODE_INFO = "node_info"  # node info, eventualmente None
+FIELD_NODE_INFOS = "node_infos"  # lista di node info
+FIELD_KEY = "key"  # chiave o id a 160 bit
+FIELD_BOOL = "bool"
+FIELD_UINT = "uint"  # intero senza segno a 32 bit
+FIELD_FILE = "file"  # SimpleFile, eventualmente None
+FIELD_FILES = "files"  # dizionario chiave -> SimpleFile
+
+# Schema dei messaggi: (classe, codice, campi del payload come (tipo, getter), costruttore).
+# Il costruttore riceve destinatario, mittente, ticket e i campi del payload nell'ordine dello schema
+_MESSAGE_SCHEMAS = (
+    (NotifyRequestMessage, 1, (), NotifyRequestMessage),
+    (NotifyAnswerMessage, 2, ((FIELD_FILES, NotifyAnswerMessage.get_files),), NotifyAnswerMessage),
+    (GetPredecessorRequestMessage, 3, (), GetPredecessorRequestMessage),
+    (GetPredecessorAnswerMessage, 4,
+     ((FIELD_NODE_INFO, GetPredecessorAnswerMessage.get_predecessor_node_info),),
+     lambda destination, sender, ticket, predecessor: GetPredecessorAnswerMessage(destination, sender, predecessor,
+                                                                                  ticket)),
+    (GetFirstSuccessorRequestMessage, 5, (), GetFirstSuccessorRequestMessage),
+    (GetFirstSuccessorAnswerMessage, 6,
+     ((FIELD_NODE_INFO, GetFirstSuccessorAnswerMessage.get_successor_node_info),),
+     GetFirstSuccessorAnswerMessage),
+    (SearchKeySuccessorRequestMessage, 7, ((FIELD_KEY, SearchKeySuccessorRequestMessage.get_key),),
+     lambda destination, sender, ticket, key: SearchKeySuccessorRequestMessage(destination, key, sender, ticket)),
+    (SearchKeySuccessorAnswerMessage, 8,
+     ((FIELD_NODE_INFO, SearchKeySuccessorAnswerMessage.get_successor_node_info),),
+     lambda destination, sender, ticket, successor: SearchKeySuccessorAnswerMessage(destination, sender, successor,
+                                                                                    ticket)),
+    (LeavingPredecessorRequestMessage, 9,
+     ((FIELD_NODE_INFO, LeavingPredecessorRequestMessage.get_new_predecessor_node_info),
+      (FIELD_FILES, LeavingPredecessorRequestMessage.get_files)),
+     LeavingPredecessorRequestMessage),
+    (LeavingPredecessorAnswerMessage, 10, (), LeavingPredecessorAnswerMessage),
+    (LeavingSuccessorRequestMessage, 11,
+     ((FIELD_NODE_INFO, LeavingSuccessorRequestMessage.get_new_successor_node_info),),
+     LeavingSuccessorRequestMessage),
+    (LeavingSuccessorAnswerMessage, 12, (), LeavingSuccessorAnswerMessage),
+    (YoureNotAloneRequestMessage, 13, (), YoureNotAloneRequestMessage),
+    (YoureNotAloneAnswerMessage, 14, ((FIELD_BOOL, YoureNotAloneAnswerMessage.destination_node_was_alone),),
+     YoureNotAloneAnswerMessage),
+    (FilePublishRequestMessage, 15,
+     ((FIELD_KEY, FilePublishRequestMessage.get_file_key), (FIELD_FILE, FilePublishRequestMessage.get_file_data),
+      (FIELD_BOOL, FilePublishRequestMessage.get_owner_check)),
+     FilePublishRequestMessage),
+    (FilePublishAnswerMessage, 16, (), FilePublishAnswerMessage),
+    (FileDeleteRequestMessage, 17,
+     ((FIELD_KEY, FileDeleteRequestMessage.get_file_key), (FIELD_BOOL, FileDeleteRequestMessage.get_owner_check)),
+     FileDeleteRequestMessage),
+    (FileDeleteAnswerMessage, 18, (), FileDeleteAnswerMessage),
+    (FileRequestMessage, 19,
+     ((FIELD_KEY, FileRequestMessage.get_file_key), (FIELD_BOOL, FileRequestMessage.get_owner_check)),
+     FileRequestMessage),
+    (FileAnswerMessage, 20, ((FIELD_FILE, FileAnswerMessage.get_file),), FileAnswerMessage),
+    (PingRequestMessage, 21, (), PingRequestMessage),
+    (PingAnswerMessage, 22, (), PingAnswerMessage),
+    (ErrorAnswerMessage, 23, (),
+     lambda destination, sender, ticket: ErrorAnswerMessage(destination, sender, ticket, None)),
+    (NextHopRequestMessage, 24, ((FIELD_KEY, NextHopRequestMessage.get_key),),
+     lambda destination, sender, ticket, key: NextHopRequestMessage(destination, key, sender, ticket)),
+    (NextHopAnswerMessage, 25,
+     ((FIELD_NODE_INFO, NextHopAnswerMessage.get_successor_node_info),
+      (FIELD_NODE_INFOS, NextHopAnswerMessage.get_next_hop_node_infos)),
+     lambda destination, sender, ticket, successor, next_hops: NextHopAnswerMessage(destination, sender, successor,
+                                                                                    next_hops, ticket)),
+    (ForwardedLookupRequestMessage, 26,
+     ((FIELD_KEY, ForwardedLookupRequestMessage.get_key),
+      (FIELD_NODE_INFO, ForwardedLookupRequestMessage.get_originator_node_info),
+      (FIELD_UINT, ForwardedLookupRequestMessage.get_hops)),
+     lambda destination, sender, ticket, key, originator, hops: ForwardedLookupRequestMessage(destination, key, sender,
+                                                                                              ticket, originator,
+                                                                                              hops)),
+)
+
+_ENCODING_SCHEMAS = {message_class: (code, fields) for (message_class, code, fields, builder) in _MESSAGE_SCHEMAS}
+_DECODING_SCHEMAS = {code: (fields, builder) for (message_class, code, fields, builder) in _MESSAGE_SCHEMAS}
+
+
+def encode_message(message, codec=CODEC_BINARY, compression=COMPRESSION_NONE,
+                   compression_threshold=COMPRESSION_THRESHOLD):
+    """
+    Funzione per la serializzazione di un messaggio nel payload di un frame.
+    Con il codec binario, i messaggi non previsti dallo schema (o con contenuti non rappresentabili)
+    vengono serializzati con pickle. La dimensione del payload viene annotata nel messaggio.
+
+    :param message: il messaggio da serializzare
+    :param codec: il codec da utilizzare, "binary" o "pickle" (opzionale)
+    :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+    :param compression_threshold: dimensione minima in byte del payload perché venga compresso (opzionale)
+    :return: il payload
+    """
+
+    payload = None
+
+    if codec == CODEC_BINARY:
+        try:
+            payload = b"".join(_encode_binary_message(message, compression, compression_threshold))
+        except (KeyError, TypeError, AttributeError, OverflowError, struct.error):
+            pass
+
+    if payload is None:
+        payload = pickle.dumps(message)
+
+    message.set_wire_size(payload.__len__())
+    return payload
+
+
+def encode_message_segments(message, codec=CODEC_BINARY, compression=COMPRESSION_NONE,
+                            compression_threshold=COMPRESSION_THRESHOLD):
+    """
+    Funzione per la serializzazione di un messaggio in una lista di segmenti, la cui concatenazione è il payload.
+    Il contenuto dei file di almeno BULK_VALUE_SIZE byte resta in segmenti a sé che fanno riferimento ai dati
+    originali: il frame può essere inviato segmento per segmento senza costruire (e copiare) il payload completo.
+
+    :param message: il messaggio da serializzare
+    :param codec: il codec da utilizzare, "binary" o "pickle" (opzionale)
+    :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+    :param compression_threshold: dimensione minima in byte del payload perché venga compresso (opzionale)
+    :return: la lista dei segmenti (bytes o memoryview)
+    """
+
+    segments = None
+
+    if codec == CODEC_BINARY:
+        try:
+            chunks = _encode_binary_message(message, compression, compression_threshold)
+        except (KeyError, TypeError, AttributeError, OverflowError, struct.error):
+            chunks = None
+
+        if chunks is None:
+            pass
+        elif type(message) in _BULK_MESSAGE_CLASSES:
+            segments = _group_chunks(chunks)
+        else:
+            segments = [b"".join(chunks)]
+
+    if segments is None:
+        segments = [pickle.dumps(message)]
+
+    message.set_wire_size(sum(segment.__len__() for segment in segments))
+    return segments
+
+
+def decode_message(payload):
+    """
+    Funzione per la deserializzazione del payload di un frame, in qualsiasi codec sia stato prodotto
+
+    :param payload: il payload ricevuto
+    :return: il messaggio, con annotata la dimensione del payload. None se il contenuto non è valido
+    """
+
+    if payload and payload[0] == BINARY_MAGIC:
+        try:
+            message = _decode_binary_message(payload)
+        except (KeyError, TypeError, IndexError, ValueError, UnicodeDecodeError, struct.error, zlib.error,
+                lzma.LZMAError):
+            return None
+    else:
+        try:
+            message = pickle.loads(payload)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError):
+            return None
+
+    if isinstance(message, Message):
+        message.set_wire_size(payload.__len__())
+    return message
+
+
+# ************************** CODIFICA *******************************
+
+def _encode_binary_message(message, compression=COMPRESSION_NONE, compression_threshold=COMPRESSION_THRESHOLD):
+    """
+    Funzione interna per la codifica di un messaggio nel formato binario
+
+    :param message: il messaggio da codificare
+    :param compression: algoritmo di compressione dei messaggi con file (opzionale)
+    :param compression_threshold: dimensione minima in byte del payload perché venga compresso (opzionale)
+    :return: la lista dei chunk la cui concatenazione è il payload
+    """
+
+    (code, fields) = _ENCODING_SCHEMAS[type(message)]
+    exception = message.get_exception()
+    flags = _FLAG_EXCEPTION if exception else 0
+
+    chunks = [None]
+    _encode_node_info(chunks, message.get_destination_node_info())
+    _encode_node_info(chunks, message.get_sender_node_info())
+
+    for (field_type, getter) in fields:
+        _FIELD_ENCODERS[field_type](chunks, getter(message))
+
+    if exception:
+        _encode_string(chunks, type(exception).__name__)
+
+    if compression != COMPRESSION_NONE and type(message) in _BULK_MESSAGE_CLASSES:
+        compressed_chunks = _compress_chunks(chunks, compression, compression_threshold)
+
+        if compressed_chunks is not None:
+            chunks = compressed_chunks
+            flags |= _COMPRESSION_FLAGS[compression]
+
+    chunks[0] = _HEADER.pack(BINARY_MAGIC, code, flags, message.get_ticket())
+    return chunks
+
+
+def _compress_chunks(chunks, compression, compression_threshold):
+    """
+    Funzione interna per la compressione dei chunk che seguono l'header.
+    I chunk vengono passati al compressore uno alla volta, senza concatenarli.
+
+    :param chunks: la lista dei chunk, con il posto dell'header in prima posizione
+    :param compression: algoritmo di compressione, "zlib" o "lzma"
+    :param compression_threshold: dimensione minima in byte del payload perché venga compresso
+    :return: la lista dei chunk compressi, con il posto dell'header in prima posizione. None se la compressione
+             non è conveniente (payload sotto la soglia o non ridotto)
+    """
+
+    size = sum(chunk.__len__() for chunk in chunks[1:])
+    if size < compression_threshold:
+        return None
+
+    # contenuti già compressi o casuali: la prova su un campione evita di comprimere inutilmente tutto il payload
+    if size > COMPRESSION_SAMPLE_SIZE * 4:
+        sample = max(chunks[1:], key=len)[:COMPRESSION_SAMPLE_SIZE]
+        if zlib.compress(sample, COMPRESSION_ZLIB_LEVEL).__len__() > sample.__len__() * COMPRESSION_MIN_SAMPLE_RATIO:
+            return None
+
+    if compression == COMPRESSION_ZLIB:
+        compressor = zlib.compressobj(COMPRESSION_ZLIB_LEVEL)
+    elif compression == COMPRESSION_LZMA:
+        compressor = lzma.LZMACompressor(preset=COMPRESSION_LZMA_PRESET)
+    else:
+        raise KeyError
+
+    compressed_chunks = [None]
+    for chunk in chunks[1:]:
+        compressed_chunks.append(compressor.compress(chunk))
+    compressed_chunks.append(compressor.flush())
+
+    if sum(chunk.__len__() for chunk in compressed_chunks[1:]) >= size:
+        return None
+
+    return compressed_chunks
+
+
+def _group_chunks(chunks):
+    """
+    Funzione interna per il raggruppamento dei chunk in segmenti: i chunk piccoli consecutivi vengono concatenati,
+    mentre il contenuto dei file grandi (memoryview) resta un segmento a sé
+
+    :param chunks: la lista dei chunk
+    :return: la lista dei segmenti
+    """
+
+    segments = list()
+    start = 0
+
+    for (index, chunk) in enumerate(chunks):
+        if type(chunk) is memoryview:
+            if index > start:
+                segments.append(b"".join(chunks[start:index]))
+            segments.append(chunk)
+            start = index + 1
+
+    if start < chunks.__len__():
+        segments.append(b"".join(chunks[start:]))
+
+    return segments
+
+
+def _encode_node_info(chunks, node_info):
+    if node_info is None:
+        chunks.append(b"\x00")
+        return
+
+    ip = str(node_info.get_ip()).encode("utf-8")
+    chunks.append(_NODE_INFO_HEADER.pack(1, int(node_info.get_port()), node_info.get_node_id().to_bytes(ID_SIZE, "big"),
+                                         ip.__len__()))
+    chunks.append(ip)
+
+
+def _encode_node_infos(chunks, node_infos):
+    chunks.append(_UNSIGNED_BYTE.pack(node_infos.__len__()))
+
+    for node_info in node_infos:
+        _encode_node_info(chunks, node_info)
+
+
+def _encode_key(chunks, key):
+    chunks.append(key.to_bytes(ID_SIZE, "big"))
+
+
+def _encode_bool(chunks, value):
+    chunks.append(b"\x01" if value else b"\x00")
+
+
+def _encode_uint(chunks, value):
+    chunks.append(_UNSIGNED_INT.pack(value))
+
+
+def _encode_string(chunks, string):
+    data = string.encode("utf-8")
+    chunks.append(_UNSIGNED_INT.pack(data.__len__()))
+    chunks.append(data)
+
+
+def _encode_value(chunks, value):
+    """
+    Funzione interna per la codifica del contenuto di un file (stringa o bytes)
+    """
+
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        value_type = _VALUE_STR
+    elif isinstance(value, (bytes, bytearray)):
+        data = value
+        value_type = _VALUE_BYTES
+    else:
+        raise TypeError
+
+    chunks.append(_UNSIGNED_BYTE.pack(value_type))
+    chunks.append(_UNSIGNED_INT.pack(data.__len__()))
+    chunks.append(memoryview(data) if data.__len__() >= BULK_VALUE_SIZE else data)
+
+
+def _encode_file(chunks, file):
+    if file is None:
+        chunks.append(b"\x00")
+        return
+
+    if type(file) is not SimpleFile:
+        raise TypeError
+
+    chunks.append(b"\x01")
+    _encode_string(chunks, file.get_name())
+    _encode_value(chunks, file.get_data())
+
+
+def _encode_files(chunks, files):
+    chunks.append(_UNSIGNED_INT.pack(files.__len__()))
+
+    for key in files:
+        _encode_key(chunks, key)
+        _encode_file(chunks, files[key])
+
+
+# ************************** DECODIFICA *******************************
+
+def _decode_binary_message(payload):
+    """
+    Funzione interna per la decodifica di un messaggio nel formato binario
+
+    :param payload: il payload ricevuto
+    :return: il messaggio
+    """
+
+    (magic, code, flags, ticket) = _HEADER.unpack_from(payload, 0)
+    (fields, builder) = _DECODING_SCHEMAS[code]
+
+    if flags & (_FLAG_ZLIB | _FLAG_LZMA):
+        payload = _decompress_payload(payload, flags)
+
+    (destination_node_info, offset) = _decode_node_info(payload, _HEADER.size)
+    (sender_node_info, offset) = _decode_node_info(payload, offset)
+
+    values = list()
+    for (field_type, getter) in fields:
+        (value, offset) = _FIELD_DECODERS[field_type](payload, offset)
+        values.append(value)
+
+    message = builder(destination_node_info, sender_node_info, ticket, *values)
+
+    if flags & _FLAG_EXCEPTION:
+        (exception_name, offset) = _decode_string(payload, offset)
+        exception_class = getattr(chord_exceptions, exception_name, None)
+        if not (isinstance(exception_class, type) and issubclass(exception_class, Exception)):
+            exception_class = Exception
+        message.set_exception(exception_class())
+
+    if offset != payload.__len__():
+        raise ValueError
+
+    return message
+
+
+def _decompress_payload(payload, flags):
+    """
+    Funzione interna per la decompressione della parte del payload che segue l'header.
+    La dimensione del risultato è limitata a MAX_DECOMPRESSED_SIZE.
+
+    :param payload: il payload ricevuto
+    :param flags: i flag dell'header
+    :return: il payload decompresso, header compreso
+    """
+
+    if flags & _FLAG_ZLIB:
+        decompressor = zlib.decompressobj()
+    else:
+        decompressor = lzma.LZMADecompressor()
+
+    data = decompressor.decompress(memoryview(payload)[_HEADER.size:], MAX_DECOMPRESSED_SIZE)
+
+    # il flusso compresso deve terminare esattamente alla fine del payload, entro il limite di dimensione
+    if not decompressor.eof or decompressor.unused_data:
+        raise ValueError
+
+    return bytes(payload[:_HEADER.size]) + data
+
+
+def _decode_node_info(payload, offset):
+    if payload[offset] == 0:
+        return None, offset + 1
+
+    (present, port, node_id, ip_size) = _NODE_INFO_HEADER.unpack_from(payload, offset)
+    offset += _NODE_INFO_HEADER.size
+    ip = payload[offset:offset + ip_size].decode("utf-8")
+
+    return NodeInfo(ip=ip, port=port, node_id=int.from_bytes(node_id, "big")), offset + ip_size
+
+
+def _decode_node_infos(payload, offset):
+    node_infos_number = payload[offset]
+    offset += 1
+
+    node_infos = list()
+    for i in range(0, node_infos_number):
+        (node_info, offset) = _decode_node_info(payload, offset)
+        node_infos.append(node_info)
+
+    return node_infos, offset
+
+
+def _decode_key(payload, offset):
+    if offset + ID_SIZE > payload.__len__():
+        raise IndexError
+
+    return int.from_bytes(payload[offset:offset + ID_SIZE], "big"), offset + ID_SIZE
+
+
+def _decode_bool(payload, offset):
+    return payload[offset] != 0, offset + 1
+
+
+def _decode_uint(payload, offset):
+    (value,) = _UNSIGNED_INT.unpack_from(payload, offset)
+    return value, offset + _UNSIGNED_INT.size
+
+
+def _decode_bytes(payload, offset):
+    (size,) = _UNSIGNED_INT.unpack_from(payload, offset)
+    offset += _UNSIGNED_INT.size
+
+    if offset + size > payload.__len__():
+        raise IndexError
+
+    if size >= BULK_VALUE_SIZE:
+        # una sola copia, dal buffer di ricezione all'oggetto finale
+        return bytes(memoryview(payload)[offset:offset + size]), offset + size
+
+    return bytes(payload[offset:offset + size]), offset + size
+
+
+def _decode_string(payload, offset):
+    (size,) = _UNSIGNED_INT.unpack_from(payload, offset)
+    offset += _UNSIGNED_INT.size
+
+    if offset + size > payload.__len__():
+        raise IndexError
+
+    if size >= BULK_VALUE_SIZE:
+        return str(memoryview(payload)[offset:offset + size], "utf-8"), offset + size
+
+    return payload[offset:offset + size].decode("utf-8"), offset + size
+
+
+def _decode_value(payload, offset):
+    value_type = payload[offset]
+
+    if value_type == _VALUE_STR:
+        return _decode_string(payload, offset + 1)
+    if value_type == _VALUE_BYTES:
+        return _decode_bytes(payload, offset + 1)
+
+    raise ValueError
+
+
+def _decode_file(payload, offset):
+    if payload[offset] == 0:
+        return None, offset + 1
+
+    (name, offset) = _decode_string(payload, offset + 1)
+    (data, offset) = _decode_value(payload, offset)
+
+    return SimpleFile(name, data), offset
+
+
+def _decode_files(payload, offset):
+    (files_number,) = _UNSIGNED_INT.unpack_from(payload, offset)
+    offset += _UNSIGNED_INT.size
+
+    files = dict()
+    for i in range(0, files_number):
+        (key, offset) = _decode_key(payload, offset)
+        (files[key], offset) = _decode_file(payload, offset)
+
+    return files, offset
+
+
+_FIELD_ENCODERS = {
+    FIELD_NODE_INFO: _encode_node_info,
+    FIELD_NODE_INFOS: _encode_node_infos,
+    FIELD_KEY: _encode_key,
+    FIELD_BOOL: _encode_bool,
+    FIELD_UINT: _encode_uint,
+    FIELD_FILE: _encode_file,
+    FIELD_FILES: _encode_files,
+}
+
+_FIELD_DECODERS = {
+    FIELD_NODE_INFO: _decode_node_info,
+    FIELD_NODE_INFOS: _decode_node_infos,
+    FIELD_KEY: _decode_key,
+    FIELD_BOOL: _decode_bool,
+    FIELD_UINT: _decode_uint,
+    FIELD_FILE: _decode_file,
+    FIELD_FILES: _decode_files,
+}
+
+# classi dei messaggi che possono trasportare file, e quindi segmenti separati per il loro contenuto
+_BULK_MESSAGE_CLASSES = frozenset(message_class for (message_class, code, fields, builder) in _MESSAGE_SCHEMAS
+                                  if any(field_type in (FIELD_FILE, FIELD_FILES) for (field_type, getter) in fields))
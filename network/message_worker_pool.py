@@ -0,0 +1,389 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import deque
+from threading import Thread
+
+from network.priority_lanes import LANES, LANE_MAINTENANCE, LANE_USER
+
+# *********** POLITICHE DI SOVRACCARICO *********
+OVERLOAD_POLICY_REJECT = "reject"  # i messaggi in eccesso vengono rifiutati con una risposta di errore
+OVERLOAD_POLICY_BACKPRESSURE = "backpressure"  # la lettura dalla connessione si sospende finché la coda non si libera
+OVERLOAD_POLICIES = (OVERLOAD_POLICY_REJECT, OVERLOAD_POLICY_BACKPRESSURE)
+
+
+class MessageWorkerPool:
+    """
+    Pool di thread di dimensione limitata per l'elaborazione dei messaggi ricevuti da un nodo.
+    I messaggi in arrivo vengono accodati nella coda limitata della loro corsia di priorità: quando la coda
+    è piena viene applicata la politica di sovraccarico configurata. Ogni corsia dispone di un numero massimo
+    di worker, così che né il traffico degli utenti né una raffica di manutenzione possano occupare l'intero pool;
+    a parità di condizioni i messaggi di manutenzione vengono elaborati per primi.
+    Il pool gestisce anche le continuazioni delle richieste inoltrate ad altri nodi e i relativi timer,
+    così che un worker non resti mai bloccato in attesa di una risposta.
+    """
+
+    def __init__(self, max_workers=16, max_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT,
+                 maintenance_workers=4, name="", debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param max_workers: massimo numero di thread del pool (opzionale)
+        :param max_queue_size: massimo numero di messaggi in attesa di elaborazione per ogni corsia (opzionale)
+        :param overload_policy: politica da applicare quando la coda è piena, "reject" o "backpressure" (opzionale)
+        :param maintenance_workers: worker riservati alla corsia di manutenzione; gli altri (almeno uno) alla corsia degli utenti (opzionale)
+        :param name: prefisso del nome dei thread del pool (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        assert max_workers >= 1
+        assert max_queue_size >= 1
+        assert overload_policy in OVERLOAD_POLICIES
+        assert maintenance_workers >= 1
+
+        self.__CONST_MAX_WORKERS = max_workers
+        self.__CONST_MAX_QUEUE_SIZE = max_queue_size
+        self.__overload_policy = overload_policy
+        self.__name = name
+
+        # coda dei lavori già accettati dal nodo, elaborati prima di tutti gli altri: (funzione, argomenti, None)
+        self.__tasks = deque()
+
+        # corsia -> coda dei messaggi ricevuti: (funzione, argomenti, corsia)
+        self.__lane_tasks = {lane: deque() for lane in LANES}
+        self.__queued_messages_number = 0
+
+        # corsia -> massimo numero di worker che possono elaborarne i messaggi contemporaneamente
+        self.__lane_workers = {
+            LANE_MAINTENANCE: min(maintenance_workers, max_workers),
+            LANE_USER: max(1, max_workers - maintenance_workers),
+        }
+        self.__lane_busy_workers = {lane: 0 for lane in LANES}
+        self.__lock = threading.Lock()
+        self.__tasks_available = threading.Condition(self.__lock)
+        self.__stopped = False
+
+        # timer: heap di [scadenza, progressivo, funzione, argomenti], la funzione è None se il timer è annullato
+        self.__timers = list()
+        self.__timers_counter = itertools.count()
+        self.__timers_condition = threading.Condition()
+
+        # metriche
+        self.__busy_workers_number = 0
+        self.__max_queue_depth = 0
+        self.__processed_messages_number = 0
+        self.__rejected_messages_number = 0
+        self.__busy_time = 0.0
+        self.__start_time = time.monotonic()
+
+        # i worker vengono avviati solo quando servono, fino al massimo consentito
+        self.__workers_number = 0
+        self.__idle_workers_number = 0
+        self.__timer_thread = Thread(target=self._run_timers, name=f"{self.__name}-timers", daemon=True)
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def start(self):
+        """
+        Avvio del pool. I worker vengono creati all'arrivo dei primi lavori
+        """
+
+        self.__start_time = time.monotonic()
+        self.__timer_thread.start()
+
+    def stop(self):
+        """
+        Terminazione del pool: i lavori ancora in coda vengono scartati
+        """
+
+        with self.__lock:
+            self.__stopped = True
+            self.__tasks.clear()
+            for lane_tasks in self.__lane_tasks.values():
+                lane_tasks.clear()
+            self.__queued_messages_number = 0
+            self.__tasks_available.notify_all()
+
+        with self.__timers_condition:
+            self.__timers = list()
+            self.__timers_condition.notify_all()
+
+    # ************************** SOTTOMISSIONE DEI LAVORI *******************************
+
+    def submit_message(self, function, *args, lane=LANE_USER):
+        """
+        Metodo per accodare l'elaborazione di un messaggio ricevuto nella coda della sua corsia.
+        Il metodo non è mai bloccante: se la coda è piena il messaggio non viene accodato.
+        Con la politica "reject" il chiamante deve rifiutarlo, con la politica "backpressure" deve sospendere
+        la lettura dalla connessione e riprovare più tardi.
+
+        :param function: la funzione da eseguire
+        :param args: gli argomenti della funzione
+        :param lane: la corsia di priorità del messaggio (opzionale)
+        :return: True se il messaggio è stato accodato, False altrimenti
+        """
+
+        with self.__lock:
+            if self.__stopped:
+                return False
+
+            lane_tasks = self.__lane_tasks[lane]
+            if lane_tasks.__len__() >= self.__CONST_MAX_QUEUE_SIZE:
+                if self.__overload_policy == OVERLOAD_POLICY_REJECT:
+                    self.__rejected_messages_number += 1
+
+                    if self.__debug_mode:
+                        print(f"\nDEBUG: {self.__name}: {lane} queue full, message rejected")
+                return False
+
+            lane_tasks.append((function, args, lane))
+            self.__queued_messages_number += 1
+            self.__max_queue_depth = max(self.__max_queue_depth, self.__queued_messages_number)
+            self._notify_workers()
+
+        return True
+
+    def submit(self, function, *args):
+        """
+        Metodo per accodare un lavoro già accettato dal nodo (es. la continuazione di una richiesta inoltrata).
+        Non è soggetto al limite della coda, per non far fallire elaborazioni già iniziate.
+
+        :param function: la funzione da eseguire
+        :param args: gli argomenti della funzione
+        """
+
+        with self.__lock:
+            if self.__stopped:
+                return
+
+            self.__tasks.append((function, args, None))
+            self._notify_workers()
+
+    def call_later(self, delay, function, *args):
+        """
+        Metodo per eseguire un lavoro nel pool dopo un certo intervallo di tempo
+
+        :param delay: intervallo in secondi
+        :param function: la funzione da eseguire
+        :param args: gli argomenti della funzione
+        :return: il timer, da passare a cancel_timer per annullare il lavoro
+        """
+
+        with self.__timers_condition:
+            timer = [time.monotonic() + delay, next(self.__timers_counter), function, args]
+            heapq.heappush(self.__timers, timer)
+
+            # il thread dei timer va risvegliato solo se la nuova scadenza è la più vicina
+            if self.__timers[0] is timer:
+                self.__timers_condition.notify()
+
+        return timer
+
+    def cancel_timer(self, timer):
+        """
+        Metodo per annullare un lavoro programmato con call_later e non ancora eseguito.
+        Il timer resta nell'heap fino alla scadenza, ma senza riferimenti alla funzione e ai suoi argomenti
+
+        :param timer: il timer restituito da call_later
+        """
+
+        with self.__timers_condition:
+            timer[2] = None
+            timer[3] = None
+
+    # ************************** METODI INTERNI *******************************
+
+    def _notify_workers(self):
+        """
+        Metodo interno per risvegliare un worker inattivo, avviandone uno nuovo se sono tutti occupati.
+        Nota: da chiamare con il lock acquisito
+        """
+
+        if self.__idle_workers_number == 0 and self.__workers_number < self.__CONST_MAX_WORKERS:
+            worker = Thread(target=self._run_worker, name=f"{self.__name}-worker-{self.__workers_number}",
+                            daemon=True)
+            self.__workers_number += 1
+            worker.start()
+        else:
+            self.__tasks_available.notify()
+
+    def _next_task(self):
+        """
+        Metodo interno per l'estrazione del prossimo lavoro da eseguire: prima i lavori già accettati,
+        poi i messaggi delle corsie in ordine di priorità, purché la corsia non abbia esaurito i suoi worker.
+        Nota: da chiamare con il lock acquisito
+
+        :return: il lavoro (funzione, argomenti, corsia), None se non ci sono lavori eseguibili
+        """
+
+        if self.__tasks:
+            return self.__tasks.popleft()
+
+        for lane in LANES:
+            lane_tasks = self.__lane_tasks[lane]
+            if lane_tasks and self.__lane_busy_workers[lane] < self.__lane_workers[lane]:
+                self.__queued_messages_number -= 1
+                self.__lane_busy_workers[lane] += 1
+                return lane_tasks.popleft()
+
+        return None
+
+    def _run_worker(self):
+        """
+        Corpo dei thread del pool: estrazione ed esecuzione dei lavori in coda
+        """
+
+        while True:
+            with self.__lock:
+                task = None
+                while not self.__stopped:
+                    task = self._next_task()
+                    if task:
+                        break
+
+                    self.__idle_workers_number += 1
+                    self.__tasks_available.wait()
+                    self.__idle_workers_number -= 1
+
+                if self.__stopped:
+                    return
+
+                (function, args, lane) = task
+                self.__busy_workers_number += 1
+
+            start_time = time.monotonic()
+            try:
+                function(*args)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self.__lock:
+                    self.__busy_workers_number -= 1
+                    self.__busy_time += time.monotonic() - start_time
+                    if lane:
+                        self.__lane_busy_workers[lane] -= 1
+                        self.__processed_messages_number += 1
+
+                        # un worker inattivo può ora elaborare i messaggi rimasti in coda nella corsia
+                        if self.__lane_tasks[lane]:
+                            self.__tasks_available.notify()
+
+    def _run_timers(self):
+        """
+        Corpo del thread dei timer: i lavori scaduti vengono accodati nel pool
+        """
+
+        with self.__timers_condition:
+            while not self.__stopped:
+                if not self.__timers:
+                    self.__timers_condition.wait()
+                    continue
+
+                remaining_time = self.__timers[0][0] - time.monotonic()
+                if remaining_time > 0:
+                    self.__timers_condition.wait(remaining_time)
+                    continue
+
+                (deadline, counter, function, args) = heapq.heappop(self.__timers)
+                if function is not None:
+                    self.submit(function, *args)
+
+    # ************************** METRICHE *******************************
+
+    def get_queue_depth(self, lane=None):
+        """
+        :param lane: la corsia di cui contare i messaggi, tutte se None (opzionale)
+        :return: il numero di messaggi attualmente in attesa di elaborazione
+        """
+
+        with self.__lock:
+            if lane:
+                return self.__lane_tasks[lane].__len__()
+            return self.__queued_messages_number
+
+    def get_max_queue_depth(self):
+        """
+        :return: il massimo numero di messaggi in coda raggiunto dall'avvio del pool
+        """
+
+        with self.__lock:
+            return self.__max_queue_depth
+
+    def get_busy_workers_number(self, lane=None):
+        """
+        :param lane: la corsia di cui contare i worker, tutte se None (opzionale)
+        :return: il numero di worker attualmente occupati
+        """
+
+        with self.__lock:
+            if lane:
+                return self.__lane_busy_workers[lane]
+            return self.__busy_workers_number
+
+    def get_utilization(self):
+        """
+        :return: la frazione di worker attualmente occupati (tra 0 e 1)
+        """
+
+        with self.__lock:
+            return self.__busy_workers_number / self.__CONST_MAX_WORKERS
+
+    def get_average_utilization(self):
+        """
+        :return: la frazione del tempo di lavoro disponibile effettivamente utilizzata dall'avvio del pool (tra 0 e 1)
+        """
+
+        with self.__lock:
+            elapsed_time = (time.monotonic() - self.__start_time) * self.__CONST_MAX_WORKERS
+            return min(1.0, self.__busy_time / elapsed_time) if elapsed_time > 0 else 0.0
+
+    def get_processed_messages_number(self):
+        with self.__lock:
+            return self.__processed_messages_number
+
+    def get_rejected_messages_number(self):
+        with self.__lock:
+            return self.__rejected_messages_number
+
+    def get_max_workers(self):
+        return self.__CONST_MAX_WORKERS
+
+    def get_max_queue_size(self):
+        return self.__CONST_MAX_QUEUE_SIZE
+
+    def get_overload_policy(self):
+        return self.__overload_policy
+
+    def get_lane_workers(self, lane):
+        return self.__lane_workers[lane]
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def print_status(self):
+        """
+        Metodo di debug per la stampa delle metriche del pool
+        """
+
+        print(f"Worker Pool: {self.__CONST_MAX_WORKERS} workers, queue size {self.__CONST_MAX_QUEUE_SIZE} per lane, "
+              f"overload policy \"{self.__overload_policy}\"")
+        print(f"Queue Depth: {self.get_queue_depth()} (max {self.get_max_queue_depth()})")
+        print(f"Busy Workers: {self.get_busy_workers_number()} "
+              f"(utilization {self.get_utilization():.0%}, average {self.get_average_utilization():.0%})")
+        for lane in LANES:
+            print(f"Lane \"{lane}\": queue depth {self.get_queue_depth(lane)}, "
+                  f"busy workers {self.get_busy_workers_number(lane)}/{self.get_lane_workers(lane)}")
+        print(f"Processed Messages: {self.get_processed_messages_number()}")
+        print(f"Rejected Messages: {self.get_rejected_messages_number()}")
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
@@ -23,6 +23,7 @@ class Message:
         self.__ticket = ticket
         self.__ack = ack
         self.__exception = None
+        self.__wire_size = 0
 
     def get_type(self):
         return self.__type
@@ -51,7 +52,15 @@ class Message:
     def set_exception(self, exception):
         self.__exception = exception
 
+    def get_wire_size(self):
+        return self.__wire_size
+
+    def set_wire_size(self, wire_size):
+        self.__wire_size = wire_size
+
     def check(self):
+        if isinstance(self.__exception, KeyNotOwnedError):
+            raise KeyNotOwnedError
         if self.__exception:
             raise TCPRequestSendError
 
@@ -66,6 +75,8 @@ MSG_TYPE_SEARCH_KEY_SUCC_RQST = "C4"  # search key Successor Request
 MSG_TYPE_LEAVE_PREC_RQST = "C5"  # Leaving Predecessor Request
 MSG_TYPE_LEAVE_SUCC_RQST = "C6"  # Leaving Successor Request
 MSG_TYPE_YOURE_NOT_ALONE_RQST = "C7"  # You're Not Alone Request
+MSG_TYPE_NEXT_HOP_RQST = "C8"  # Next Hop Request (ricerca iterativa)
+MSG_TYPE_FORWARDED_LOOKUP = "C9"  # Forwarded Lookup (ricerca inoltrata, il nodo responsabile risponde a chi l'ha avviata)
 
 # *********** FILE *********
 MSG_TYPE_FILE_PBLSH_RQST = "F1"  # Publish Request
@@ -264,6 +275,106 @@ class SearchKeySuccessorRequestMessage(Message):
         return self.__key
 
 
+class NextHopAnswerMessage(Message):
+    """
+    Classe per la gestione delle risposte dei messaggi di tipo next hop request
+    """
+
+    def __init__(self, destination_node_info, sender_node_info, successor_node_info, next_hop_node_infos, ticket):
+        """
+        Inizializzazione degli attributi interni della classe.
+
+        :param destination_node_info: node_info del nodo destinatario
+        :param sender_node_info: node_info del nodo mittente
+        :param successor_node_info: node_info del successore della key, se il nodo mittente lo conosce
+        :param next_hop_node_infos: lista dei nodi a cui proseguire la ricerca, dal più vicino alla key
+        :param ticket: identificatore della richiesta
+        """
+
+        super().__init__(MSG_TYPE_ANSWER, destination_node_info, sender_node_info, ticket, False)
+        self.__successor_node_info = successor_node_info
+        self.__next_hop_node_infos = next_hop_node_infos
+
+    def get_successor_node_info(self):
+        """
+        Metodo getter per il node info del successore della key, None se la ricerca deve proseguire
+        """
+
+        return self.__successor_node_info
+
+    def get_next_hop_node_infos(self):
+        """
+        Metodo getter per i nodi a cui proseguire la ricerca
+        """
+
+        return self.__next_hop_node_infos
+
+
+class NextHopRequestMessage(Message):
+    """
+    Classe per la gestione delle richieste dei messaggi di tipo next hop request.
+    Nella ricerca iterativa il nodo che la avvia chiede a ogni nodo del percorso il successore della key,
+    se lo conosce, o i nodi a cui proseguire la ricerca, senza che questa venga inoltrata.
+    """
+
+    def __init__(self, destination_node_info, key, sender_node_info, ticket):
+        """
+        Inizializzazione degli attributi interni della classe.
+
+        :param destination_node_info: node_info del nodo destinatario
+        :param key: la chiave di cui il mittente sta cercando il successore
+        :param sender_node_info: node_info del nodo mittente
+        :param ticket: identificatore della richiesta
+        """
+
+        super().__init__(MSG_TYPE_NEXT_HOP_RQST, destination_node_info, sender_node_info, ticket, True)
+        self.__key = key
+
+    def get_key(self):
+        """
+        Getter per la chiave di cui si sta cercando il successore
+
+        :return key
+        """
+
+        return self.__key
+
+
+class ForwardedLookupRequestMessage(Message):
+    """
+    Classe per la gestione dei messaggi di tipo forwarded lookup.
+    Ogni nodo del percorso inoltra il messaggio al nodo successivo senza attenderne l'esito; il nodo responsabile
+    della key risponde con un SearchKeySuccessorAnswerMessage direttamente al nodo che ha avviato la ricerca,
+    con il ticket di quest'ultimo. Il messaggio non richiede quindi una risposta dal suo destinatario.
+    """
+
+    def __init__(self, destination_node_info, key, sender_node_info, ticket, originator_node_info, hops):
+        """
+        Inizializzazione degli attributi interni della classe.
+
+        :param destination_node_info: node_info del nodo destinatario
+        :param key: la chiave di cui si sta cercando il successore
+        :param sender_node_info: node_info del nodo mittente
+        :param ticket: identificatore della richiesta, assegnato dal nodo che ha avviato la ricerca
+        :param originator_node_info: node_info del nodo che ha avviato la ricerca e attende la risposta
+        :param hops: numero di nodi che il messaggio ha già attraversato
+        """
+
+        super().__init__(MSG_TYPE_FORWARDED_LOOKUP, destination_node_info, sender_node_info, ticket, False)
+        self.__key = key
+        self.__originator_node_info = originator_node_info
+        self.__hops = hops
+
+    def get_key(self):
+        return self.__key
+
+    def get_originator_node_info(self):
+        return self.__originator_node_info
+
+    def get_hops(self):
+        return self.__hops
+
+
 class LeavingPredecessorAnswerMessage(Message):
     """
     Classe per la gestione delle risposte dei messaggi di tipo leaving predecessor request
@@ -428,7 +539,7 @@ class FileDeleteRequestMessage(Message):
     Classe per la gestione delle richieste dei messaggi di tipo delete file
     """
 
-    def __init__(self, destination_node_info, sender_node_info, ticket, file_key):
+    def __init__(self, destination_node_info, sender_node_info, ticket, file_key, owner_check=False):
         """
         Inizializzazione degli attributi interni della classe.
 
@@ -436,10 +547,12 @@ class FileDeleteRequestMessage(Message):
         :param sender_node_info: node_info del nodo mittente
         :param ticket: identificatore della richiesta
         :param file_key: Chiave del file
+        :param owner_check: se True, il destinatario deve verificare di essere responsabile della key (opzionale)
         """
 
         super().__init__(MSG_TYPE_FILE_DEL_RQST, destination_node_info, sender_node_info, ticket, True)
         self.__file_key = file_key
+        self.__owner_check = owner_check
 
     def get_file_key(self):
         """
@@ -448,6 +561,9 @@ class FileDeleteRequestMessage(Message):
 
         return self.__file_key
 
+    def get_owner_check(self):
+        return self.__owner_check
+
 
 class FileAnswerMessage(Message):
     """
@@ -480,7 +596,7 @@ class FileRequestMessage(Message):
     Classe per la gestione delle richieste dei messaggi di tipo file request
     """
 
-    def __init__(self, destination_node_info, sender_node_info, ticket, file_key):
+    def __init__(self, destination_node_info, sender_node_info, ticket, file_key, owner_check=False):
         """
         Inizializzazione degli attributi interni della classe.
 
@@ -488,10 +604,12 @@ class FileRequestMessage(Message):
         :param sender_node_info: node_info del nodo mittente
         :param ticket: identificatore della richiesta
         :param file_key: Chiave del file
+        :param owner_check: se True, il destinatario deve verificare di essere responsabile della key (opzionale)
         """
 
         super().__init__(MSG_TYPE_FILE_RQST_RQST, destination_node_info, sender_node_info, ticket, True)
         self.__file_key = file_key
+        self.__owner_check = owner_check
 
     def get_file_key(self):
         """
@@ -500,6 +618,9 @@ class FileRequestMessage(Message):
 
         return self.__file_key
 
+    def get_owner_check(self):
+        return self.__owner_check
+
 
 class FilePublishAnswerMessage(Message):
     """
@@ -523,7 +644,7 @@ class FilePublishRequestMessage(Message):
     Classe per la gestione delle richieste dei messaggi di tipo file publish
     """
 
-    def __init__(self, destination_node_info, sender_node_info, ticket, file_key, file_data):
+    def __init__(self, destination_node_info, sender_node_info, ticket, file_key, file_data, owner_check=False):
         """
         Inizializzazione degli attributi interni della classe.
 
@@ -532,11 +653,13 @@ class FilePublishRequestMessage(Message):
         :param ticket: identificatore della richiesta
         :param file_key: chiave del file
         :param file_data: file
+        :param owner_check: se True, il destinatario deve verificare di essere responsabile della key (opzionale)
         """
 
         super().__init__(MSG_TYPE_FILE_PBLSH_RQST, destination_node_info, sender_node_info, ticket, True)
         self.__file_key = file_key
         self.__file_data = file_data
+        self.__owner_check = owner_check
 
     def get_file_key(self):
         """
@@ -552,6 +675,9 @@ class FilePublishRequestMessage(Message):
 
         return self.__file_data
 
+    def get_owner_check(self):
+        return self.__owner_check
+
 
 # *********+ Messaggi NETWORK
 
@@ -587,3 +713,23 @@ class PingRequestMessage(Message):
         """
 
         super().__init__(MSG_TYPE_PING, destination_node_info, sender_node_info, ticket, True)
+
+
+class ErrorAnswerMessage(Message):
+    """
+    Classe per la gestione delle risposte di errore, inviate quando un nodo non può elaborare una richiesta.
+    Il controllo della risposta (check) solleva l'eccezione nel nodo mittente della richiesta.
+    """
+
+    def __init__(self, destination_node_info, sender_node_info, ticket, exception):
+        """
+        Inizializzazione degli attributi interni della classe.
+
+        :param destination_node_info: node_info del nodo destinatario
+        :param sender_node_info: node_info del nodo mittente
+        :param ticket: identificatore della richiesta
+        :param exception: l'eccezione che ha impedito l'elaborazione della richiesta
+        """
+
+        super().__init__(MSG_TYPE_ANSWER, destination_node_info, sender_node_info, ticket, False)
+        self.set_exception(exception)
@@ -0,0 +1,194 @@
+import bisect
+import threading
+
+from network.messages import *
+
+# *********** ISTOGRAMMI DI LATENZA *********
+# limiti superiori in ms degli intervalli degli istogrammi; l'ultimo intervallo raccoglie le latenze maggiori
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# *********** CATEGORIE DI TRAFFICO *********
+TRAFFIC_MAINTENANCE = "maintenance"  # stabilizzazione, finger table, ingresso e uscita dei nodi
+TRAFFIC_FILES = "files"  # operazioni sui file richieste dagli utenti
+TRAFFIC_UNKNOWN = "unknown"  # risposte arrivate quando la richiesta non era più in attesa
+TRAFFIC_CATEGORIES = {
+    MSG_TYPE_NOTIFY: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_GET_PREC_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_GET_FIRST_SUCC_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_SEARCH_KEY_SUCC_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_LEAVE_PREC_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_LEAVE_SUCC_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_YOURE_NOT_ALONE_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_NEXT_HOP_RQST: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_FORWARDED_LOOKUP: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_PING: TRAFFIC_MAINTENANCE,
+    MSG_TYPE_FILE_PBLSH_RQST: TRAFFIC_FILES,
+    MSG_TYPE_FILE_DEL_RQST: TRAFFIC_FILES,
+    MSG_TYPE_FILE_RQST_RQST: TRAFFIC_FILES,
+}
+
+
+class NodeStats:
+    """
+    Contabilità del traffico di un nodo: messaggi e byte inviati e ricevuti per tipo di messaggio,
+    istogrammi della latenza delle RPC per tipo, richieste scadute per nodo di destinazione, connessioni accettate,
+    richieste rifiutate perché il nodo era sovraccarico e risposte "busy" ricevute.
+    Le risposte sono contabilizzate con il tipo della richiesta a cui rispondono, così che il traffico
+    di ogni operazione comprenda entrambe le direzioni.
+    """
+
+    def __init__(self):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+        """
+
+        # tipo di messaggio -> [messaggi inviati, byte inviati, messaggi ricevuti, byte ricevuti]
+        self.__traffic = dict()
+
+        # tipo di messaggio -> [conteggi per intervallo, numero di RPC, latenza totale in ms]
+        self.__latencies = dict()
+
+        # porta del nodo di destinazione -> richieste scadute
+        self.__timeouts = dict()
+
+        self.__accepted_connections_number = 0
+        self.__rejected_requests_number = 0
+        self.__busy_answers_number = 0
+        self.__lock = threading.Lock()
+
+    # ************************** REGISTRAZIONE *******************************
+
+    def add_sent_message(self, msg_type, size):
+        """
+        Metodo per registrare un messaggio inviato
+
+        :param msg_type: tipo del messaggio (della richiesta, per le risposte)
+        :param size: dimensione in byte del messaggio serializzato, 0 se non serializzato
+        """
+
+        with self.__lock:
+            traffic = self.__traffic.setdefault(msg_type, [0, 0, 0, 0])
+            traffic[0] += 1
+            traffic[1] += size
+
+    def add_received_message(self, msg_type, size):
+        """
+        Metodo per registrare un messaggio ricevuto
+
+        :param msg_type: tipo del messaggio (della richiesta, per le risposte)
+        :param size: dimensione in byte del messaggio serializzato, 0 se non serializzato
+        """
+
+        with self.__lock:
+            traffic = self.__traffic.setdefault(msg_type, [0, 0, 0, 0])
+            traffic[2] += 1
+            traffic[3] += size
+
+    def add_rpc_latency(self, msg_type, latency):
+        """
+        Metodo per registrare la latenza di una RPC completata
+
+        :param msg_type: tipo del messaggio di richiesta
+        :param latency: tempo tra l'invio della richiesta e l'arrivo della risposta, in ms
+        """
+
+        with self.__lock:
+            histogram = self.__latencies.get(msg_type)
+
+            if histogram is None:
+                histogram = [[0] * (LATENCY_BUCKETS.__len__() + 1), 0, 0.0]
+                self.__latencies[msg_type] = histogram
+
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            histogram[1] += 1
+            histogram[2] += latency
+
+    def add_timeout(self, destination_port):
+        """
+        Metodo per registrare una richiesta scaduta
+
+        :param destination_port: porta del nodo che non ha risposto
+        """
+
+        with self.__lock:
+            self.__timeouts[destination_port] = self.__timeouts.get(destination_port, 0) + 1
+
+    def add_accepted_connection(self):
+        with self.__lock:
+            self.__accepted_connections_number += 1
+
+    def add_rejected_request(self):
+        with self.__lock:
+            self.__rejected_requests_number += 1
+
+    def add_busy_answer(self):
+        with self.__lock:
+            self.__busy_answers_number += 1
+
+    # ************************** CONSULTAZIONE *******************************
+
+    def get_stats(self):
+        """
+        Metodo per ottenere una copia delle statistiche raccolte
+
+        :return: dizionario con le chiavi "traffic" (tipo -> messaggi e byte inviati e ricevuti),
+                 "categories" (categoria di traffico -> byte inviati e ricevuti), "latency" (tipo -> istogramma),
+                 "timeouts" (porta -> richieste scadute), "accepted_connections", "rejected_requests" (richieste
+                 ricevute e rifiutate con una risposta "busy") e "busy_answers" (risposte "busy" ricevute)
+        """
+
+        with self.__lock:
+            traffic = {msg_type: {"sent_messages": sent_messages, "sent_bytes": sent_bytes,
+                                  "received_messages": received_messages, "received_bytes": received_bytes}
+                       for (msg_type, (sent_messages, sent_bytes, received_messages, received_bytes))
+                       in self.__traffic.items()}
+
+            latency = {msg_type: {"count": count, "average": total_latency / count if count > 0 else 0.0,
+                                  "buckets": list(zip(LATENCY_BUCKETS + (None,), buckets))}
+                       for (msg_type, (buckets, count, total_latency)) in self.__latencies.items()}
+
+            timeouts = dict(self.__timeouts)
+            accepted_connections_number = self.__accepted_connections_number
+            rejected_requests_number = self.__rejected_requests_number
+            busy_answers_number = self.__busy_answers_number
+
+        categories = dict()
+        for (msg_type, msg_traffic) in traffic.items():
+            category = categories.setdefault(TRAFFIC_CATEGORIES.get(msg_type, TRAFFIC_UNKNOWN),
+                                             {"sent_bytes": 0, "received_bytes": 0})
+            category["sent_bytes"] += msg_traffic["sent_bytes"]
+            category["received_bytes"] += msg_traffic["received_bytes"]
+
+        return {"traffic": traffic, "categories": categories, "latency": latency, "timeouts": timeouts,
+                "accepted_connections": accepted_connections_number, "rejected_requests": rejected_requests_number,
+                "busy_answers": busy_answers_number}
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def print_status(self):
+        """
+        Metodo di debug per la stampa delle statistiche raccolte
+        """
+
+        stats = self.get_stats()
+
+        print(f"Accepted Connections: {stats['accepted_connections']}")
+        print(f"Rejected Requests (busy): {stats['rejected_requests']}, Busy Answers Received: {stats['busy_answers']}\n")
+
+        print(f"{'Type':<8}{'Sent':>10}{'Sent Bytes':>14}{'Received':>10}{'Recv Bytes':>14}")
+        for (msg_type, traffic) in sorted(stats["traffic"].items()):
+            print(f"{msg_type:<8}{traffic['sent_messages']:>10}{traffic['sent_bytes']:>14}"
+                  f"{traffic['received_messages']:>10}{traffic['received_bytes']:>14}")
+
+        print()
+        for (category, traffic) in sorted(stats["categories"].items()):
+            print(f"Traffic \"{category}\": {traffic['sent_bytes']} bytes sent, {traffic['received_bytes']} bytes received")
+
+        print(f"\n{'Type':<8}{'RPCs':>8}{'Avg (ms)':>10}  Latency Histogram (upper bound in ms: count)")
+        for (msg_type, latency) in sorted(stats["latency"].items()):
+            histogram = ", ".join(f"{'inf' if upper_bound is None else upper_bound}: {count}"
+                                  for (upper_bound, count) in latency["buckets"] if count > 0)
+            print(f"{msg_type:<8}{latency['count']:>8}{latency['average']:>10.2f}  {histogram}")
+
+        print("\nTimeouts per Node: " + (", ".join(f"{port}: {count}" for (port, count)
+                                                   in sorted(stats["timeouts"].items())) or "none"))
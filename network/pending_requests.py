@@ -0,0 +1,278 @@
+import threading
+import time
+
+from network.priority_lanes import message_lane
+
+# *********** SCADENZA DELLE RICHIESTE *********
+PENDING_REQUEST_GRACE_PERIOD = 1  # secondi oltre il timeout dopo i quali una richiesta non rimossa è considerata abbandonata
+PENDING_REQUEST_EXPIRY_INTERVAL = 1  # intervallo minimo in secondi tra due controlli delle richieste abbandonate
+
+
+class PendingRequest:
+    """
+    Classe che rappresenta una richiesta TCP inviata e in attesa di risposta
+    """
+
+    def __init__(self, ticket, destination_port=None, msg_type=None, expiry_time=None):
+        """
+        Inizializzazione degli attributi interni della classe.
+
+        :param ticket: identificatore della richiesta
+        :param destination_port: porta del nodo a cui è stata inviata la richiesta (opzionale)
+        :param msg_type: tipo del messaggio di richiesta (opzionale)
+        :param expiry_time: istante (orologio monotono) dopo il quale la richiesta può essere eliminata (opzionale)
+        """
+
+        self.__ticket = ticket
+        self.__destination_port = destination_port
+        self.__msg_type = msg_type
+        self.__expiry_time = expiry_time
+        self.__answer = None
+        self.__failed = False
+        self.__answer_event = threading.Event()
+        self.__done_callbacks = list()
+        self.__callbacks_lock = threading.Lock()
+
+    def get_ticket(self):
+        return self.__ticket
+
+    def get_destination_port(self):
+        return self.__destination_port
+
+    def get_msg_type(self):
+        return self.__msg_type
+
+    def get_expiry_time(self):
+        return self.__expiry_time
+
+    def get_answer(self):
+        return self.__answer
+
+    def is_failed(self):
+        return self.__failed
+
+    def complete(self, answer):
+        """
+        Metodo per completare la richiesta con la risposta ricevuta.
+        Risveglia il thread in attesa della risposta.
+
+        :param answer: il messaggio di risposta
+        """
+
+        self.__answer = answer
+        self._set_done()
+
+    def fail(self):
+        """
+        Metodo per segnalare che la risposta non potrà più arrivare (es. connessione persa).
+        Risveglia il thread in attesa della risposta.
+        """
+
+        self.__failed = True
+        self._set_done()
+
+    def add_done_callback(self, callback):
+        """
+        Metodo per registrare una funzione da invocare al completamento (o fallimento) della richiesta.
+        Consente di attendere la risposta anche da una coroutine, senza bloccare un thread.
+        Se la richiesta è già completata, la funzione viene invocata subito.
+
+        :param callback: funzione senza parametri
+        """
+
+        with self.__callbacks_lock:
+            if not self.__answer_event.is_set():
+                self.__done_callbacks.append(callback)
+                return
+
+        callback()
+
+    def _set_done(self):
+        """
+        Metodo interno per segnalare il completamento della richiesta a thread e callback in attesa
+        """
+
+        with self.__callbacks_lock:
+            self.__answer_event.set()
+            done_callbacks = self.__done_callbacks
+            self.__done_callbacks = list()
+
+        for callback in done_callbacks:
+            callback()
+
+    def is_completed(self):
+        return self.__answer_event.is_set()
+
+    def wait(self, timeout):
+        """
+        Metodo per attendere la risposta senza consumare CPU.
+
+        :param timeout: tempo massimo di attesa in secondi
+        :return: True se la risposta è arrivata, False se il timeout è scaduto
+        """
+
+        return self.__answer_event.wait(timeout)
+
+
+class PendingRequestTable:
+    """
+    Tabella delle richieste TCP in attesa di risposta, indicizzata per ticket.
+    Le risposte che non corrispondono a una richiesta in attesa (es. arrivate dopo il timeout) vengono scartate
+    e conteggiate; le richieste che nessuno ha rimosso entro la loro scadenza vengono eliminate.
+    """
+
+    def __init__(self):
+        """
+        Inizializzazione degli attributi interni della classe.
+        """
+
+        self.__pending_requests = dict()
+        self.__lock = threading.Lock()
+        self.__next_expiry_check_time = time.monotonic() + PENDING_REQUEST_EXPIRY_INTERVAL
+
+        # metriche
+        self.__late_answers_number = 0
+        self.__expired_requests_number = 0
+
+    def register(self, ticket, destination_port=None, msg_type=None, timeout=None):
+        """
+        Metodo per registrare una nuova richiesta in attesa di risposta.
+        Va invocato prima dell'invio del messaggio, così da non perdere risposte molto veloci.
+
+        :param ticket: identificatore della richiesta
+        :param destination_port: porta del nodo a cui viene inviata la richiesta (opzionale)
+        :param msg_type: tipo del messaggio di richiesta (opzionale)
+        :param timeout: timeout della richiesta in secondi, dopo il quale la richiesta può scadere (opzionale)
+        :return: la richiesta registrata
+        """
+
+        now = time.monotonic()
+        expiry_time = now + timeout + PENDING_REQUEST_GRACE_PERIOD if timeout is not None else None
+        pending_request = PendingRequest(ticket, destination_port, msg_type, expiry_time)
+
+        with self.__lock:
+            self.__pending_requests[ticket] = pending_request
+
+            if now < self.__next_expiry_check_time:
+                return pending_request
+
+            self.__next_expiry_check_time = now + PENDING_REQUEST_EXPIRY_INTERVAL
+            expired_requests = self._remove_expired_requests(now)
+
+        # chi attendeva una richiesta scaduta (se c'è ancora) viene risvegliato
+        for expired_request in expired_requests:
+            if not expired_request.is_completed():
+                expired_request.fail()
+
+        return pending_request
+
+    def _remove_expired_requests(self, now):
+        """
+        Metodo interno per l'eliminazione delle richieste scadute e mai rimosse.
+        Il controllo avviene al più una volta per intervallo, quindi il suo costo è ripartito tra le registrazioni.
+        Nota: da chiamare con il lock acquisito
+
+        :param now: istante corrente (orologio monotono)
+        :return: la lista delle richieste eliminate
+        """
+
+        expired_requests = [pending_request for pending_request in self.__pending_requests.values()
+                            if pending_request.get_expiry_time() is not None and pending_request.get_expiry_time() < now]
+
+        for expired_request in expired_requests:
+            del self.__pending_requests[expired_request.get_ticket()]
+
+        self.__expired_requests_number += expired_requests.__len__()
+        return expired_requests
+
+    def complete(self, answer):
+        """
+        Metodo per consegnare una risposta alla richiesta corrispondente.
+
+        :param answer: il messaggio di risposta
+        :return: la richiesta completata, None se non c'era una richiesta in attesa con quel ticket
+        """
+
+        with self.__lock:
+            pending_request = self.__pending_requests.get(answer.get_ticket())
+
+            if pending_request is None or pending_request.is_completed():
+                self.__late_answers_number += 1
+                return None
+
+        pending_request.complete(answer)
+        return pending_request
+
+    def fail_destination(self, destination_port, lane=None, tickets=None):
+        """
+        Metodo per far fallire le richieste in attesa di risposta da un dato nodo,
+        ad esempio quando la connessione verso di esso viene persa.
+
+        :param destination_port: porta del nodo
+        :param lane: corsia di priorità delle richieste da far fallire, tutte se None (opzionale)
+        :param tickets: ticket delle richieste da far fallire, tutte se None (opzionale)
+        """
+
+        with self.__lock:
+            if tickets is None:
+                candidate_requests = self.__pending_requests.values()
+            else:
+                candidate_requests = [self.__pending_requests[ticket] for ticket in tickets
+                                      if ticket in self.__pending_requests]
+
+            pending_requests = [pending_request for pending_request in candidate_requests if
+                                pending_request.get_destination_port() == destination_port and
+                                (lane is None or message_lane(pending_request.get_msg_type()) == lane)]
+
+        for pending_request in pending_requests:
+            if not pending_request.is_completed():
+                pending_request.fail()
+
+    def remove(self, ticket):
+        """
+        Metodo per rimuovere una richiesta dalla tabella (risposta processata o timeout)
+
+        :param ticket: identificatore della richiesta
+        """
+
+        with self.__lock:
+            self.__pending_requests.pop(ticket, None)
+
+    def is_answered(self, ticket):
+        """
+        Metodo per verificare se la richiesta con un dato ticket ha ricevuto risposta
+
+        :param ticket: identificatore della richiesta
+        :return: True se la risposta è arrivata, False altrimenti
+        """
+
+        with self.__lock:
+            pending_request = self.__pending_requests.get(ticket)
+
+        return pending_request is not None and pending_request.is_completed() and not pending_request.is_failed()
+
+    def get_len(self):
+        """
+        Metodo per ottenere il numero di richieste attualmente in attesa
+
+        :return: il numero di richieste in attesa
+        """
+
+        with self.__lock:
+            return self.__pending_requests.__len__()
+
+    def get_late_answers_number(self):
+        """
+        :return: il numero di risposte scartate perché nessuna richiesta le stava più attendendo
+        """
+
+        with self.__lock:
+            return self.__late_answers_number
+
+    def get_expired_requests_number(self):
+        """
+        :return: il numero di richieste eliminate perché non rimosse entro la loro scadenza
+        """
+
+        with self.__lock:
+            return self.__expired_requests_number
@@ -0,0 +1,40 @@
+from network.node_stats import TRAFFIC_CATEGORIES, TRAFFIC_FILES
+
+# *********** CORSIE DI PRIORITÀ *********
+# I messaggi di manutenzione (stabilizzazione, finger table, controllo del predecessore e della lista dei successori)
+# e quelli degli utenti (operazioni sui file) viaggiano su corsie separate: code, worker e canali distinti,
+# così che un carico elevato su una corsia non ritardi l'altra
+LANE_MAINTENANCE = "maintenance"
+LANE_USER = "user"
+LANES = (LANE_MAINTENANCE, LANE_USER)  # in ordine di priorità decrescente
+
+# quota dei limiti di invio riservata alla corsia di manutenzione: le richieste degli utenti non possono occuparla
+MAINTENANCE_RESERVED_SHARE = 0.25
+
+
+def message_lane(msg_type):
+    """
+    Funzione per ottenere la corsia di priorità di un tipo di messaggio.
+    Le risposte e i messaggi non classificati viaggiano sulla corsia di manutenzione, perché brevi
+    e perché sbloccano richieste già in attesa.
+
+    :param msg_type: tipo del messaggio
+    :return: la corsia del messaggio
+    """
+
+    return LANE_USER if TRAFFIC_CATEGORIES.get(msg_type) == TRAFFIC_FILES else LANE_MAINTENANCE
+
+
+def lane_limit(limit, lane):
+    """
+    Funzione per ottenere la parte di un limite utilizzabile da una corsia
+
+    :param limit: il limite complessivo, 0 se assente
+    :param lane: la corsia
+    :return: il limite della corsia, almeno 1 (0 se il limite complessivo è assente)
+    """
+
+    if limit <= 0 or lane == LANE_MAINTENANCE:
+        return limit
+
+    return max(1, limit - int(limit * MAINTENANCE_RESERVED_SHARE))
@@ -1,4 +1,10 @@
+import threading
+import time
+
 from network.messages import *
+from network.node_stats import NodeStats
+from network.priority_lanes import LANES, message_lane
+from utilities.chord_utils import LOOKUP_MAX_HOPS
 
 
 class ReceivedMessagesHandler:
@@ -6,19 +12,57 @@ class ReceivedMessagesHandler:
     Classe per la gestione dei messaggi TCP ricevuti.
     """
 
-    def __init__(self, my_node, my_socket_node, my_tcp_request_handler, debug_mode=False):
+    def __init__(self, my_node, my_socket_node, my_tcp_request_handler, node_stats=None, max_inbound_requests=256,
+                 debug_mode=False):
         """
         Metodo init della classe. Inizializzazione degli attributi.
 
         :param my_node: riferimento al proprio nodo chord
         :param my_socket_node: riferimento al proprio socket node
         :param my_tcp_request_handler: riferimento al proprio request handler
+        :param node_stats: contabilità del traffico del nodo (opzionale)
+        :param max_inbound_requests: massimo numero di richieste in elaborazione per corsia di priorità, oltre il quale le nuove richieste vengono rifiutate, 0 per non porre limiti (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
         self.__my_node = my_node
         self.__my_socket_node = my_socket_node
         self.__my_tcp_request_handler = my_tcp_request_handler
+        self.__stats = node_stats if node_stats else NodeStats()
+
+        # Controllo di ammissione: corsia di priorità -> richieste ricevute attualmente in elaborazione.
+        # Ogni corsia ha il proprio limite, così che le richieste degli utenti non facciano rifiutare la manutenzione
+        self.__CONST_MAX_INBOUND_REQUESTS = max_inbound_requests
+        self.__inbound_requests = {lane: 0 for lane in LANES}
+        # richieste ammesse e non ancora risposte, come (porta del mittente, ticket): lo slot di una richiesta
+        # viene liberato all'invio della risposta, che per le ricerche inoltrate arriva dopo il ritorno del gestore
+        self.__admitted_requests = set()
+        self.__admission_lock = threading.Lock()
+
+        # Registro dei gestori: tipo di messaggio -> funzione che lo elabora
+        self.__handlers = dict()
+        self.__async_handlers = dict()
+
+        # Metriche dei gestori: tipo di messaggio -> [messaggi elaborati, tempo totale, tempo massimo]
+        self.__handler_stats = dict()
+        self.__handler_stats_lock = threading.Lock()
+
+        self.register_handler(MSG_TYPE_NOTIFY, self._handle_notify)
+        self.register_handler(MSG_TYPE_GET_PREC_RQST, self._handle_get_predecessor_request)
+        self.register_handler(MSG_TYPE_GET_FIRST_SUCC_RQST, self._handle_get_first_successor_request)
+        self.register_handler(MSG_TYPE_SEARCH_KEY_SUCC_RQST, self._handle_search_key_successor_request,
+                              self._async_handle_search_key_successor_request)
+        self.register_handler(MSG_TYPE_NEXT_HOP_RQST, self._handle_next_hop_request)
+        self.register_handler(MSG_TYPE_FORWARDED_LOOKUP, self._handle_forwarded_lookup,
+                              self._async_handle_forwarded_lookup)
+        self.register_handler(MSG_TYPE_LEAVE_PREC_RQST, self._handle_leaving_predecessor_request)
+        self.register_handler(MSG_TYPE_LEAVE_SUCC_RQST, self._handle_leaving_successor_request)
+        self.register_handler(MSG_TYPE_YOURE_NOT_ALONE_RQST, self._handle_youre_not_alone_request)
+        self.register_handler(MSG_TYPE_FILE_PBLSH_RQST, self._handle_file_publish_request)
+        self.register_handler(MSG_TYPE_FILE_DEL_RQST, self._handle_file_delete_request)
+        self.register_handler(MSG_TYPE_FILE_RQST_RQST, self._handle_file_request)
+        self.register_handler(MSG_TYPE_PING, self._handle_ping)
+        self.register_handler(MSG_TYPE_ANSWER, self._handle_answer)
 
         # Modalità di debug
         self.__debug_mode = debug_mode
@@ -32,141 +76,442 @@ class ReceivedMessagesHandler:
 
         self.__my_socket_node = my_socket_node
 
-    def process_message(self, message):
+    # ************************** REGISTRO DEI GESTORI *******************************
+
+    def register_handler(self, msg_type, handler, async_handler=None):
+        """
+        Metodo per la registrazione del gestore di un tipo di messaggio.
+        Consente di aggiungere nuovi tipi di messaggio (es. messaggi a blocchi o in streaming) senza modificare
+        process_message; un gestore già registrato per lo stesso tipo viene sostituito.
+
+        :param msg_type: tipo del messaggio
+        :param handler: funzione invocata con il messaggio e la connessione da cui è arrivato
+        :param async_handler: coroutine da usare al posto di handler con il motore di rete asyncio (opzionale)
+        """
+
+        self.__handlers[msg_type] = handler
+
+        with self.__handler_stats_lock:
+            self.__handler_stats.setdefault(msg_type, [0, 0.0, 0.0])
+
+        if async_handler:
+            self.__async_handlers[msg_type] = async_handler
+        else:
+            self.__async_handlers.pop(msg_type, None)
+
+    def unregister_handler(self, msg_type):
+        """
+        Metodo per la rimozione del gestore di un tipo di messaggio
+
+        :param msg_type: tipo del messaggio
+        """
+
+        self.__handlers.pop(msg_type, None)
+        self.__async_handlers.pop(msg_type, None)
+
+    def process_message(self, message, connection=None):
         """
         Metodo per il processing vero e proprio dei messaggi TCP ricevuti.
-        Si occupa dell'estrazione dei parametri dei messaggi, delle chiamate ai diversi
-        layer dell'applicazione, e dell'invio dei messaggi di risposta.
+        Il messaggio viene consegnato al gestore registrato per il suo tipo, che si occupa dell'estrazione
+        dei parametri, delle chiamate ai diversi layer dell'applicazione e dell'invio della risposta.
 
         :param message: messaggio ricevuto
+        :param connection: connessione da cui è arrivato il messaggio, su cui inviare la risposta (opzionale)
         """
 
         if message is None:
             raise EmptyMessageError
 
-        dest = message.get_sender_node_info()
-        send = self.__my_node.get_node_info()
-        sender_port = message.get_sender_node_info().get_port()
-        ticket = message.get_ticket()
+        msg_type = message.get_type()
+        handler = self.__handlers.get(msg_type)
+
+        if handler is None:
+            raise InvalidMessageTypeError
+
+        # le risposte vengono contabilizzate dal request handler, con il tipo della richiesta
+        if msg_type != MSG_TYPE_ANSWER:
+            self.__stats.add_received_message(msg_type, message.get_wire_size())
 
         if self.__debug_mode:
             print(
-                f"\nDEBUG: {self.__my_node.get_node_info().get_port()}: Just received a message from {sender_port} with type {message.get_type()}")
+                f"\nDEBUG: {self.__my_node.get_node_info().get_port()}: Just received a message from {message.get_sender_port()} with type {msg_type}")
 
-        # notify
-        if message.get_type() == MSG_TYPE_NOTIFY:
-            self.__my_node.notify(message.get_sender_node_info())
+        if not self._admit_request(message, connection):
+            return
 
-            file_dict = self.__my_node.get_file_system().retrieve_files_for_a_new_node(
-                message.get_sender_node_info().get_node_id())
-            answer = NotifyAnswerMessage(dest, send, ticket, file_dict)
-            self._send_answer(sender_port,  answer)
+        start_time = time.perf_counter()
+        try:
+            handler(message, connection)
+        except Exception:
+            # il gestore non invierà la risposta: la richiesta non è più in elaborazione
+            self._request_processed(message)
+            raise
+        finally:
+            self._update_handler_stats(msg_type, time.perf_counter() - start_time)
+
+    # ************************** GESTORI DEI MESSAGGI *******************************
+
+    def _handle_notify(self, message, connection):
+        self.__my_node.notify(message.get_sender_node_info())
+
+        file_dict = self.__my_node.get_file_system().retrieve_files_for_a_new_node(
+            message.get_sender_node_info().get_node_id())
+        answer = NotifyAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                     message.get_ticket(), file_dict)
+        self._send_answer(message, answer, connection)
+
+    def _handle_get_predecessor_request(self, message, connection):
+        try:
+            found_predecessor = self.__my_node.get_predecessor()
+        except NoPrecedessorFoundError:
+            found_predecessor = None
+        answer = GetPredecessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                             found_predecessor, message.get_ticket())
+        self._send_answer(message, answer, connection)
+
+    def _handle_get_first_successor_request(self, message, connection):
+        first_successor_node_info = self.__my_node.get_first_successor()
+        answer = GetFirstSuccessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                                message.get_ticket(), first_successor_node_info)
+        self._send_answer(message, answer, connection)
+
+    def _handle_search_key_successor_request(self, message, connection):
+        # La ricerca non blocca il worker: la risposta viene inviata al termine della ricerca
+        def send_search_answer(found_successor):
+            answer = SearchKeySuccessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                                     found_successor, message.get_ticket())
+            self._send_answer(message, answer, connection)
+
+        self.__my_node.find_key_successor_with_callback(message.get_key(), send_search_answer)
+
+    async def _async_handle_search_key_successor_request(self, message, connection):
+        # La ricerca può essere inoltrata ad altri nodi e viene attesa senza bloccare alcun thread
+        found_successor = await self.__my_node.async_find_key_successor(message.get_key())
+        answer = SearchKeySuccessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                                 found_successor, message.get_ticket())
+        self._send_answer(message, answer, connection)
+
+    def _handle_next_hop_request(self, message, connection):
+        # Passo di una ricerca iterativa: la risposta è calcolata localmente, senza inoltrare la ricerca
+        (successor_node_info, next_hop_node_infos) = self.__my_node.get_next_hops(message.get_key())
+        answer = NextHopAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                      successor_node_info, next_hop_node_infos, message.get_ticket())
+        self._send_answer(message, answer, connection)
+
+    def _handle_forwarded_lookup(self, message, connection):
+        # Passo di una ricerca inoltrata: il messaggio prosegue verso il nodo successivo senza attenderne l'esito,
+        # mentre il nodo responsabile della key risponde direttamente a chi ha avviato la ricerca
+        (successor_node_info, next_hop_node_infos) = self._get_forwarded_lookup_next_hops(message)
+
+        if successor_node_info is None and message.get_hops() < LOOKUP_MAX_HOPS:
+            if self.__my_tcp_request_handler.forward_lookup_request(message, next_hop_node_infos):
+                return
+
+        self.__my_tcp_request_handler.send_forwarded_lookup_answer(message, successor_node_info)
+
+    async def _async_handle_forwarded_lookup(self, message, connection):
+        # Come _handle_forwarded_lookup, ma gli invii non bloccano l'event loop
+        async_request_sender_handler = self.__my_tcp_request_handler.get_async_request_sender_handler()
+        (successor_node_info, next_hop_node_infos) = self._get_forwarded_lookup_next_hops(message)
+
+        if successor_node_info is None and message.get_hops() < LOOKUP_MAX_HOPS:
+            if await async_request_sender_handler.forward_lookup_request(message, next_hop_node_infos):
+                return
+
+        await async_request_sender_handler.send_forwarded_lookup_answer(message, successor_node_info)
+
+    def _get_forwarded_lookup_next_hops(self, message):
+        """
+        Metodo interno per il calcolo del prossimo passo di una ricerca inoltrata.
+        Il nodo da cui è arrivato il messaggio viene escluso dai candidati, per non rimandargli indietro la ricerca.
 
-        # get predecessor request
-        elif message.get_type() == MSG_TYPE_GET_PREC_RQST:
-            try:
-                found_predecessor = self.__my_node.get_predecessor()
-            except NoPrecedessorFoundError:
-                found_predecessor = None
-            answer = GetPredecessorAnswerMessage(dest, send, found_predecessor, ticket)
-            self._send_answer(sender_port,  answer)
+        :param message: il messaggio forwarded lookup ricevuto
+        :return: tupla (successore della key o None, nodi a cui inoltrare la ricerca)
+        """
 
-        # get First successor request
-        elif message.get_type() == MSG_TYPE_GET_FIRST_SUCC_RQST:
-            first_successor_node_info = self.__my_node.get_first_successor()
-            answer = GetFirstSuccessorAnswerMessage(dest, send, ticket, first_successor_node_info)
-            self._send_answer(sender_port,  answer)
+        (successor_node_info, next_hop_node_infos) = self.__my_node.get_next_hops(message.get_key())
+        next_hop_node_infos = [node_info for node_info in next_hop_node_infos
+                               if node_info.get_port() != message.get_sender_port()]
 
-        # Find key successor request
-        elif message.get_type() == MSG_TYPE_SEARCH_KEY_SUCC_RQST:
-            found_successor = self.__my_node.find_key_successor(message.get_key())
-            answer = SearchKeySuccessorAnswerMessage(dest, send, found_successor, ticket)
-            self._send_answer(sender_port,  answer)
+        return successor_node_info, next_hop_node_infos
 
-        # leaving predecessor request
-        elif message.get_type() == MSG_TYPE_LEAVE_PREC_RQST:
-            new_predecessor_node_info = message.get_new_predecessor_node_info()
-            self.__my_node.notify_leaving_predecessor(new_predecessor_node_info)
+    def _handle_leaving_predecessor_request(self, message, connection):
+        new_predecessor_node_info = message.get_new_predecessor_node_info()
+        self.__my_node.notify_leaving_predecessor(new_predecessor_node_info)
 
-            files = message.get_files()
+        files = message.get_files()
 
-            if files:
-                for key in files.keys():
-                    self.__my_node.put_file_here(key, files[key])
+        if files:
+            for key in files.keys():
+                self.__my_node.put_file_here(key, files[key])
 
-            answer = LeavingPredecessorAnswerMessage(dest, send, ticket)
-            self._send_answer(sender_port,  answer)
+        answer = LeavingPredecessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                                 message.get_ticket())
+        self._send_answer(message, answer, connection)
 
-        # leaving successor request
-        elif message.get_type() == MSG_TYPE_LEAVE_SUCC_RQST:
-            new_successor_node_info = message.get_new_successor_node_info()
-            self.__my_node.notify_leaving_successor(new_successor_node_info)
+    def _handle_leaving_successor_request(self, message, connection):
+        new_successor_node_info = message.get_new_successor_node_info()
+        self.__my_node.notify_leaving_successor(new_successor_node_info)
 
-            answer = LeavingSuccessorAnswerMessage(dest, send, ticket)
-            self._send_answer(sender_port,  answer)
+        answer = LeavingSuccessorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                               message.get_ticket())
+        self._send_answer(message, answer, connection)
 
-        # you're not alone request
-        elif message.get_type() == MSG_TYPE_YOURE_NOT_ALONE_RQST:
-            i_was_alone = self.__my_node.get_alone_status()
+    def _handle_youre_not_alone_request(self, message, connection):
+        i_was_alone = self.__my_node.get_alone_status()
 
-            self.__my_node.im_not_alone_anymore(message.get_sender_node_info())
-            answer = YoureNotAloneAnswerMessage(dest, send, ticket, i_was_alone)
-            self._send_answer(sender_port,  answer)
+        self.__my_node.im_not_alone_anymore(message.get_sender_node_info())
+        answer = YoureNotAloneAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                            message.get_ticket(), i_was_alone)
+        self._send_answer(message, answer, connection)
 
-        # file publish request
-        elif message.get_type() == MSG_TYPE_FILE_PBLSH_RQST:
-            file_key = message.get_file_key()
-            file = message.get_file_data()
+    def _handle_file_publish_request(self, message, connection):
+        if not self._check_key_owner(message, connection):
+            return
 
-            self.__my_node.put_file_here(file_key, file)
+        self.__my_node.put_file_here(message.get_file_key(), message.get_file_data())
 
-            answer = FilePublishAnswerMessage(dest, send, ticket)
-            self._send_answer(sender_port,  answer)
+        answer = FilePublishAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                          message.get_ticket())
+        self._send_answer(message, answer, connection)
 
-        # file delete request
-        elif message.get_type() == MSG_TYPE_FILE_DEL_RQST:
-            file_key = message.get_file_key()
-            self.__my_node.delete_my_file(file_key)
+    def _handle_file_delete_request(self, message, connection):
+        if not self._check_key_owner(message, connection):
+            return
 
-            answer = FileDeleteAnswerMessage(dest, send, ticket)
-            self._send_answer(sender_port,  answer)
+        self.__my_node.delete_my_file(message.get_file_key())
 
-        # file request (get)
-        elif message.get_type() == MSG_TYPE_FILE_RQST_RQST:
-            file_key = message.get_file_key()
+        answer = FileDeleteAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                         message.get_ticket())
+        self._send_answer(message, answer, connection)
 
-            file = self.__my_node.get_my_file(file_key)
+    def _handle_file_request(self, message, connection):
+        if not self._check_key_owner(message, connection):
+            return
 
-            answer = FileAnswerMessage(dest, send, ticket, file)
-            self._send_answer(sender_port,  answer)
+        file = self.__my_node.get_my_file(message.get_file_key())
 
-        # ping request
-        elif message.get_type() == MSG_TYPE_PING:
-            answer = PingAnswerMessage(dest, send, ticket)
-            self._send_answer(sender_port,  answer)
+        answer = FileAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                   message.get_ticket(), file)
+        self._send_answer(message, answer, connection)
 
-        # answer
-        elif message.get_type() == MSG_TYPE_ANSWER:
-            self.__my_tcp_request_handler.add_answer(message)
+    def _check_key_owner(self, message, connection):
+        """
+        Metodo interno per la verifica di una richiesta su un file inviata a un responsabile memorizzato nella cache
+        delle ricerche del mittente: se il nodo non è più responsabile della key, risponde con KeyNotOwnedError.
 
-        else:
-            raise InvalidMessageTypeError
+        :param message: messaggio ricevuto
+        :param connection: connessione da cui è arrivato il messaggio, su cui inviare la risposta (opzionale)
+        :return: True se la richiesta può essere elaborata, False se è stata rifiutata
+        """
+
+        if not message.get_owner_check() or self.__my_node.is_responsible_for_the_key(message.get_file_key()):
+            return True
+
+        answer = ErrorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                    message.get_ticket(), KeyNotOwnedError())
+        self._send_answer(message, answer, connection)
+        return False
+
+    def _handle_ping(self, message, connection):
+        answer = PingAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                   message.get_ticket())
+        self._send_answer(message, answer, connection)
+
+    def _handle_answer(self, message, connection):
+        self.__my_tcp_request_handler.add_answer(message)
+
+    # ************************** CONTROLLO DI AMMISSIONE *******************************
+
+    def _admit_request(self, message, connection):
+        """
+        Metodo interno per l'ammissione di una richiesta ricevuta. Oltre il limite di richieste in elaborazione
+        nella sua corsia la richiesta viene rifiutata con una risposta "busy", che il mittente ritenterà più tardi.
+        Le risposte sono sempre ammesse.
+
+        :param message: messaggio ricevuto
+        :param connection: connessione da cui è arrivato il messaggio (opzionale)
+        :return: True se il messaggio può essere elaborato, False se è stato rifiutato
+        """
+
+        if not message.is_ack():
+            return True
+
+        lane = message_lane(message.get_type())
+        request_id = (message.get_sender_port(), message.get_ticket())
+
+        with self.__admission_lock:
+            # una richiesta ripetuta mentre la prima è in elaborazione occupa già uno slot
+            if request_id in self.__admitted_requests:
+                return True
+
+            if not 0 < self.__CONST_MAX_INBOUND_REQUESTS <= self.__inbound_requests[lane]:
+                self.__inbound_requests[lane] += 1
+                self.__admitted_requests.add(request_id)
+                return True
+
+        if self.__debug_mode:
+            print(f"\nDEBUG: {self.__my_node.get_node_info().get_port()}: too many {lane} requests in progress, "
+                  f"request from {message.get_sender_port()} rejected")
+
+        self.reject_message(message, connection)
+        return False
+
+    def _request_processed(self, message):
+        """
+        Metodo interno per liberare lo slot di una richiesta ammessa, all'invio della risposta
+        o se il gestore fallisce. Le chiamate successive alla prima, e quelle per richieste rifiutate, sono ignorate.
+
+        :param message: messaggio di richiesta
+        """
+
+        if not message.is_ack():
+            return
+
+        with self.__admission_lock:
+            request_id = (message.get_sender_port(), message.get_ticket())
+            if request_id in self.__admitted_requests:
+                self.__admitted_requests.remove(request_id)
+                self.__inbound_requests[message_lane(message.get_type())] -= 1
 
-    def _send_answer(self, sender_port, answer):
+    def get_inbound_requests_number(self, lane=None):
+        """
+        :param lane: la corsia di cui contare le richieste, tutte se None (opzionale)
+        :return: il numero di richieste ricevute attualmente in elaborazione
+        """
+
+        with self.__admission_lock:
+            if lane:
+                return self.__inbound_requests[lane]
+            return sum(self.__inbound_requests.values())
+
+    def reject_message(self, message, connection=None):
+        """
+        Metodo per il rifiuto di un messaggio che il nodo non può elaborare perché sovraccarico.
+        Alle richieste viene inviata una risposta di errore, così che il mittente non debba attendere il timeout.
+
+        :param message: messaggio ricevuto
+        :param connection: connessione da cui è arrivato il messaggio, su cui inviare la risposta (opzionale)
+        """
+
+        if message is None or not message.is_ack():
+            return
+
+        self.__stats.add_rejected_request()
+
+        answer = ErrorAnswerMessage(message.get_sender_node_info(), self.__my_node.get_node_info(),
+                                    message.get_ticket(), NodeOverloadedError())
+        self._send_answer(message, answer, connection)
+
+    async def async_process_message(self, message, connection=None):
+        """
+        Versione awaitable di process_message, per il motore di rete asyncio.
+        I tipi di messaggio con un gestore asincrono (es. la ricerca del successore, che può essere inoltrata
+        ad altri nodi) vengono attesi senza bloccare alcun thread; gli altri sono gestiti localmente
+        e vengono processati direttamente.
+
+        :param message: messaggio ricevuto
+        :param connection: connessione da cui è arrivato il messaggio, su cui inviare la risposta (opzionale)
+        """
+
+        if message is None:
+            raise EmptyMessageError
+
+        msg_type = message.get_type()
+        async_handler = self.__async_handlers.get(msg_type)
+
+        if async_handler is None:
+            self.process_message(message, connection)
+            return
+
+        self.__stats.add_received_message(msg_type, message.get_wire_size())
+
+        if self.__debug_mode:
+            print(
+                f"\nDEBUG: {self.__my_node.get_node_info().get_port()}: Just received a message from {message.get_sender_port()} with type {msg_type}")
+
+        if not self._admit_request(message, connection):
+            return
+
+        start_time = time.perf_counter()
+        try:
+            await async_handler(message, connection)
+        finally:
+            self._update_handler_stats(msg_type, time.perf_counter() - start_time)
+            self._request_processed(message)
+
+    def _send_answer(self, request, answer, connection=None):
         """
         Metodo interno per l'invio di un messaggio di risposta.
+        Se la richiesta è arrivata su una connessione, la risposta viene scritta sulla stessa connessione;
+        altrimenti viene inviata al server del mittente. Con la risposta si libera lo slot della richiesta.
 
-        :param sender_port: porta di destinazione (è la porta del mittente del messaggio originario)
+        :param request: il messaggio di richiesta a cui si risponde
         :param answer: il messaggio di risposta
+        :param connection: connessione da cui è arrivata la richiesta (opzionale)
         """
 
         try:
-            self.__my_socket_node.send_message(sender_port, answer)
+            if connection:
+                connection.send_message(answer)
+            else:
+                self.__my_socket_node.send_message(request.get_sender_port(), answer)
         except TCPRequestSendError:
             pass
+        else:
+            self.__stats.add_sent_message(request.get_type(), answer.get_wire_size())
+        finally:
+            self._request_processed(request)
+
+    def connection_lost(self, destination_port, lane=None, tickets=None):
+        """
+        Metodo invocato quando viene persa la connessione verso un altro nodo.
+        Le richieste in attesa di risposta da quel nodo non potranno essere completate.
+
+        :param destination_port: porta del nodo
+        :param lane: corsia di priorità della connessione persa, tutte se None (opzionale)
+        :param tickets: ticket delle richieste inviate sulla connessione persa, tutte se None (opzionale)
+        """
+
+        self.__my_tcp_request_handler.fail_pending_requests(destination_port, lane, tickets)
+
+    # ************************** METRICHE DEI GESTORI *******************************
+
+    def _update_handler_stats(self, msg_type, elapsed_time):
+        """
+        Metodo interno per l'aggiornamento delle metriche del gestore di un tipo di messaggio
+
+        :param msg_type: tipo del messaggio elaborato
+        :param elapsed_time: tempo di elaborazione in secondi
+        """
+
+        with self.__handler_stats_lock:
+            stats = self.__handler_stats.setdefault(msg_type, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed_time
+            stats[2] = max(stats[2], elapsed_time)
+
+    def get_handler_stats(self):
+        """
+        :return: dizionario tipo di messaggio -> (messaggi elaborati, tempo totale in secondi, tempo massimo in secondi)
+        """
+
+        with self.__handler_stats_lock:
+            return {msg_type: tuple(stats) for (msg_type, stats) in self.__handler_stats.items()}
 
     # ************************** METODI DI DEBUG *******************************
 
+    def print_handler_stats(self):
+        """
+        Metodo di debug per la stampa delle metriche dei gestori dei messaggi
+        """
+
+        print(f"{'Type':<8}{'Messages':>10}{'Avg (us)':>12}{'Max (us)':>12}{'Total (ms)':>12}")
+        for (msg_type, (count, total_time, max_time)) in sorted(self.get_handler_stats().items()):
+            average_time = total_time / count if count > 0 else 0.0
+            print(f"{msg_type:<8}{count:>10}{average_time * 1000000:>12.1f}{max_time * 1000000:>12.1f}"
+                  f"{total_time * 1000:>12.2f}")
+
     def set_debug_mode(self, debug_mode):
         """
         Metodo per abilitare / disabilitare la modalità di debug.
@@ -1,9 +1,21 @@
 import threading
-
+import time
+
+from network.async_request_sender_handler import AsyncRequestSenderHandler
+from network.async_runtime import NETWORK_ENGINE_THREADS, NETWORK_ENGINE_ASYNCIO, NETWORK_ENGINE_LOOPBACK
+from network.async_socket_node import AsyncSocketNode
+from network.circuit_breaker import backoff_delay
+from network.inflight_limiter import InflightLimiter, BUSY_MAX_RETRIES, is_busy_answer
+from network.loopback_socket_node import LoopbackSocketNode
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD
+from network.message_worker_pool import OVERLOAD_POLICY_REJECT
+from network.pending_requests import PendingRequestTable
+from network.priority_lanes import message_lane
 from network.received_messages_handler import ReceivedMessagesHandler
+from network.rtt_estimator import RTTEstimator
 from network.socket_node import SocketNode
 from network.messages import *
-from utilities.chord_utils import current_millis_time
+from network.node_stats import NodeStats
 
 
 class RequestSenderHandler:
@@ -11,12 +23,34 @@ class RequestSenderHandler:
     Classe per la gestione dell'invio delle richieste TCP di un nodo chord
     """
 
-    def __init__(self, my_node, tcp_request_timeout=5000, debug_mode=False):
+    def __init__(self, my_node, tcp_request_timeout=5000, network_engine=NETWORK_ENGINE_THREADS, worker_pool_size=16,
+                 worker_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT, codec=CODEC_BINARY, server_backlog=128,
+                 unix_sockets=True, send_retry_backoff=10, circuit_breaker_threshold=3,
+                 circuit_breaker_reset_timeout=2000, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, max_inflight_requests=256,
+                 max_inflight_requests_per_destination=32, max_inbound_requests=256, maintenance_workers=4,
+                 debug_mode=False):
         """
         Funzione init della classe. Inizializzazione degli attributi.
 
         :param my_node: riferimento al nodo corrispondente
-        :param tcp_request_timeout: timeout per le richieste TCP in ms (opzionale)
+        :param tcp_request_timeout: timeout massimo per le richieste TCP in ms, adattato al RTT di ogni nodo (opzionale)
+        :param network_engine: motore di rete, "threads", "asyncio" o "loopback" (opzionale)
+        :param worker_pool_size: numero di thread per l'elaborazione dei messaggi ricevuti, motore "threads" (opzionale)
+        :param worker_queue_size: massimo numero di messaggi ricevuti in attesa di elaborazione, motore "threads" (opzionale)
+        :param overload_policy: politica da applicare quando la coda è piena, motore "threads" (opzionale)
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param server_backlog: massimo numero di connessioni in ingresso in attesa di essere accettate (opzionale)
+        :param unix_sockets: se impostato a True, i nodi dello stesso host comunicano tramite Unix domain socket (opzionale)
+        :param send_retry_backoff: attesa massima in ms dopo il primo tentativo di invio fallito, raddoppiata a ogni tentativo (opzionale)
+        :param circuit_breaker_threshold: messaggi non recapitati consecutivi dopo i quali un nodo è considerato irraggiungibile, 0 per disabilitare (opzionale)
+        :param circuit_breaker_reset_timeout: tempo in ms dopo il quale un nodo irraggiungibile viene ricontattato (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param max_inflight_requests: massimo numero di richieste inviate in attesa di risposta, 0 per non porre limiti (opzionale)
+        :param max_inflight_requests_per_destination: massimo numero di richieste in attesa di risposta da uno stesso nodo, 0 per non porre limiti (opzionale)
+        :param max_inbound_requests: massimo numero di richieste ricevute in elaborazione per corsia di priorità, oltre il quale si risponde "busy" (opzionale)
+        :param maintenance_workers: thread del pool riservati ai messaggi di manutenzione, motori "threads" e "loopback" (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
@@ -24,20 +58,94 @@ class RequestSenderHandler:
         self.__my_node_info = self.__my_node.get_node_info()
         self.__ticket_counter = 0
         self.__lock = threading.Lock()
-        self.__waiting_tickets = list()
-        self.__received_answers_unprocessed = dict()
-        self.__CONST_TCP_REQUEST_TIMEOUT = tcp_request_timeout
-
-        self.__message_handler = ReceivedMessagesHandler(self.__my_node, None, self)
-        self.__socket_node = SocketNode(self.__my_node, self.__message_handler,
-                                        self.__my_node.get_node_info().get_port(),
-                                        debug_mode=debug_mode)
+        self.__pending_requests = PendingRequestTable()
+        self.__rtt_estimator = RTTEstimator(tcp_request_timeout)
+        self.__stats = NodeStats()
+        self.__inflight_limiter = InflightLimiter(max_inflight_requests, max_inflight_requests_per_destination,
+                                                  debug_mode=debug_mode)
+        self.__send_retry_backoff = send_retry_backoff / 1000
+
+        self.__message_handler = ReceivedMessagesHandler(self.__my_node, None, self, node_stats=self.__stats,
+                                                         max_inbound_requests=max_inbound_requests)
+        self.__async_request_sender_handler = None
+
+        if network_engine == NETWORK_ENGINE_ASYNCIO:
+            self.__socket_node = AsyncSocketNode(self.__my_node, self.__message_handler,
+                                                 self.__my_node.get_node_info().get_port(),
+                                                 codec=codec, server_backlog=server_backlog,
+                                                 unix_sockets=unix_sockets, send_retry_backoff=send_retry_backoff / 1000,
+                                                 circuit_breaker_threshold=circuit_breaker_threshold,
+                                                 circuit_breaker_reset_timeout=circuit_breaker_reset_timeout / 1000,
+                                                 compression=compression, compression_threshold=compression_threshold,
+                                                 node_stats=self.__stats, debug_mode=debug_mode)
+            self.__async_request_sender_handler = AsyncRequestSenderHandler(self.__my_node_info, self._get_ticket,
+                                                                            self.__pending_requests,
+                                                                            self.__socket_node,
+                                                                            self.__rtt_estimator, self.__stats,
+                                                                            self.__inflight_limiter,
+                                                                            self.__send_retry_backoff)
+        elif network_engine == NETWORK_ENGINE_LOOPBACK:
+            self.__socket_node = LoopbackSocketNode(self.__my_node, self.__message_handler,
+                                                    self.__my_node.get_node_info().get_port(),
+                                                    worker_pool_size=worker_pool_size,
+                                                    worker_queue_size=worker_queue_size,
+                                                    overload_policy=overload_policy,
+                                                    maintenance_workers=maintenance_workers, debug_mode=debug_mode)
+        else:
+            self.__socket_node = SocketNode(self.__my_node, self.__message_handler,
+                                            self.__my_node.get_node_info().get_port(),
+                                            worker_pool_size=worker_pool_size, worker_queue_size=worker_queue_size,
+                                            overload_policy=overload_policy, codec=codec,
+                                            server_backlog=server_backlog, unix_sockets=unix_sockets,
+                                            send_retry_backoff=send_retry_backoff / 1000,
+                                            circuit_breaker_threshold=circuit_breaker_threshold,
+                                            circuit_breaker_reset_timeout=circuit_breaker_reset_timeout / 1000,
+                                            compression=compression, compression_threshold=compression_threshold,
+                                            maintenance_workers=maintenance_workers, node_stats=self.__stats,
+                                            debug_mode=debug_mode)
+
         self.__message_handler.add_socket_node(self.__socket_node)
         self.__socket_node.start()
 
         # Modalità di debug
         self.__debug_mode = debug_mode
 
+    def get_async_request_sender_handler(self):
+        """
+        Metodo per ottenere la versione awaitable dei metodi send_*, disponibile solo con il motore di rete asyncio
+
+        :return: l'AsyncRequestSenderHandler del nodo, None se il motore di rete è "threads"
+        """
+
+        return self.__async_request_sender_handler
+
+    def get_rtt_estimator(self):
+        return self.__rtt_estimator
+
+    def get_message_handler(self):
+        return self.__message_handler
+
+    def get_stats(self):
+        return self.__stats
+
+    def get_pending_requests(self):
+        return self.__pending_requests
+
+    def get_inflight_limiter(self):
+        return self.__inflight_limiter
+
+    def get_worker_pool(self):
+        """
+        Metodo per ottenere il pool di worker che elabora i messaggi ricevuti, disponibile solo con il motore "threads"
+
+        :return: il MessageWorkerPool del nodo, None se il motore di rete è "asyncio"
+        """
+
+        if self.__async_request_sender_handler:
+            return None
+
+        return self.__socket_node.get_worker_pool()
+
     def socket_node_join(self):
         """
         Metodo per il join del processo socket node.
@@ -68,31 +176,9 @@ class RequestSenderHandler:
         message_ticket = self._get_ticket()
         sender_node_info = self.__my_node_info
         notify_request_message = NotifyRequestMessage(destination_node_info, sender_node_info, message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), notify_request_message)
 
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, notify_request_message)
 
         return answer.get_files()
 
@@ -111,31 +197,9 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         predecessor_request_message = GetPredecessorRequestMessage(destination_node_info, sender_node_info,
                                                                    message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), predecessor_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
 
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, predecessor_request_message)
 
         return answer.get_predecessor_node_info()
 
@@ -154,31 +218,9 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         first_successor_request_message = GetFirstSuccessorRequestMessage(destination_node_info, sender_node_info,
                                                                           message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), first_successor_request_message)
 
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, first_successor_request_message)
 
         return answer.get_successor_node_info()
 
@@ -198,33 +240,164 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         successor_request_message = SearchKeySuccessorRequestMessage(destination_node_info, key, sender_node_info,
                                                                      message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), successor_request_message)
 
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, successor_request_message)
 
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
+        return answer.get_successor_node_info()
 
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
+    def send_search_key_successor_request_with_callback(self, destination_node_info, key, callback):
+        """
+        Versione non bloccante di send_search_key_successor_request, per il motore di rete "threads".
+        La richiesta viene inviata senza attenderne la risposta: al suo arrivo (o al timeout) viene invocata
+        la callback nel pool di worker del nodo.
 
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
+        :param destination_node_info: node info del nodo di destinazione
+        :param key: la chiave del nodo di cui il mittente sta cercando il successore
+        :param callback: funzione invocata con il successore trovato e l'eventuale classe dell'eccezione TCP
+        """
+
+        # Generazione ticket e invio del messaggio
+        message_ticket = self._get_ticket()
+        sender_node_info = self.__my_node_info
+        successor_request_message = SearchKeySuccessorRequestMessage(destination_node_info, key, sender_node_info,
+                                                                     message_ticket)
+
+        def answer_received(answer, exception):
+            if exception:
+                callback(None, exception)
+            else:
+                callback(answer.get_successor_node_info(), None)
+
+        self._send_request_with_callback(destination_node_info, successor_request_message, answer_received)
+
+    def send_search_key_successor_requests(self, destination_node_info, keys):
+        """
+        Creazione e invio contemporaneo allo stesso nodo di un messaggio search successor request per ciascuna key
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param keys: lista delle chiavi di cui il mittente sta cercando il successore
+        :return: lista con, per ogni key, il successore trovato (o None) e l'eventuale classe dell'eccezione TCP
+        """
+
+        # Generazione ticket e invio dei messaggi
+        sender_node_info = self.__my_node_info
+        successor_request_messages = [SearchKeySuccessorRequestMessage(destination_node_info, key, sender_node_info,
+                                                                       self._get_ticket())
+                                      for key in keys]
+
+        # Invio dei messaggi e attesa delle risposte
+        results = list()
+        for (answer, exception) in self._send_requests_and_wait_answers(successor_request_messages):
+            if exception:
+                results.append((None, exception))
+            else:
+                results.append((answer.get_successor_node_info(), None))
+
+        return results
+
+    def send_next_hop_requests(self, destination_node_infos, key, max_timeout=None):
+        """
+        Creazione e invio contemporaneo di un messaggio next hop request a ciascuno dei nodi indicati,
+        per un passo della ricerca iterativa del successore di una key.
+
+        :param destination_node_infos: lista dei node info dei nodi di destinazione
+        :param key: la chiave di cui il mittente sta cercando il successore
+        :param max_timeout: timeout massimo in secondi di ogni richiesta (opzionale)
+        :return: lista con, per ogni nodo, la tupla (successore della key o None, nodi a cui proseguire la ricerca)
+                 e l'eventuale classe dell'eccezione TCP
+        """
+
+        # Generazione ticket e invio dei messaggi
+        sender_node_info = self.__my_node_info
+        next_hop_request_messages = [NextHopRequestMessage(destination_node_info, key, sender_node_info,
+                                                           self._get_ticket())
+                                     for destination_node_info in destination_node_infos]
+
+        # Invio dei messaggi e attesa delle risposte
+        results = list()
+        for (answer, exception) in self._send_requests_and_wait_answers(next_hop_request_messages, max_timeout):
+            if exception:
+                results.append((None, exception))
+            else:
+                results.append(((answer.get_successor_node_info(), answer.get_next_hop_node_infos()), None))
+
+        return results
+
+    def send_forwarded_lookup_request(self, destination_node_infos, key):
+        """
+        Creazione e invio di un messaggio forwarded lookup al primo dei nodi indicati che risulti raggiungibile.
+        La ricerca prosegue di nodo in nodo senza che nessuno attenda l'esito del passo successivo: la risposta
+        arriva direttamente dal nodo responsabile della key, con il ticket della richiesta.
+
+        :param destination_node_infos: lista dei node info dei nodi a cui inoltrare la ricerca, in ordine di preferenza
+        :param key: la chiave di cui il mittente sta cercando il successore
+        :return: il successore della key, se trovato
+        """
+
+        sender_node_info = self.__my_node_info
+
+        for destination_node_info in destination_node_infos:
+            # Generazione ticket e invio del messaggio
+            forwarded_lookup_message = ForwardedLookupRequestMessage(destination_node_info, key, sender_node_info,
+                                                                     self._get_ticket(), sender_node_info, 1)
+
+            # Invio del messaggio e attesa della risposta: se il nodo non è raggiungibile provo il successivo
+            try:
+                answer = self._send_request_and_wait_answer(destination_node_info, forwarded_lookup_message)
+            except TCPRequestSendError:
+                continue
+
+            return answer.get_successor_node_info()
+
+        raise TCPRequestSendError
+
+    def forward_lookup_request(self, request_message, next_hop_node_infos):
+        """
+        Metodo per l'inoltro di un messaggio forwarded lookup al primo dei nodi indicati che risulti raggiungibile.
+        Il messaggio viene solo inviato: la risposta non è attesa da questo nodo.
+
+        :param request_message: il messaggio forwarded lookup ricevuto
+        :param next_hop_node_infos: lista dei node info dei nodi a cui inoltrare la ricerca, in ordine di preferenza
+        :return: True se la ricerca è stata inoltrata, False se nessun nodo è raggiungibile
+        """
+
+        for destination_node_info in next_hop_node_infos:
+            forwarded_lookup_message = ForwardedLookupRequestMessage(destination_node_info, request_message.get_key(),
+                                                                     self.__my_node_info, request_message.get_ticket(),
+                                                                     request_message.get_originator_node_info(),
+                                                                     request_message.get_hops() + 1)
+            try:
+                self.__socket_node.send_request(destination_node_info.get_port(), forwarded_lookup_message)
+            except TCPRequestSendError:
+                continue
+
+            self.__stats.add_sent_message(forwarded_lookup_message.get_type(),
+                                          forwarded_lookup_message.get_wire_size())
+            return True
+
+        return False
 
+    def send_forwarded_lookup_answer(self, request_message, successor_node_info):
+        """
+        Creazione e invio della risposta a una ricerca inoltrata, direttamente al nodo che l'ha avviata
+
+        :param request_message: il messaggio forwarded lookup ricevuto
+        :param successor_node_info: node info del successore della key, None se non è stato trovato
+        """
+
+        originator_node_info = request_message.get_originator_node_info()
+        answer = SearchKeySuccessorAnswerMessage(originator_node_info, self.__my_node_info, successor_node_info,
+                                                 request_message.get_ticket())
+
+        # Se il nodo che ha avviato la ricerca non è raggiungibile la risposta viene scartata:
+        # la sua richiesta andrà in timeout
         try:
-            answer.check()
+            self.__socket_node.send_request(originator_node_info.get_port(), answer)
         except TCPRequestSendError:
-            raise TCPRequestSendError
+            return
 
-        return answer.get_successor_node_info()
+        self.__stats.add_sent_message(request_message.get_type(), answer.get_wire_size())
 
     # sembra ok
     def send_youre_not_alone_anymore_request(self, destination_node_info):
@@ -241,31 +414,9 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         youre_not_alone_anymore_request_message = YoureNotAloneRequestMessage(destination_node_info, sender_node_info,
                                                                               message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), youre_not_alone_anymore_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
 
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, youre_not_alone_anymore_request_message)
 
         return answer.destination_node_was_alone()
 
@@ -285,31 +436,9 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         leaving_request_message = LeavingPredecessorRequestMessage(destination_node_info, sender_node_info,
                                                                    message_ticket, new_predecessor_node_info, files)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), leaving_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
 
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        self._send_request_and_wait_answer(destination_node_info, leaving_request_message)
 
     # forse ok
     def send_leaving_successor_request(self, destination_node_info, new_successor_node_info):
@@ -326,36 +455,14 @@ class RequestSenderHandler:
         sender_node_info = self.__my_node_info
         leaving_request_message = LeavingSuccessorRequestMessage(destination_node_info, sender_node_info,
                                                                  message_ticket, new_successor_node_info)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), leaving_request_message)
 
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        self._send_request_and_wait_answer(destination_node_info, leaving_request_message)
 
     # ************************ METODI MESSAGGI FILE *****************************
 
     # forse ok
-    def send_publish_request(self, destination_node_info, key, file):
+    def send_publish_request(self, destination_node_info, key, file, owner_check=False):
         """
          Creazione e invio di un messaggio file publish.
          Consente di inserire un file all'interno della rete chord
@@ -363,47 +470,27 @@ class RequestSenderHandler:
          :param destination_node_info: node info del nodo di destinazione
          :param key: chiave del file da pubblicare
          :param file: il file da pubblicare
+         :param owner_check: se True, il destinatario rifiuta la richiesta (KeyNotOwnedError) se non è responsabile della key (opzionale)
          """
 
         # Generazione ticket e invio del messaggio
         message_ticket = self._get_ticket()
         sender_node_info = self.__my_node_info
         file_publish_request_message = FilePublishRequestMessage(destination_node_info, sender_node_info,
-                                                                 message_ticket, key, file)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), file_publish_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
+                                                                 message_ticket, key, file, owner_check)
 
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
-
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        self._send_request_and_wait_answer(destination_node_info, file_publish_request_message)
 
     # forse ok
-    def send_file_request(self, destination_node_info, key):
+    def send_file_request(self, destination_node_info, key, owner_check=False):
         """
          Creazione e invio di un messaggio file request
          Consente di ottenere un file dalla rete chord, se presente
 
          :param destination_node_info: node info del nodo di destinazione
          :param key: chiave del file richiesto
+         :param owner_check: se True, il destinatario rifiuta la richiesta (KeyNotOwnedError) se non è responsabile della key (opzionale)
          :return file: il file richiesto
          """
 
@@ -411,75 +498,32 @@ class RequestSenderHandler:
         message_ticket = self._get_ticket()
         sender_node_info = self.__my_node_info
         file_request_message = FileRequestMessage(destination_node_info, sender_node_info,
-                                                  message_ticket, key)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), file_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
+                                                  message_ticket, key, owner_check)
 
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        answer = self._send_request_and_wait_answer(destination_node_info, file_request_message)
 
         return answer.get_file()
 
     # forse ok
-    def send_delete_file_request(self, destination_node_info, key):
+    def send_delete_file_request(self, destination_node_info, key, owner_check=False):
         """
          Creazione e invio di un messaggio file delete.
          Consente di eliminare un file all'interno della rete chord, se presente
 
          :param destination_node_info: node info del nodo di destinazione
          :param key: chiave del file da eliminare
+         :param owner_check: se True, il destinatario rifiuta la richiesta (KeyNotOwnedError) se non è responsabile della key (opzionale)
          """
 
         # Generazione ticket e invio del messaggio
         message_ticket = self._get_ticket()
         sender_node_info = self.__my_node_info
         file_delete_request_message = FileDeleteRequestMessage(destination_node_info, sender_node_info,
-                                                               message_ticket, key)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), file_delete_request_message)
-
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
-
-        try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
-        except KeyboardInterrupt:
-            raise TCPRequestSendError
-
-        # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
-            raise TCPRequestTimerExpiredError
-
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
+                                                               message_ticket, key, owner_check)
 
-        try:
-            answer.check()
-        except TCPRequestSendError:
-            raise TCPRequestSendError
+        # Invio del messaggio e attesa della risposta
+        self._send_request_and_wait_answer(destination_node_info, file_delete_request_message)
 
     # ************************ METODI MESSAGGI RETE *****************************
 
@@ -496,44 +540,350 @@ class RequestSenderHandler:
         message_ticket = self._get_ticket()
         sender_node_info = self.__my_node_info
         ping_request_message = PingRequestMessage(destination_node_info, sender_node_info, message_ticket)
-        self.__waiting_tickets.append(message_ticket)
-        self.__socket_node.send_message(destination_node_info.get_port(), ping_request_message)
 
-        # Resto in attesa della risposta
-        sent_time = current_millis_time()
+        # Invio del messaggio e attesa della risposta
+        self._send_request_and_wait_answer(destination_node_info, ping_request_message)
+
+    # ******************* METODI INTERNI PER GESTIONE MESSAGGI *********************
+
+    def _send_request_and_wait_answer(self, destination_node_info, request_message):
+        """
+        Metodo interno per l'invio di una richiesta e l'attesa della relativa risposta.
+        Se il destinatario risponde "busy" (NodeOverloadedError) la richiesta viene ritentata, con un'attesa
+        esponenziale, fino a BUSY_MAX_RETRIES volte.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :return answer: il messaggio di risposta
+        """
+
+        answer = self._send_request_attempt(destination_node_info, request_message)
+
+        retries = 0
+        while is_busy_answer(answer) and retries < BUSY_MAX_RETRIES:
+            retries += 1
+            time.sleep(backoff_delay(retries, self.__send_retry_backoff))
+            answer = self._send_request_attempt(destination_node_info, request_message)
 
+        # Processo la risposta
         try:
-            while message_ticket not in self.__received_answers_unprocessed.keys() and current_millis_time() - sent_time <= self.__CONST_TCP_REQUEST_TIMEOUT:
-                pass
+            answer.check()
+        except TCPRequestSendError:
+            raise TCPRequestSendError
+
+        return answer
+
+    def _send_request_attempt(self, destination_node_info, request_message):
+        """
+        Metodo interno per un singolo tentativo di invio di una richiesta e l'attesa della relativa risposta.
+        L'attesa avviene sull'evento associato al ticket della richiesta (nessun busy waiting),
+        con una scadenza calcolata su un orologio monotono a partire dal RTT stimato verso il destinatario.
+        Se il nodo ha raggiunto il limite di richieste in volo, l'invio attende che se ne liberi una.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :return answer: il messaggio di risposta, da verificare
+        """
+
+        destination_port = destination_node_info.get_port()
+        timeout = self.__rtt_estimator.get_timeout(destination_port, request_message.get_type()) / 1000
+
+        if not self.__inflight_limiter.acquire(destination_port, timeout, message_lane(request_message.get_type())):
+            raise TCPRequestSendError
+
+        try:
+            return self._send_admitted_request(destination_port, request_message, timeout)
+        finally:
+            self.__inflight_limiter.release(destination_port)
+
+    def _send_admitted_request(self, destination_port, request_message, timeout):
+        """
+        Metodo interno per l'invio di una richiesta che ha già ottenuto un posto tra quelle in volo
+
+        :param destination_port: porta del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :param timeout: timeout della richiesta in secondi
+        :return answer: il messaggio di risposta, da verificare
+        """
+
+        message_ticket = request_message.get_ticket()
+
+        # La richiesta va registrata prima dell'invio, altrimenti una risposta molto veloce andrebbe persa
+        pending_request = self.__pending_requests.register(message_ticket, destination_port, request_message.get_type(),
+                                                           timeout)
+
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+
+        # La richiesta viaggia sul canale multiplexato verso il destinatario;
+        # la risposta verrà consegnata tramite add_answer
+        try:
+            self.__socket_node.send_request(destination_port, request_message)
+        except TCPRequestSendError:
+            self.__pending_requests.remove(message_ticket)
+            raise TCPRequestSendError
+
+        self.__stats.add_sent_message(request_message.get_type(), request_message.get_wire_size())
+
+        # Resto in attesa della risposta
+        try:
+            answer_received = pending_request.wait(max(0.0, deadline - time.monotonic()))
         except KeyboardInterrupt:
             raise TCPRequestSendError
+        finally:
+            self.__pending_requests.remove(message_ticket)
 
         # La richiesta è andata in timeout
-        if current_millis_time() - sent_time > self.__CONST_TCP_REQUEST_TIMEOUT:
+        if not answer_received:
+            self.__rtt_estimator.add_timeout(destination_port)
+            self.__stats.add_timeout(destination_port)
             raise TCPRequestTimerExpiredError
 
-        # Processo la risposta
-        answer = self.__received_answers_unprocessed[message_ticket]
-        self.__waiting_tickets.remove(message_ticket)
-        del self.__received_answers_unprocessed[message_ticket]
+        # La connessione verso il destinatario è stata persa prima della risposta
+        if pending_request.is_failed():
+            raise TCPRequestSendError
+
+        rtt = (time.monotonic() - start_time) * 1000
+        self.__rtt_estimator.add_sample(destination_port, request_message.get_type(), rtt)
+        self.__stats.add_rpc_latency(request_message.get_type(), rtt)
+
+        return pending_request.get_answer()
+
+    def _send_requests_and_wait_answers(self, request_messages, max_timeout=None):
+        """
+        Metodo interno per l'invio contemporaneo di più richieste e l'attesa delle relative risposte.
+        Come in _send_request_and_wait_answer, le richieste che ricevono una risposta "busy" o trovano il limite
+        di richieste in volo vengono ritentate, insieme e con un'attesa esponenziale, fino a BUSY_MAX_RETRIES volte;
+        oltre, falliscono come le altre e il chiamante prosegue con le risposte ottenute.
+
+        :param request_messages: lista dei messaggi di richiesta da inviare
+        :param max_timeout: timeout massimo in secondi di ogni richiesta, oltre a quello stimato dal RTT (opzionale)
+        :return: lista con, per ogni richiesta, la tupla (risposta verificata, classe dell'eccezione TCP)
+        """
+
+        results = [(None, TCPRequestSendError)] * request_messages.__len__()
+        retry_indexes = self._send_requests_attempt(request_messages, range(0, request_messages.__len__()),
+                                                    max_timeout, results)
+
+        retries = 0
+        while retry_indexes and retries < BUSY_MAX_RETRIES:
+            retries += 1
+            time.sleep(backoff_delay(retries, self.__send_retry_backoff))
+            retry_indexes = self._send_requests_attempt(request_messages, retry_indexes, max_timeout, results)
+
+        return results
+
+    def _send_requests_attempt(self, request_messages, indexes, max_timeout, results):
+        """
+        Metodo interno per un singolo tentativo di invio contemporaneo di più richieste e l'attesa delle risposte.
+
+        :param request_messages: lista dei messaggi di richiesta
+        :param indexes: indici delle richieste da inviare in questo tentativo
+        :param max_timeout: timeout massimo in secondi di ogni richiesta, oltre a quello stimato dal RTT
+        :param results: lista dei risultati, in cui vengono registrati quelli delle richieste inviate
+        :return: indici delle richieste da ritentare (risposta "busy" o limite di richieste in volo raggiunto)
+        """
+
+        retry_indexes = list()
+        sent_requests = list()
+
+        for index in indexes:
+            request_message = request_messages[index]
+            destination_port = request_message.get_destination_port()
+            message_ticket = request_message.get_ticket()
+            timeout = self.__rtt_estimator.get_timeout(destination_port, request_message.get_type()) / 1000
+            if max_timeout is not None:
+                timeout = min(timeout, max_timeout)
+
+            if not self.__inflight_limiter.try_acquire(destination_port, message_lane(request_message.get_type())):
+                retry_indexes.append(index)
+                continue
+
+            # La richiesta va registrata prima dell'invio, altrimenti una risposta molto veloce andrebbe persa
+            pending_request = self.__pending_requests.register(message_ticket, destination_port,
+                                                               request_message.get_type(), timeout)
+            start_time = time.monotonic()
+
+            try:
+                self.__socket_node.send_request(destination_port, request_message)
+            except TCPRequestSendError:
+                self.__pending_requests.remove(message_ticket)
+                self.__inflight_limiter.release(destination_port)
+                results[index] = (None, TCPRequestSendError)
+                continue
+
+            self.__stats.add_sent_message(request_message.get_type(), request_message.get_wire_size())
+            sent_requests.append((index, request_message, pending_request, start_time, start_time + timeout))
+
+        # Resto in attesa delle risposte: le attese si sovrappongono, ognuna con la propria scadenza
+        for (index, request_message, pending_request, start_time, deadline) in sent_requests:
+            destination_port = request_message.get_destination_port()
+
+            try:
+                answer_received = pending_request.wait(max(0.0, deadline - time.monotonic()))
+            finally:
+                self.__pending_requests.remove(request_message.get_ticket())
+                self.__inflight_limiter.release(destination_port)
+
+            if not answer_received:
+                self.__rtt_estimator.add_timeout(destination_port)
+                self.__stats.add_timeout(destination_port)
+                results[index] = (None, TCPRequestTimerExpiredError)
+                continue
+
+            if pending_request.is_failed():
+                results[index] = (None, TCPRequestSendError)
+                continue
+
+            rtt = (time.monotonic() - start_time) * 1000
+            self.__rtt_estimator.add_sample(destination_port, request_message.get_type(), rtt)
+            self.__stats.add_rpc_latency(request_message.get_type(), rtt)
+
+            answer = pending_request.get_answer()
+            if is_busy_answer(answer):
+                retry_indexes.append(index)
+            elif answer.get_exception() is None:
+                results[index] = (answer, None)
+            else:
+                results[index] = (None, TCPRequestSendError)
+
+        return retry_indexes
+
+    def _send_request_with_callback(self, destination_node_info, request_message, callback, busy_retries=0):
+        """
+        Metodo interno per l'invio di una richiesta senza attenderne la risposta.
+        La callback viene invocata una sola volta nel pool di worker del nodo: con la risposta, oppure con
+        la classe dell'eccezione se la richiesta non è stata recapitata o se il timeout è scaduto.
+        Le risposte "busy" e il raggiungimento del limite di richieste in volo non occupano alcun worker:
+        il nuovo tentativo viene programmato nel pool dopo un'attesa esponenziale.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :param callback: funzione invocata con la risposta e l'eventuale classe dell'eccezione TCP
+        :param busy_retries: numero di tentativi già rifiutati (opzionale)
+        """
+
+        message_ticket = request_message.get_ticket()
+        destination_port = destination_node_info.get_port()
+        worker_pool = self.__socket_node.get_worker_pool()
+        callback_lock = threading.Lock()
+        timeout = self.__rtt_estimator.get_timeout(destination_port, request_message.get_type()) / 1000
+
+        if not self.__inflight_limiter.try_acquire(destination_port, message_lane(request_message.get_type())):
+            self._retry_request_with_callback(destination_node_info, request_message, callback, busy_retries)
+            return
+
+        # La richiesta va registrata prima dell'invio, altrimenti una risposta molto veloce andrebbe persa
+        pending_request = self.__pending_requests.register(message_ticket, destination_port, request_message.get_type(),
+                                                           timeout)
+        start_time = time.monotonic()
+
+        def request_completed(exception):
+            # solo il primo tra risposta, errore e timeout viene consegnato
+            if not callback_lock.acquire(blocking=False):
+                return
+
+            self.__pending_requests.remove(message_ticket)
+            self.__inflight_limiter.release(destination_port)
+
+            # il timer del timeout non serve più e non deve trattenere la richiesta fino alla scadenza
+            if exception is not TCPRequestTimerExpiredError:
+                worker_pool.cancel_timer(timeout_timer)
+
+            if exception:
+                if exception is TCPRequestTimerExpiredError:
+                    self.__rtt_estimator.add_timeout(destination_port)
+                    self.__stats.add_timeout(destination_port)
+                callback(None, exception)
+                return
+
+            # La connessione verso il destinatario è stata persa prima della risposta
+            if pending_request.is_failed():
+                callback(None, TCPRequestSendError)
+                return
+
+            rtt = (time.monotonic() - start_time) * 1000
+            self.__rtt_estimator.add_sample(destination_port, request_message.get_type(), rtt)
+            self.__stats.add_rpc_latency(request_message.get_type(), rtt)
+
+            answer = pending_request.get_answer()
+
+            if is_busy_answer(answer):
+                self._retry_request_with_callback(destination_node_info, request_message, callback, busy_retries)
+                return
+
+            try:
+                answer.check()
+            except TCPRequestSendError:
+                callback(None, TCPRequestSendError)
+                return
+
+            callback(answer, None)
+
+        timeout_timer = worker_pool.call_later(timeout, request_completed, TCPRequestTimerExpiredError)
+        pending_request.add_done_callback(lambda: worker_pool.submit(request_completed, None))
 
         try:
-            answer.check()
+            self.__socket_node.send_request(destination_port, request_message)
         except TCPRequestSendError:
-            raise TCPRequestSendError
+            worker_pool.submit(request_completed, TCPRequestSendError)
+        else:
+            self.__stats.add_sent_message(request_message.get_type(), request_message.get_wire_size())
 
-    # ******************* METODI INTERNI PER GESTIONE MESSAGGI *********************
+    def _retry_request_with_callback(self, destination_node_info, request_message, callback, busy_retries):
+        """
+        Metodo interno per programmare un nuovo tentativo di una richiesta rifiutata perché il destinatario
+        (o il nodo stesso) è sovraccarico. Esauriti i tentativi, la callback riceve TCPRequestSendError.
+
+        :param destination_node_info: node info del nodo di destinazione
+        :param request_message: il messaggio di richiesta da inviare
+        :param callback: funzione invocata con la risposta e l'eventuale classe dell'eccezione TCP
+        :param busy_retries: numero di tentativi già rifiutati
+        """
+
+        worker_pool = self.__socket_node.get_worker_pool()
+
+        if busy_retries >= BUSY_MAX_RETRIES:
+            worker_pool.submit(callback, None, TCPRequestSendError)
+            return
+
+        worker_pool.call_later(backoff_delay(busy_retries + 1, self.__send_retry_backoff),
+                               self._send_request_with_callback, destination_node_info, request_message, callback,
+                               busy_retries + 1)
 
     # forse ok
     def add_answer(self, message):
+        """
+        Metodo per la consegna di una risposta ricevuta alla richiesta in attesa con lo stesso ticket.
+        Le risposte a richieste non più in attesa vengono scartate.
+        La risposta viene contabilizzata con il tipo della richiesta a cui risponde.
+
+        :param message: il messaggio di risposta
+        """
 
-        if message.get_ticket() not in self.__received_answers_unprocessed:
-            self.__received_answers_unprocessed[message.get_ticket()] = message
+        pending_request = self.__pending_requests.complete(message)
+
+        msg_type = pending_request.get_msg_type() if pending_request else MSG_TYPE_ANSWER
+        self.__stats.add_received_message(msg_type, message.get_wire_size())
+
+        if is_busy_answer(message):
+            self.__stats.add_busy_answer()
+
+    def fail_pending_requests(self, destination_port, lane=None, tickets=None):
+        """
+        Metodo per far fallire le richieste in attesa di risposta da un nodo verso cui è stata persa la connessione
+
+        :param destination_port: porta del nodo
+        :param lane: corsia di priorità della connessione persa, tutte se None (opzionale)
+        :param tickets: ticket delle richieste inviate sulla connessione persa, tutte se None (opzionale)
+        """
+
+        self.__pending_requests.fail_destination(destination_port, lane, tickets)
 
     def _get_ticket(self):
         with self.__lock:
             self.__ticket_counter += 1
-        return self.__ticket_counter
+            return self.__ticket_counter
 
     def tcp_process_message(self, sender_ip, sender_port, message):
         """
@@ -548,7 +898,7 @@ class RequestSenderHandler:
 
         if message:
             if message.get_type() == MSG_TYPE_ANSWER:
-                self.__received_answers_unprocessed[message.get_ticket()] = message
+                self.add_answer(message)
 
     def answer_received(self, message_ticket):
         """
@@ -557,10 +907,7 @@ class RequestSenderHandler:
         :param message_ticket: ticket della risposta attesa
         """
 
-        if message_ticket in self.__received_answers_unprocessed:
-            return True
-        else:
-            return False
+        return self.__pending_requests.is_answered(message_ticket)
 
     # ************************** METODI DI DEBUG *******************************
 
@@ -0,0 +1,143 @@
+import threading
+
+from network.messages import *
+
+# *********** STIMA DEL RTT (Jacobson / Karels) *********
+RTT_ALPHA = 1 / 8  # peso dell'ultimo campione nella media del RTT
+RTT_BETA = 1 / 4  # peso dell'ultimo campione nella variazione media del RTT
+RTT_K = 4  # numero di variazioni medie aggiunte al RTT medio nel calcolo del timeout
+RTT_MIN_VARIATION = 1  # variazione minima in ms, pari alla granularità dell'orologio
+RTT_MAX_BACKOFF = 64  # massimo moltiplicatore del timeout dopo richieste scadute consecutive
+
+# *********** LIMITI DEI TIMEOUT PER TIPO DI MESSAGGIO *********
+# tipo di messaggio -> (timeout minimo in ms, timeout massimo in ms); None indica il timeout delle richieste TCP
+REQUEST_TIMEOUT_BOUNDS = {
+    MSG_TYPE_PING: (200, None),
+    MSG_TYPE_GET_PREC_RQST: (200, None),
+    MSG_TYPE_GET_FIRST_SUCC_RQST: (200, None),
+    MSG_TYPE_YOURE_NOT_ALONE_RQST: (200, None),
+    MSG_TYPE_NEXT_HOP_RQST: (200, None),  # la risposta è calcolata localmente dal nodo interrogato
+    MSG_TYPE_NOTIFY: (1000, None),  # la risposta può trasportare dei file
+    MSG_TYPE_SEARCH_KEY_SUCC_RQST: (1000, None),  # la richiesta può essere inoltrata ad altri nodi
+    MSG_TYPE_FORWARDED_LOOKUP: (1000, None),  # la risposta arriva dal nodo responsabile, al termine del percorso
+    MSG_TYPE_LEAVE_PREC_RQST: (2000, None),
+    MSG_TYPE_LEAVE_SUCC_RQST: (2000, None),
+    MSG_TYPE_FILE_PBLSH_RQST: (2000, None),
+    MSG_TYPE_FILE_DEL_RQST: (2000, None),
+    MSG_TYPE_FILE_RQST_RQST: (2000, None),
+}
+
+# le risposte a questi tipi di messaggio non dipendono solo dal nodo interrogato: non aggiornano la stima
+RTT_UNSAMPLED_MSG_TYPES = (MSG_TYPE_SEARCH_KEY_SUCC_RQST, MSG_TYPE_FORWARDED_LOOKUP)
+
+
+class RTTEstimator:
+    """
+    Stima del round-trip time verso ogni nodo contattato, secondo l'algoritmo di Jacobson / Karels.
+    Le richieste che ricevono risposta aggiornano il RTT medio e la sua variazione media; da questi
+    si ricava il timeout delle richieste successive, entro i limiti previsti per ogni tipo di messaggio.
+    """
+
+    def __init__(self, default_timeout=5000):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param default_timeout: timeout massimo in ms, usato anche verso i nodi di cui non si ha ancora una stima (opzionale)
+        """
+
+        self.__CONST_DEFAULT_TIMEOUT = default_timeout
+
+        # destinazione -> [RTT medio in ms, variazione media in ms, moltiplicatore dopo le richieste scadute, campioni]
+        self.__estimates = dict()
+        self.__lock = threading.Lock()
+
+    def add_sample(self, destination_port, msg_type, rtt):
+        """
+        Metodo per aggiornare la stima verso un nodo con il tempo di risposta di una richiesta
+
+        :param destination_port: porta del nodo che ha risposto
+        :param msg_type: tipo del messaggio di richiesta
+        :param rtt: tempo di risposta in ms
+        """
+
+        if msg_type in RTT_UNSAMPLED_MSG_TYPES:
+            return
+
+        with self.__lock:
+            estimate = self.__estimates.get(destination_port)
+
+            if estimate is None:
+                self.__estimates[destination_port] = [rtt, rtt / 2, 1, 1]
+                return
+
+            estimate[1] = (1 - RTT_BETA) * estimate[1] + RTT_BETA * abs(estimate[0] - rtt)
+            estimate[0] = (1 - RTT_ALPHA) * estimate[0] + RTT_ALPHA * rtt
+            estimate[2] = 1
+            estimate[3] += 1
+
+    def add_timeout(self, destination_port):
+        """
+        Metodo per registrare una richiesta scaduta: il timeout verso il nodo raddoppia
+        fino alla prossima risposta ricevuta
+
+        :param destination_port: porta del nodo che non ha risposto
+        """
+
+        with self.__lock:
+            estimate = self.__estimates.get(destination_port)
+
+            if estimate is not None:
+                estimate[2] = min(RTT_MAX_BACKOFF, estimate[2] * 2)
+
+    def get_timeout(self, destination_port, msg_type):
+        """
+        Metodo per il calcolo del timeout di una richiesta
+
+        :param destination_port: porta del nodo di destinazione
+        :param msg_type: tipo del messaggio di richiesta
+        :return: il timeout in ms
+        """
+
+        (min_timeout, max_timeout) = REQUEST_TIMEOUT_BOUNDS.get(msg_type, (0, None))
+        if max_timeout is None:
+            max_timeout = self.__CONST_DEFAULT_TIMEOUT
+        min_timeout = min(min_timeout, max_timeout)
+
+        with self.__lock:
+            estimate = self.__estimates.get(destination_port)
+
+            if estimate is None:
+                return max_timeout
+
+            timeout = (estimate[0] + max(RTT_MIN_VARIATION, RTT_K * estimate[1])) * estimate[2]
+
+        return min(max_timeout, max(min_timeout, timeout))
+
+    def remove(self, destination_port):
+        """
+        Metodo per eliminare la stima verso un nodo che ha lasciato la rete
+
+        :param destination_port: porta del nodo
+        """
+
+        with self.__lock:
+            self.__estimates.pop(destination_port, None)
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def print_status(self):
+        """
+        Metodo di debug per la stampa delle stime del RTT verso i nodi contattati
+        """
+
+        with self.__lock:
+            estimates = sorted(self.__estimates.items())
+
+        if estimates.__len__() == 0:
+            print("No RTT Estimates: the node hasn't received any answer yet")
+            return
+
+        print(f"{'Port':<8}{'SRTT (ms)':>12}{'RTTVAR (ms)':>14}{'Backoff':>10}{'Samples':>10}{'Ping Timeout (ms)':>20}")
+        for (port, (srtt, rttvar, backoff, samples)) in estimates:
+            print(f"{port:<8}{srtt:>12.2f}{rttvar:>14.2f}{backoff:>10}{samples:>10}"
+                  f"{self.get_timeout(port, MSG_TYPE_PING):>20.0f}")
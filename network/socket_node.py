@@ -1,8 +1,22 @@
+import selectors
 import threading
+import time
+from collections import deque
 from threading import Thread
 
 from exceptions.exceptions import *
-from network.tcp_socket_module import TCPServerModule, TCPClientModule
+from network.circuit_breaker import CircuitBreaker, backoff_delay
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD
+from network.message_worker_pool import MessageWorkerPool, OVERLOAD_POLICY_REJECT, OVERLOAD_POLICY_BACKPRESSURE
+from network.node_stats import NodeStats
+from network.priority_lanes import message_lane
+from network.tcp_connection_pool import TCPConnectionPool
+from network.tcp_rpc_channel import TCPRPCChannel
+from network.tcp_socket_module import TCPServerModule, TCPClientModule, TCPConnection, UNIX_SOCKETS_AVAILABLE
+
+# *********** CICLO DEL SERVER *********
+SELECTOR_TIMEOUT = 1  # attesa massima in secondi del selector, scandisce anche il controllo delle connessioni inattive
+SELECTOR_PAUSED_TIMEOUT = 0.01  # attesa massima in secondi quando ci sono connessioni sospese in attesa del pool
 
 
 class SocketNode(Thread):
@@ -11,7 +25,11 @@ class SocketNode(Thread):
     """
 
     def __init__(self, this_node, this_msg_handler, port, tcp_request_timeout=0.2, send_message_max_retries=5,
-                 debug_mode=False):
+                 max_connections_per_destination=8, connection_idle_timeout=30, worker_pool_size=16,
+                 worker_queue_size=256, overload_policy=OVERLOAD_POLICY_REJECT, codec=CODEC_BINARY, server_backlog=128,
+                 unix_sockets=True, send_retry_backoff=0.01, circuit_breaker_threshold=3,
+                 circuit_breaker_reset_timeout=2, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, maintenance_workers=4, node_stats=None, debug_mode=False):
         """
         Metodo init della classe.
         Inizializzazione degli attributi interni e chiamata al costruttore del processo.
@@ -20,19 +38,75 @@ class SocketNode(Thread):
         :param this_msg_handler: riferimento al proprio message handler
         :param port: porta del nodo
         :param tcp_request_timeout: timout per le richieste TCP
+        :param send_message_max_retries: massimo numero di tentativi di invio di un messaggio (opzionale)
+        :param max_connections_per_destination: massimo numero di connessioni persistenti verso uno stesso nodo (opzionale)
+        :param connection_idle_timeout: tempo in secondi dopo il quale una connessione inutilizzata viene chiusa (opzionale)
+        :param worker_pool_size: numero di thread per l'elaborazione dei messaggi ricevuti (opzionale)
+        :param worker_queue_size: massimo numero di messaggi ricevuti in attesa di elaborazione (opzionale)
+        :param overload_policy: politica da applicare quando la coda è piena, "reject" o "backpressure" (opzionale)
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param server_backlog: massimo numero di connessioni in ingresso in attesa di essere accettate (opzionale)
+        :param unix_sockets: se impostato a True, i nodi dello stesso host comunicano tramite Unix domain socket (opzionale)
+        :param send_retry_backoff: attesa massima in secondi dopo il primo tentativo di invio fallito, raddoppiata a ogni tentativo (opzionale)
+        :param circuit_breaker_threshold: messaggi non recapitati consecutivi dopo i quali un nodo è considerato irraggiungibile, 0 per disabilitare (opzionale)
+        :param circuit_breaker_reset_timeout: tempo in secondi dopo il quale un nodo irraggiungibile viene ricontattato (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param maintenance_workers: thread del pool riservati ai messaggi di manutenzione (opzionale)
+        :param node_stats: contabilità del traffico del nodo, in cui registrare le connessioni accettate (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
         super().__init__()
         self._stop_event = threading.Event()
 
+        unix_sockets = unix_sockets and UNIX_SOCKETS_AVAILABLE
+
         self.__this_node = this_node
         self.__this_msg_handler = this_msg_handler
         self.__port = port
-        self.__tcp_server = TCPServerModule(port=port, request_timeout=1, debug_mode=debug_mode)
+        self.__tcp_server = TCPServerModule(port=port, request_timeout=0,
+                                            connection_idle_timeout=connection_idle_timeout * 2,
+                                            backlog=server_backlog, unix_socket=unix_sockets,
+                                            debug_mode=debug_mode)
         self.__tcp_server.tpc_server_connect()
         self.__tcp_request_timeout = tcp_request_timeout
         self.__send_message_max_retries = send_message_max_retries
+        self.__send_retry_backoff = send_retry_backoff
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+        self.__stats = node_stats if node_stats else NodeStats()
+
+        # Destinazioni irraggiungibili: gli invii verso di esse falliscono subito
+        self.__circuit_breaker = CircuitBreaker(failure_threshold=circuit_breaker_threshold,
+                                                reset_timeout=circuit_breaker_reset_timeout, debug_mode=debug_mode)
+
+        # Connessioni persistenti in uscita, condivise da richieste e risposte
+        self.__connection_pool = TCPConnectionPool(max_connections_per_destination=max_connections_per_destination,
+                                                   idle_timeout=connection_idle_timeout, unix_sockets=unix_sockets,
+                                                   debug_mode=debug_mode)
+        self.__tcp_client = TCPClientModule(connection_pool=self.__connection_pool, codec=codec, compression=compression,
+                                            compression_threshold=compression_threshold, debug_mode=debug_mode)
+
+        # Canali RPC multiplexati verso gli altri nodi, uno per destinazione e corsia di priorità:
+        # le richieste di manutenzione non restano in coda dietro ai file in trasferimento
+        self.__rpc_channels = dict()
+        self.__rpc_channels_destination_locks = dict()
+        self.__rpc_channels_lock = threading.Lock()
+        self.__connection_idle_timeout = connection_idle_timeout
+
+        # Pool di worker per l'elaborazione dei messaggi ricevuti
+        self.__worker_pool = MessageWorkerPool(max_workers=worker_pool_size, max_queue_size=worker_queue_size,
+                                               overload_policy=overload_policy,
+                                               maintenance_workers=maintenance_workers, name=f"node-{port}",
+                                               debug_mode=debug_mode)
+        self.__worker_pool.start()
+
+        # Connessioni in ingresso attualmente aperte, e quelle la cui lettura è sospesa in attesa del pool
+        self.__accepted_connections = set()
+        self.__accepted_connections_lock = threading.Lock()
+        self.__paused_connections = dict()
 
         # Modalità di debug
         self.__debug_mode = debug_mode
@@ -49,53 +123,304 @@ class SocketNode(Thread):
     def run(self):
         """
         Process Run. Costituisce il corpo del funzionamento della classe.
-        Gestisce le connessioni TCP in ingresso in uscita, e si occupa dell'elaborazione e gestione
-        delle funzionalità del nodo.
+        Un unico ciclo basato su selectors accetta le connessioni in ingresso (TCP e Unix domain socket)
+        e legge i dati già disponibili
+        su quelle aperte: un client lento o un trasferimento grande ancora in arrivo non bloccano le altre connessioni.
+        I messaggi completi vengono affidati al pool di worker.
+        """
+
+        selector = selectors.DefaultSelector()
+        selector.register(self.__tcp_server.get_socket(), selectors.EVENT_READ)
+        if self.__tcp_server.get_unix_socket():
+            selector.register(self.__tcp_server.get_unix_socket(), selectors.EVENT_READ)
+        last_idle_check_time = time.monotonic()
+
+        try:
+            while not self._stop_event.is_set():
+                timeout = SELECTOR_PAUSED_TIMEOUT if self.__paused_connections else SELECTOR_TIMEOUT
+
+                for (key, events) in selector.select(timeout):
+                    if key.data is None:
+                        self._accept_connections(selector, key.fileobj)
+                    else:
+                        self._read_connection(selector, key.data)
+
+                self._resume_paused_connections(selector)
+
+                if time.monotonic() - last_idle_check_time > SELECTOR_TIMEOUT:
+                    self._close_idle_connections(selector)
+                    last_idle_check_time = time.monotonic()
+        finally:
+            with self.__accepted_connections_lock:
+                connections = list(self.__accepted_connections)
+            for connection in connections:
+                self._close_connection(selector, connection)
+            selector.close()
+
+    def _accept_connections(self, selector, server_socket):
+        """
+        Metodo interno per accettare tutte le connessioni in attesa su un server socket non bloccante
+
+        :param selector: il selector del ciclo del server
+        :param server_socket: il server socket pronto, TCP o Unix domain socket
         """
 
-        while not self._stop_event.is_set():
-            # Accetta un'eventuale connessione in ingresso e la elabora
-            (client_ip, client_port, message) = self.__tcp_server.tcp_server_accept()
+        while True:
+            if server_socket is self.__tcp_server.get_socket():
+                (tcp_socket_client, client_ip, client_port) = self.__tcp_server.tcp_server_accept()
+            else:
+                tcp_socket_client = self.__tcp_server.unix_server_accept()
+
+            if not tcp_socket_client:
+                return
 
-            # Rimando la gestione del messaggio al layer chord
-            if message:
-                thread = Thread(target=self.__this_msg_handler.process_message, args=(message,))
-                thread.start()
+            self.__stats.add_accepted_connection()
+            connection = TCPConnection(tcp_socket_client, codec=self.__codec, compression=self.__compression,
+                                       compression_threshold=self.__compression_threshold,
+                                       debug_mode=self.__debug_mode)
+
+            with self.__accepted_connections_lock:
+                self.__accepted_connections.add(connection)
+
+            selector.register(tcp_socket_client, selectors.EVENT_READ, connection)
+
+    def _read_connection(self, selector, connection):
+        """
+        Metodo interno per la lettura dei dati disponibili su una connessione.
+        I frame incompleti restano in attesa delle letture successive; quelli completi vengono elaborati
+        e la risposta verrà scritta sulla stessa connessione da cui è arrivata la richiesta.
+
+        :param selector: il selector del ciclo del server
+        :param connection: la connessione pronta in lettura
+        """
 
+        try:
+            messages = connection.receive_messages()
+        except TCPConnectionClosedError:
+            self._close_connection(selector, connection)
+            return
 
-            # try:
-            #     self.__this_msg_handler.process_message(message)
-            # except EmptyMessageError:
-            #     pass
+        messages = deque(messages)
+        if not self._dispatch_messages(connection, messages):
+            # coda del pool piena (politica "backpressure"): sospendo la lettura dalla connessione
+            selector.unregister(connection.get_socket())
+            self.__paused_connections[connection] = messages
+
+    def _dispatch_messages(self, connection, messages):
+        """
+        Metodo interno per affidare al pool di worker i messaggi ricevuti su una connessione.
+        Con la politica "reject" i messaggi in eccesso vengono rifiutati con una risposta di errore.
+
+        :param connection: la connessione da cui sono arrivati i messaggi
+        :param messages: coda dei messaggi da elaborare, da cui vengono rimossi quelli affidati al pool
+        :return: True se tutti i messaggi sono stati gestiti, False se la coda del pool è piena
+        """
+
+        while messages:
+            message = messages[0]
+
+            if self.__worker_pool.submit_message(self.__this_msg_handler.process_message, message, connection,
+                                                 lane=message_lane(message.get_type())):
+                messages.popleft()
+            elif self.__worker_pool.get_overload_policy() == OVERLOAD_POLICY_BACKPRESSURE:
+                return False
+            else:
+                messages.popleft()
+                self.__this_msg_handler.reject_message(message, connection)
+
+        return True
+
+    def _resume_paused_connections(self, selector):
+        """
+        Metodo interno per riprendere la lettura dalle connessioni sospese, se nel pool si è liberato spazio
+
+        :param selector: il selector del ciclo del server
+        """
+
+        for (connection, messages) in list(self.__paused_connections.items()):
+            if not self._dispatch_messages(connection, messages):
+                return
+
+            del self.__paused_connections[connection]
+            selector.register(connection.get_socket(), selectors.EVENT_READ, connection)
+
+    def _close_idle_connections(self, selector):
+        """
+        Metodo interno per la chiusura delle connessioni in ingresso inattive da troppo tempo
+
+        :param selector: il selector del ciclo del server
+        """
+
+        with self.__accepted_connections_lock:
+            connections = list(self.__accepted_connections)
+
+        for connection in connections:
+            if connection not in self.__paused_connections and connection.is_idle(self.__connection_idle_timeout * 2):
+                self._close_connection(selector, connection)
+
+    def _close_connection(self, selector, connection):
+        """
+        Metodo interno per la chiusura di una connessione in ingresso
+
+        :param selector: il selector del ciclo del server
+        :param connection: la connessione da chiudere
+        """
+
+        try:
+            selector.unregister(connection.get_socket())
+        except (KeyError, ValueError):
+            pass
+
+        self.__paused_connections.pop(connection, None)
+        with self.__accepted_connections_lock:
+            self.__accepted_connections.discard(connection)
+        connection.close()
+
+    def get_worker_pool(self):
+        return self.__worker_pool
 
     def send_message(self, destination_port, message):
-        tcp_client = TCPClientModule(port=destination_port, debug_mode=self.__debug_mode)
+        """
+        Metodo per l'invio di un messaggio a un altro nodo, tramite le connessioni persistenti del pool.
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: il messaggio da inviare
+        """
+
+        self._send_with_retries(destination_port,
+                                lambda: self.__tcp_client.tcp_client_send_pooled_message(port=destination_port,
+                                                                                         message=message))
+
+    def send_request(self, destination_port, message):
+        """
+        Metodo per l'invio di una richiesta a un altro nodo sul canale RPC multiplexato verso di esso.
+        Il metodo non attende la risposta: questa verrà letta dal canale e consegnata al message handler,
+        che la associa alla richiesta in attesa tramite il ticket.
+
+        :param destination_port: porta del nodo di destinazione
+        :param message: la richiesta da inviare
+        """
 
-        # Tento di provo a inviare la richiesta finché non riesco
+        lane = message_lane(message.get_type())
+        self._send_with_retries(destination_port,
+                                lambda: self._get_rpc_channel(destination_port, lane).send_message(message))
+
+    def _send_with_retries(self, destination_port, send_function):
+        """
+        Metodo interno per l'invio di un messaggio con più tentativi.
+        Tra un tentativo e l'altro l'attesa cresce in modo esponenziale, con jitter; se il circuit breaker
+        considera la destinazione irraggiungibile l'invio fallisce subito, senza tentare la connessione.
+        Il circuit breaker conta i messaggi non recapitati dopo tutti i tentativi, non i singoli tentativi falliti.
+
+        :param destination_port: porta del nodo di destinazione
+        :param send_function: funzione che esegue un tentativo di invio
+        """
+
+        if not self.__circuit_breaker.allow_request(destination_port):
+            if self.__debug_mode:
+                print(f"ERROR: Node with port {self.__port}: the node on port {destination_port} is unreachable.")
+            raise TCPRequestSendError
 
         retries = 0
         while retries < self.__send_message_max_retries:
             try:
-                tcp_client.tcp_client_connect_and_send_message(port=destination_port, message=message)
+                send_function()
             except TCPRequestSendError:
+                retries += 1
+
                 if self.__debug_mode:
                     print(
                         f"ERROR: Node with port {self.__port}: message to the node on port {destination_port} not delivered. I\'ll retry soon.")
-                retries += 1
+
+                if retries < self.__send_message_max_retries:
+                    time.sleep(backoff_delay(retries, self.__send_retry_backoff))
             else:
-                break
+                self.__circuit_breaker.record_success(destination_port)
+                return
 
-        if retries == self.__send_message_max_retries:
-            raise TCPRequestSendError
+        self.__circuit_breaker.record_failure(destination_port)
+        raise TCPRequestSendError
+
+    def get_circuit_breaker(self):
+        return self.__circuit_breaker
+
+    def _get_rpc_channel(self, destination_port, lane):
+        """
+        Metodo interno per ottenere il canale RPC verso un nodo per una corsia di priorità,
+        aprendone uno nuovo se necessario.
+        I canali inattivi da troppo tempo vengono sostituiti, per non usare connessioni che il nodo remoto
+        potrebbe aver già chiuso.
+
+        :param destination_port: porta del nodo di destinazione
+        :param lane: corsia di priorità della richiesta
+        :return: il canale RPC
+        """
+
+        channel_key = (destination_port, lane)
+
+        with self.__rpc_channels_lock:
+            destination_lock = self.__rpc_channels_destination_locks.setdefault(channel_key, threading.Lock())
+
+        with destination_lock:
+            rpc_channel = self.__rpc_channels.get(channel_key)
+
+            if rpc_channel and not rpc_channel.is_closed() and not rpc_channel.is_idle(self.__connection_idle_timeout):
+                return rpc_channel
+
+            if rpc_channel:
+                rpc_channel.close()
+
+            rpc_channel = TCPRPCChannel("localhost", destination_port, self.__connection_pool,
+                                        self.__this_msg_handler.process_message,
+                                        lambda closed_channel: self._rpc_channel_closed(closed_channel, lane),
+                                        codec=self.__codec, compression=self.__compression,
+                                        compression_threshold=self.__compression_threshold,
+                                        debug_mode=self.__debug_mode)
+
+            with self.__rpc_channels_lock:
+                self.__rpc_channels[channel_key] = rpc_channel
+
+        return rpc_channel
+
+    def _rpc_channel_closed(self, rpc_channel, lane):
+        """
+        Metodo interno invocato alla chiusura di un canale RPC.
+        Le richieste scritte su quel canale e in attesa di risposta vengono fatte fallire subito, senza attendere
+        il timeout; non quelle che verranno inviate sul canale che lo sostituisce.
+
+        :param rpc_channel: il canale chiuso
+        :param lane: corsia di priorità del canale
+        """
+
+        channel_key = (rpc_channel.get_port(), lane)
+
+        with self.__rpc_channels_lock:
+            if self.__rpc_channels.get(channel_key) is rpc_channel:
+                del self.__rpc_channels[channel_key]
+
+        self.__this_msg_handler.connection_lost(rpc_channel.get_port(), lane, rpc_channel.get_pending_tickets())
 
     def tcp_server_close(self):
         """
         Funzione per la chiusura del server TCP. Da chiamare esclusivamente prima del join
         e la terminazione del processo.
+        Vengono chiuse anche le connessioni persistenti in ingresso e in uscita.
         """
 
         self.__tcp_server.tcp_server_close()
 
+        with self.__rpc_channels_lock:
+            rpc_channels = list(self.__rpc_channels.values())
+        for rpc_channel in rpc_channels:
+            rpc_channel.close()
+
+        self.__connection_pool.close_all()
+        self.__worker_pool.stop()
+
+        with self.__accepted_connections_lock:
+            for connection in self.__accepted_connections:
+                connection.shutdown()
+
     def stop(self):
         """
         Override del metodo stop della classe Thread
@@ -123,3 +448,7 @@ class SocketNode(Thread):
         self.__debug_mode = debug_mode
 
         self.__tcp_server.set_debug_mode(debug_mode)
+        self.__tcp_client.set_debug_mode(debug_mode)
+        self.__connection_pool.set_debug_mode(debug_mode)
+        self.__worker_pool.set_debug_mode(debug_mode)
+        self.__circuit_breaker.set_debug_mode(debug_mode)
@@ -0,0 +1,266 @@
+import select
+import socket
+import threading
+import time
+
+from exceptions.exceptions import *
+from network.tcp_socket_module import unix_socket_path, is_local_address
+
+
+class TCPConnectionPool:
+    """
+    Pool di connessioni TCP persistenti verso gli altri nodi, suddivise per destinazione.
+    Le connessioni inutilizzate vengono mantenute aperte per essere riutilizzate dagli invii successivi,
+    evitando l'handshake TCP ad ogni messaggio.
+    """
+
+    def __init__(self, max_connections_per_destination=4, idle_timeout=30, connect_timeout=1,
+                 acquire_timeout=2, unix_sockets=False, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param max_connections_per_destination: massimo numero di connessioni aperte verso la stessa destinazione (opzionale)
+        :param idle_timeout: tempo in secondi dopo il quale una connessione inutilizzata viene chiusa (opzionale)
+        :param connect_timeout: timeout in secondi per l'apertura di una nuova connessione (opzionale)
+        :param acquire_timeout: tempo massimo in secondi di attesa di una connessione libera (opzionale)
+        :param unix_sockets: se impostato a True, verso i nodi dello stesso host si usano i Unix domain socket (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        assert max_connections_per_destination >= 1
+
+        self.__CONST_MAX_CONNECTIONS_PER_DESTINATION = max_connections_per_destination
+        self.__CONST_IDLE_TIMEOUT = idle_timeout
+        self.__CONST_CONNECT_TIMEOUT = connect_timeout
+        self.__CONST_ACQUIRE_TIMEOUT = acquire_timeout
+        self.__unix_sockets = unix_sockets
+
+        # destinazione -> lista di (socket, istante dell'ultimo utilizzo)
+        self.__idle_connections = dict()
+        # destinazione -> numero di connessioni attualmente in uso
+        self.__used_connections_counter = dict()
+        self.__condition = threading.Condition()
+        self.__closed = False
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def acquire(self, ip, port):
+        """
+        Metodo per ottenere una connessione verso la destinazione specificata.
+        Viene riutilizzata una connessione inattiva e funzionante se disponibile, altrimenti ne viene aperta una nuova.
+
+        :param ip: ip della destinazione
+        :param port: porta della destinazione
+        :return: il socket connesso
+        """
+
+        destination = (ip, port)
+        deadline = time.monotonic() + self.__CONST_ACQUIRE_TIMEOUT
+
+        with self.__condition:
+            while True:
+                if self.__closed:
+                    raise TCPRequestSendError
+
+                self._evict_idle_connections(destination)
+
+                idle_connections = self.__idle_connections.get(destination, list())
+                while idle_connections:
+                    (connection, last_used_time) = idle_connections.pop()
+                    if self._is_connection_healthy(connection):
+                        self._increase_used_counter(destination)
+                        return connection
+                    self._close_connection(connection)
+
+                if self.__used_connections_counter.get(destination, 0) < self.__CONST_MAX_CONNECTIONS_PER_DESTINATION:
+                    # riservo il posto prima di aprire la connessione, fuori dal lock
+                    self._increase_used_counter(destination)
+                    break
+
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    raise TCPRequestSendError
+                self.__condition.wait(remaining_time)
+
+        try:
+            return self._open_connection(ip, port)
+        except TCPRequestSendError:
+            with self.__condition:
+                self._decrease_used_counter(destination)
+                self.__condition.notify()
+            raise TCPRequestSendError
+
+    def release(self, ip, port, connection):
+        """
+        Metodo per restituire al pool una connessione funzionante, al termine del suo utilizzo
+
+        :param ip: ip della destinazione
+        :param port: porta della destinazione
+        :param connection: il socket da restituire
+        """
+
+        destination = (ip, port)
+
+        with self.__condition:
+            self._decrease_used_counter(destination)
+
+            if self.__closed:
+                self._close_connection(connection)
+            else:
+                self.__idle_connections.setdefault(destination, list()).append((connection, time.monotonic()))
+
+            self.__condition.notify()
+
+    def discard(self, ip, port, connection):
+        """
+        Metodo per chiudere una connessione che ha generato errori, senza restituirla al pool
+
+        :param ip: ip della destinazione
+        :param port: porta della destinazione
+        :param connection: il socket da chiudere
+        """
+
+        destination = (ip, port)
+
+        with self.__condition:
+            self._decrease_used_counter(destination)
+            self.__condition.notify()
+
+        self._close_connection(connection)
+
+    def close_all(self):
+        """
+        Metodo per la chiusura di tutte le connessioni inattive del pool.
+        Da chiamare alla terminazione del nodo.
+        """
+
+        with self.__condition:
+            self.__closed = True
+
+            for destination in self.__idle_connections.keys():
+                for (connection, last_used_time) in self.__idle_connections[destination]:
+                    self._close_connection(connection)
+
+            self.__idle_connections = dict()
+            self.__condition.notify_all()
+
+    def get_idle_connections_number(self, ip, port):
+        """
+        Metodo per conoscere il numero di connessioni inattive verso una destinazione
+
+        :param ip: ip della destinazione
+        :param port: porta della destinazione
+        :return: il numero di connessioni inattive
+        """
+
+        with self.__condition:
+            return self.__idle_connections.get((ip, port), list()).__len__()
+
+    # ************************** METODI INTERNI *******************************
+
+    def _open_connection(self, ip, port):
+        """
+        Metodo interno per l'apertura di una nuova connessione.
+        Se la destinazione è sullo stesso host e ha un Unix domain socket in ascolto, viene preferito quest'ultimo;
+        in caso contrario si usa TCP.
+
+        :param ip: ip della destinazione
+        :param port: porta della destinazione
+        :return: il socket connesso
+        """
+
+        if self.__unix_sockets and is_local_address(ip):
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.__CONST_CONNECT_TIMEOUT)
+
+            try:
+                connection.connect(unix_socket_path(port))
+            except OSError:
+                connection.close()
+            else:
+                connection.settimeout(None)
+                return connection
+
+        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection.settimeout(self.__CONST_CONNECT_TIMEOUT)
+
+        try:
+            connection.connect((ip, port))
+        except OSError:
+            connection.close()
+            if self.__debug_mode:
+                print(f"\nERROR: Connection to TCP Server on {ip}:{port} not available")
+            raise TCPRequestSendError
+
+        connection.settimeout(None)
+        return connection
+
+    def _evict_idle_connections(self, destination):
+        """
+        Metodo interno per la chiusura delle connessioni inattive da più di idle_timeout secondi.
+        Nota: da chiamare con il lock acquisito
+
+        :param destination: la destinazione da controllare
+        """
+
+        idle_connections = self.__idle_connections.get(destination)
+        if not idle_connections:
+            return
+
+        now = time.monotonic()
+        still_valid_connections = list()
+        for (connection, last_used_time) in idle_connections:
+            if now - last_used_time > self.__CONST_IDLE_TIMEOUT:
+                self._close_connection(connection)
+            else:
+                still_valid_connections.append((connection, last_used_time))
+
+        self.__idle_connections[destination] = still_valid_connections
+
+    def _is_connection_healthy(self, connection):
+        """
+        Metodo interno per il controllo dello stato di una connessione inattiva.
+        Una connessione inattiva sana non ha dati da leggere: se risulta leggibile,
+        significa che il nodo remoto l'ha chiusa (o è in uno stato non valido).
+        Si usa poll invece di select, che non accetta descrittori oltre FD_SETSIZE.
+
+        :param connection: il socket da controllare
+        :return: True se la connessione è utilizzabile, False altrimenti
+        """
+
+        try:
+            poller = select.poll()
+            poller.register(connection, select.POLLIN | select.POLLPRI)
+            events = poller.poll(0)
+        except (OSError, ValueError):
+            return False
+
+        # POLLERR, POLLHUP e POLLNVAL vengono segnalati anche se non richiesti
+        return not events
+
+    def _increase_used_counter(self, destination):
+        self.__used_connections_counter[destination] = self.__used_connections_counter.get(destination, 0) + 1
+
+    def _decrease_used_counter(self, destination):
+        self.__used_connections_counter[destination] = max(0, self.__used_connections_counter.get(destination, 0) - 1)
+
+    def _close_connection(self, connection):
+        try:
+            connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        connection.close()
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
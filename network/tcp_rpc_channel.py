@@ -0,0 +1,163 @@
+import threading
+import time
+from threading import Thread
+
+from exceptions.exceptions import *
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD, encode_message_segments, \
+    decode_message
+from network.tcp_socket_module import tcp_send_frame_segments, tcp_receive_frame
+
+
+class TCPRPCChannel:
+    """
+    Canale RPC multiplexato verso un altro nodo.
+    Una sola connessione persistente trasporta in pipeline molte richieste contemporaneamente;
+    le risposte possono arrivare in qualsiasi ordine e vengono associate alle richieste tramite il ticket.
+    """
+
+    def __init__(self, ip, port, connection_pool, answer_handler, closed_handler, codec=CODEC_BINARY,
+                 compression=COMPRESSION_NONE, compression_threshold=COMPRESSION_THRESHOLD, debug_mode=False):
+        """
+        Funzione __init__ della classe. Apre la connessione e avvia il thread di lettura delle risposte.
+
+        :param ip: ip del nodo remoto
+        :param port: porta del nodo remoto
+        :param connection_pool: pool da cui ottenere la connessione
+        :param answer_handler: funzione invocata per ogni risposta ricevuta
+        :param closed_handler: funzione invocata (una sola volta) alla chiusura del canale
+        :param codec: codec con cui serializzare le richieste inviate, "binary" o "pickle" (opzionale)
+        :param compression: algoritmo di compressione delle richieste con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di una richiesta perché venga compressa (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__ip = ip
+        self.__port = port
+        self.__connection_pool = connection_pool
+        self.__answer_handler = answer_handler
+        self.__closed_handler = closed_handler
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+
+        # la connessione resta riservata al canale per tutta la sua durata
+        self.__connection = self.__connection_pool.acquire(ip, port)
+
+        self.__send_lock = threading.Lock()
+        self.__close_lock = threading.Lock()
+        self.__closed = False
+
+        # ticket delle richieste scritte sul canale e ancora senza risposta: alla chiusura falliscono solo queste
+        self.__pending_tickets = set()
+        self.__pending_tickets_lock = threading.Lock()
+        self.__last_activity_time = time.monotonic()
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+        self.__reader_thread = Thread(target=self._read_answers)
+        self.__reader_thread.start()
+
+    def get_port(self):
+        return self.__port
+
+    def is_closed(self):
+        return self.__closed
+
+    def get_pending_tickets(self):
+        """
+        Metodo per ottenere i ticket delle richieste scritte sul canale che non hanno ancora ricevuto risposta
+
+        :return: lista dei ticket
+        """
+
+        with self.__pending_tickets_lock:
+            return list(self.__pending_tickets)
+
+    def is_idle(self, idle_timeout):
+        """
+        Metodo per verificare se il canale è inattivo da più di idle_timeout secondi
+
+        :param idle_timeout: tempo di inattività in secondi
+        :return: True se il canale è inattivo, False altrimenti
+        """
+
+        return time.monotonic() - self.__last_activity_time > idle_timeout
+
+    def send_message(self, message):
+        """
+        Metodo per l'invio di una richiesta sul canale. Non attende la risposta.
+
+        :param message: la richiesta da inviare
+        """
+
+        if self.__closed:
+            raise TCPRequestSendError
+
+        segments = encode_message_segments(message, self.__codec, self.__compression, self.__compression_threshold)
+
+        # il ticket viene registrato prima della scrittura, perché la risposta può arrivare subito
+        ticket = message.get_ticket() if message.is_ack() else None
+        if ticket is not None:
+            with self.__pending_tickets_lock:
+                self.__pending_tickets.add(ticket)
+
+        try:
+            with self.__send_lock:
+                tcp_send_frame_segments(self.__connection, segments)
+        except OSError:
+            if self.__debug_mode:
+                print(f"\nERROR: TCP Request to Port {self.__port} Got an Error")
+            # la richiesta non è stata consegnata e verrà ritentata su un altro canale: non deve fallire con questo
+            if ticket is not None:
+                with self.__pending_tickets_lock:
+                    self.__pending_tickets.discard(ticket)
+            self.close()
+            raise TCPRequestSendError
+
+        self.__last_activity_time = time.monotonic()
+
+    def _read_answers(self):
+        """
+        Metodo interno eseguito dal thread di lettura: riceve le risposte e le consegna all'answer handler
+        """
+
+        try:
+            while not self.__closed:
+                answer = decode_message(tcp_receive_frame(self.__connection))
+                self.__last_activity_time = time.monotonic()
+
+                if answer is not None:
+                    with self.__pending_tickets_lock:
+                        self.__pending_tickets.discard(answer.get_ticket())
+                    self.__answer_handler(answer)
+        except (OSError, TCPConnectionClosedError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Metodo per la chiusura del canale. Le richieste scritte sul canale e ancora in attesa vengono notificate
+        tramite il closed handler (vedi get_pending_tickets).
+        """
+
+        with self.__close_lock:
+            if self.__closed:
+                return
+            self.__closed = True
+
+        self.__connection_pool.discard(self.__ip, self.__port, self.__connection)
+        self.__closed_handler(self)
+
+    # ************************** METODI DI DEBUG *******************************
+
+    def set_debug_mode(self, debug_mode):
+        """
+        Metodo per abilitare / disabilitare la modalità di debug.
+        Attiva / disabilita le stampe di debug a livello globale
+
+        :param debug_mode: lo stato di debug da impostare
+        """
+
+        self.__debug_mode = debug_mode
@@ -1,9 +1,304 @@
+import os
 import socket
+import struct
 import sys
+import tempfile
+import threading
+import time
 from _socket import SHUT_RDWR
 
 from exceptions.exceptions import *
-import pickle
+from network.message_codec import CODEC_BINARY, COMPRESSION_NONE, COMPRESSION_THRESHOLD, encode_message_segments, \
+    decode_message
+
+# *********** FRAMING DEI MESSAGGI *********
+# Ogni messaggio viaggia sulla connessione preceduto da un header con la lunghezza del payload
+FRAME_HEADER = struct.Struct("!I")  # lunghezza del payload, unsigned int a 32 bit in network byte order
+FRAME_MAX_SIZE = 256 * 1024 * 1024  # 256 MB
+FRAME_SMALL_PAYLOAD_SIZE = 64 * 1024  # sotto questa soglia header e payload vengono inviati con una sola send
+FRAME_READ_BUFFER_SIZE = 64 * 1024  # dimensione del buffer delle letture non bloccanti
+
+# *********** UNIX DOMAIN SOCKET *********
+# I nodi sullo stesso host sono raggiungibili anche tramite un Unix domain socket, associato alla porta TCP del nodo
+UNIX_SOCKETS_AVAILABLE = hasattr(socket, "AF_UNIX")
+UNIX_SOCKET_DIR = tempfile.gettempdir()
+LOCAL_ADDRESSES = ("localhost", "127.0.0.1", "::1", "0.0.0.0")
+
+
+def unix_socket_path(port):
+    """
+    Funzione che restituisce il percorso del Unix domain socket del nodo in ascolto sulla porta specificata
+
+    :param port: porta TCP del nodo
+    :return: percorso del socket
+    """
+
+    return os.path.join(UNIX_SOCKET_DIR, f"chord-node-{port}.sock")
+
+
+def is_local_address(ip):
+    """
+    Funzione per verificare se un indirizzo appartiene all'host corrente
+
+    :param ip: indirizzo da verificare
+    :return: True se l'indirizzo è locale, False altrimenti
+    """
+
+    return ip in LOCAL_ADDRESSES or str(ip).startswith("127.")
+
+
+def tcp_send_frame(connection, payload):
+    """
+    Funzione per l'invio di un frame (header con la lunghezza + payload) su una connessione
+
+    :param connection: socket connesso
+    :param payload: bytes da inviare
+    """
+
+    header = FRAME_HEADER.pack(payload.__len__())
+
+    if payload.__len__() <= FRAME_SMALL_PAYLOAD_SIZE:
+        connection.sendall(header + payload)
+    else:
+        # per i payload grandi si evita la copia dovuta alla concatenazione
+        connection.sendall(header)
+        connection.sendall(payload)
+
+
+def tcp_send_frame_segments(connection, segments):
+    """
+    Funzione per l'invio di un frame il cui payload è diviso in segmenti (vedi encode_message_segments).
+    Il primo segmento viaggia insieme all'header, i successivi vengono inviati direttamente dal loro buffer:
+    il contenuto dei file grandi non viene mai copiato in un payload unico.
+
+    :param connection: socket connesso
+    :param segments: lista dei segmenti (bytes o memoryview) la cui concatenazione è il payload
+    """
+
+    if segments.__len__() == 1:
+        tcp_send_frame(connection, segments[0])
+        return
+
+    connection.sendall(FRAME_HEADER.pack(sum(segment.__len__() for segment in segments)) + segments[0])
+
+    for segment in segments[1:]:
+        connection.sendall(segment)
+
+
+def tcp_receive_exactly(connection, buffer):
+    """
+    Funzione per riempire completamente un buffer preallocato leggendo dalla connessione.
+    I dati vengono scritti direttamente nel buffer, senza copie intermedie dei singoli chunk.
+
+    :param connection: socket connesso
+    :param buffer: bytearray (o memoryview scrivibile) da riempire
+    """
+
+    view = memoryview(buffer)
+    received_bytes = 0
+    expected_bytes = view.nbytes
+
+    while received_bytes < expected_bytes:
+        chunk_size = connection.recv_into(view[received_bytes:], expected_bytes - received_bytes)
+        if chunk_size == 0:
+            # il nodo remoto ha chiuso la connessione
+            raise TCPConnectionClosedError
+        received_bytes += chunk_size
+
+
+def tcp_receive_frame(connection):
+    """
+    Funzione per la ricezione di un frame completo da una connessione
+
+    :param connection: socket connesso
+    :return: il payload del frame
+    """
+
+    header = bytearray(FRAME_HEADER.size)
+    tcp_receive_exactly(connection, header)
+    (payload_size,) = FRAME_HEADER.unpack(header)
+
+    if payload_size > FRAME_MAX_SIZE:
+        raise TCPConnectionClosedError
+
+    payload = bytearray(payload_size)
+    tcp_receive_exactly(connection, payload)
+
+    return payload
+
+
+class TCPFrameReader:
+    """
+    Ricostruzione incrementale dei frame che arrivano su una connessione non bloccante.
+    Ogni lettura consuma solo i dati già disponibili: un frame può quindi arrivare in più letture,
+    e una singola lettura può completare più frame.
+    """
+
+    def __init__(self):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+        """
+
+        self.__buffer = bytearray(FRAME_READ_BUFFER_SIZE)
+        self.__header = bytearray(FRAME_HEADER.size)
+        self.__payload = None  # None finché l'header del frame corrente non è completo
+        self.__received_bytes = 0
+
+    def receive(self, connection):
+        """
+        Funzione per la lettura dei dati disponibili su una connessione pronta in lettura.
+        I payload grandi vengono letti direttamente nel loro buffer, senza passare dal buffer di lettura.
+
+        :param connection: socket connesso, pronto in lettura
+        :return: la lista dei payload dei frame completati con questa lettura
+        """
+
+        payloads = list()
+
+        if self.__payload is not None and self.__payload.__len__() - self.__received_bytes >= FRAME_READ_BUFFER_SIZE:
+            chunk_size = connection.recv_into(memoryview(self.__payload)[self.__received_bytes:])
+            if chunk_size == 0:
+                raise TCPConnectionClosedError
+
+            self.__received_bytes += chunk_size
+            if self.__received_bytes == self.__payload.__len__():
+                payloads.append(self.__payload)
+                self.__payload = None
+                self.__received_bytes = 0
+
+            return payloads
+
+        chunk_size = connection.recv_into(self.__buffer)
+        if chunk_size == 0:
+            # il nodo remoto ha chiuso la connessione
+            raise TCPConnectionClosedError
+
+        data = memoryview(self.__buffer)[:chunk_size]
+        offset = 0
+
+        while offset < chunk_size:
+            if self.__payload is None:
+                size = min(FRAME_HEADER.size - self.__received_bytes, chunk_size - offset)
+                self.__header[self.__received_bytes:self.__received_bytes + size] = data[offset:offset + size]
+                self.__received_bytes += size
+                offset += size
+
+                if self.__received_bytes < FRAME_HEADER.size:
+                    break
+
+                (payload_size,) = FRAME_HEADER.unpack(self.__header)
+                if payload_size > FRAME_MAX_SIZE:
+                    raise TCPConnectionClosedError
+
+                self.__payload = bytearray(payload_size)
+                self.__received_bytes = 0
+            else:
+                size = min(self.__payload.__len__() - self.__received_bytes, chunk_size - offset)
+                self.__payload[self.__received_bytes:self.__received_bytes + size] = data[offset:offset + size]
+                self.__received_bytes += size
+                offset += size
+
+            if self.__payload is not None and self.__received_bytes == self.__payload.__len__():
+                payloads.append(self.__payload)
+                self.__payload = None
+                self.__received_bytes = 0
+
+        return payloads
+
+
+class TCPConnection:
+    """
+    Connessione TCP accettata dal server, su cui vengono anche riscritte le risposte alle richieste ricevute
+    """
+
+    def __init__(self, tcp_socket, codec=CODEC_BINARY, compression=COMPRESSION_NONE,
+                 compression_threshold=COMPRESSION_THRESHOLD, debug_mode=False):
+        """
+        Funzione __init__ della classe. Inizializza tutti gli attributi interni
+
+        :param tcp_socket: socket della connessione
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
+        :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
+        """
+
+        self.__tcp_socket = tcp_socket
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
+        # le risposte possono essere prodotte da thread diversi: i frame non devono mescolarsi
+        self.__send_lock = threading.Lock()
+
+        self.__frame_reader = TCPFrameReader()
+        self.__last_activity_time = time.monotonic()
+
+        # Modalità di debug
+        self.__debug_mode = debug_mode
+
+    def get_socket(self):
+        return self.__tcp_socket
+
+    def is_idle(self, idle_timeout):
+        return time.monotonic() - self.__last_activity_time > idle_timeout
+
+    def receive_messages(self):
+        """
+        Funzione per la lettura dei dati disponibili sulla connessione, da chiamare quando è pronta in lettura.
+        Non attende l'arrivo dei frame incompleti, che verranno completati dalle letture successive.
+
+        :return: la lista dei messaggi completi ricevuti
+        """
+
+        try:
+            payloads = self.__frame_reader.receive(self.__tcp_socket)
+        except OSError:
+            # connessione chiusa dal client
+            raise TCPConnectionClosedError
+
+        self.__last_activity_time = time.monotonic()
+
+        messages = list()
+        for payload in payloads:
+            message = decode_message(payload)
+
+            if self.__debug_mode:
+                print(f"\nTCP Connection: New message received ({payload.__len__()} bytes)")
+
+            if message is not None:
+                messages.append(message)
+
+        return messages
+
+    def send_message(self, message):
+        """
+        Funzione per l'invio di un messaggio sulla connessione
+
+        :param message: il messaggio da inviare
+        """
+
+        segments = encode_message_segments(message, self.__codec, self.__compression, self.__compression_threshold)
+
+        try:
+            with self.__send_lock:
+                tcp_send_frame_segments(self.__tcp_socket, segments)
+        except OSError:
+            if self.__debug_mode:
+                print(f"\nERROR: TCP Answer on a closed connection")
+            raise TCPRequestSendError
+
+    def shutdown(self):
+        """
+        Funzione per l'interruzione della connessione, sbloccando eventuali letture in corso
+        """
+
+        try:
+            self.__tcp_socket.shutdown(SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self):
+        self.__tcp_socket.close()
 
 
 class TCPServerModule:
@@ -11,11 +306,16 @@ class TCPServerModule:
     Modulo di gestione del TCP Socket Server
     """
 
-    def __init__(self, port=8090, request_timeout=0.2, debug_mode=False):
+    def __init__(self, port=8090, request_timeout=0.2, connection_idle_timeout=60, backlog=0, unix_socket=False,
+                 debug_mode=False):
         """
         Funzione __init__ della classe. Inizializza tutti gli attributi interni
 
         :param port: porta su cui mettersi in ascolto
+        :param request_timeout: timeout in secondi per l'attesa di nuove connessioni, 0 per un server non bloccante (opzionale)
+        :param connection_idle_timeout: tempo in secondi dopo il quale una connessione inattiva viene chiusa (opzionale)
+        :param backlog: massimo numero di connessioni in attesa di essere accettate (opzionale)
+        :param unix_socket: se impostato a True, il server è in ascolto anche su un Unix domain socket (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
@@ -23,6 +323,10 @@ class TCPServerModule:
         self.__tcp_server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.__tcp_server_port = port
         self.__tcp_request_timeout = request_timeout
+        self.__tcp_connection_idle_timeout = connection_idle_timeout
+        self.__tcp_backlog = backlog
+        self.__unix_server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) if unix_socket else None
+        self.__unix_server_path = unix_socket_path(port)
 
         # Modalità di debug
         self.__debug_mode = debug_mode
@@ -36,17 +340,54 @@ class TCPServerModule:
         self.__tcp_server.settimeout(self.__tcp_request_timeout)
         try:
             self.__tcp_server.bind(('0.0.0.0', self.__tcp_server_port))
-            self.__tcp_server.listen(0)
+            self.__tcp_server.listen(self.__tcp_backlog)
         except socket.error:
             raise AlreadyUsedPortError(f"\nERROR: TCP server socket port {self.__tcp_server_port} is already in use!")
 
+        if self.__unix_server:
+            # la porta TCP è nostra: un eventuale file del socket è rimasto da un nodo terminato male
+            self.__unix_server.settimeout(self.__tcp_request_timeout)
+            try:
+                if os.path.exists(self.__unix_server_path):
+                    os.unlink(self.__unix_server_path)
+                self.__unix_server.bind(self.__unix_server_path)
+                self.__unix_server.listen(self.__tcp_backlog)
+            except OSError:
+                # il nodo resta comunque raggiungibile via TCP
+                if self.__debug_mode:
+                    print(f"\nERROR: Unix domain socket {self.__unix_server_path} not available")
+                self.__unix_server.close()
+                self.__unix_server = None
+
+    def get_socket(self):
+        return self.__tcp_server
+
+    def get_unix_socket(self):
+        return self.__unix_server
+
+    def unix_server_accept(self):
+        """
+        Funzione per accettare richieste di connessione sul Unix domain socket da parte dei nodi dello stesso host
+
+        :return unix_socket_client: socket della connessione accettata. None in caso di nessuna richiesta
+        """
+
+        try:
+            (unix_socket_client, address) = self.__unix_server.accept()
+        except (OSError, AttributeError):
+            return None
+
+        unix_socket_client.settimeout(self.__tcp_connection_idle_timeout)
+        return unix_socket_client
+
     def tcp_server_accept(self):
         """
-        Funzione per accettare richieste TCP da parte dei client
+        Funzione per accettare richieste di connessione TCP da parte dei client.
+        La connessione accettata resta aperta e può trasportare più messaggi consecutivi.
 
+        :return tcp_socket_client: socket della connessione accettata. None in caso di nessuna richiesta
         :return client_ip: ip del client
         :return client_port: porta TCP del client
-        :return content: contenuto della richiesta ricevuta. None in caso di nessuna richiesta
         """
 
         try:
@@ -62,30 +403,8 @@ class TCPServerModule:
         except OSError:
             pass
         else:
-            try:
-                content = tcp_socket_client.recv(1024)
-            except KeyboardInterrupt:
-                print(f"TCP Server on Port {self.__tcp_server_port} Shutdown")
-                print("Exiting...")
-                sys.exit()
-            except BlockingIOError:
-                return None, None, None
-
-            if len(content) != 0:
-                try:
-                    content = pickle.loads(content)
-                except pickle.UnpicklingError:
-                    return None, None, None
-
-                if self.__debug_mode:
-                    print(
-                        f"\nTCP Server on Port {self.__tcp_server_port}: New message received from Client on {client_ip}:{client_port}")
-
-            else:
-                content = None
-
-            tcp_socket_client.close()
-            return client_ip, client_port, content
+            tcp_socket_client.settimeout(self.__tcp_connection_idle_timeout)
+            return tcp_socket_client, client_ip, client_port
 
         return None, None, None
 
@@ -99,6 +418,13 @@ class TCPServerModule:
             pass
         self.__tcp_server.close()
 
+        if self.__unix_server:
+            self.__unix_server.close()
+            try:
+                os.unlink(self.__unix_server_path)
+            except OSError:
+                pass
+
     # ************************** METODI DI DEBUG *******************************
 
     def set_debug_mode(self, debug_mode):
@@ -117,17 +443,26 @@ class TCPClientModule:
     Modulo di gestione del TCP Socket Client
     """
 
-    def __init__(self, ip="localhost", port=8091, debug_mode=False):
+    def __init__(self, ip="localhost", port=8091, connection_pool=None, codec=CODEC_BINARY,
+                 compression=COMPRESSION_NONE, compression_threshold=COMPRESSION_THRESHOLD, debug_mode=False):
         """
         Funzione __init__ della classe. Inizializza tutti gli attributi interni
 
         :param port: porta su cui mettersi in ascolto
+        :param connection_pool: pool di connessioni persistenti da utilizzare per gli invii (opzionale)
+        :param codec: codec con cui serializzare i messaggi inviati, "binary" o "pickle" (opzionale)
+        :param compression: algoritmo di compressione dei messaggi con file, "none", "zlib" o "lzma" (opzionale)
+        :param compression_threshold: dimensione minima in byte di un messaggio perché venga compresso (opzionale)
         :param debug_mode: se impostato a True, abilita la stampa dei messaggi di debug (opzionale)
         """
 
         self.__tcp_client = socket.socket()
         self.__tcp_client_ip = ip
         self.__tcp_client_port = port
+        self.__connection_pool = connection_pool
+        self.__codec = codec
+        self.__compression = compression
+        self.__compression_threshold = compression_threshold
 
         # Modalità di debug
         self.__debug_mode = debug_mode
@@ -149,8 +484,7 @@ class TCPClientModule:
 
         try:
             # self.__tcp_client.send(message.encode("utf-8"))  # non si può encodare un oggetto complesso
-            message_pickle = pickle.dumps(message)
-            self.__tcp_client.send(message_pickle)
+            tcp_send_frame_segments(self.__tcp_client, self._encode_message(message))
         except BrokenPipeError:
             if self.__debug_mode:
                 print(f"\nERROR: TCP Request to IP {self.__tcp_client_ip} Got an Error")
@@ -168,6 +502,16 @@ class TCPClientModule:
             print("Exiting...")
             sys.exit()
 
+    def _encode_message(self, message):
+        """
+        Funzione interna per la serializzazione di un messaggio con il codec e la compressione del client
+
+        :param message: il messaggio da serializzare
+        :return: la lista dei segmenti del payload
+        """
+
+        return encode_message_segments(message, self.__codec, self.__compression, self.__compression_threshold)
+
     def tcp_client_close(self):
         self.__tcp_client.close()
 
@@ -186,8 +530,7 @@ class TCPClientModule:
         try:
             self.__tcp_client.connect((ip, port))
             # self.__tcp_client.send(message.encode("utf-8"))  # non si può encodare un oggetto complesso
-            message_pickle = pickle.dumps(message)
-            self.__tcp_client.send(message_pickle)
+            tcp_send_frame_segments(self.__tcp_client, self._encode_message(message))
         except (BrokenPipeError, OSError):
             if self.__debug_mode:
                 print(f"\nERROR: TCP Request to IP {ip} Got an Error")
@@ -207,6 +550,37 @@ class TCPClientModule:
 
         self.__tcp_client.close()
 
+    def tcp_client_send_pooled_message(self, ip="localhost", port=8091, message=""):
+        """
+        Funzione per inviare un messaggio tcp a un server riutilizzando una connessione persistente del pool.
+        In caso di errore la connessione viene scartata.
+
+        :param ip: ip del server
+        :param port: porta del server
+        :param message: messaggio da inviare
+        """
+
+        if not self.__connection_pool:
+            self.tcp_client_connect_and_send_message(ip, port, message)
+            return
+
+        connection = self.__connection_pool.acquire(ip, port)
+
+        try:
+            tcp_send_frame_segments(connection, self._encode_message(message))
+        except OSError:
+            self.__connection_pool.discard(ip, port, connection)
+            if self.__debug_mode:
+                print(f"\nERROR: TCP Request to IP {ip} on Port {port} Got an Error")
+            raise TCPRequestSendError
+        except KeyboardInterrupt:
+            self.__connection_pool.discard(ip, port, connection)
+            print(f"TCP Client on Port {self.__tcp_client_port} Shutdown")
+            print("Exiting...")
+            sys.exit()
+
+        self.__connection_pool.release(ip, port, connection)
+
     # ************************** METODI DI DEBUG *******************************
 
     def set_debug_mode(self, debug_mode):
@@ -20,4 +20,104 @@ MAX_INITALIZATION_RETRIES = 10
 # The following setting specifies the nodes periodic operations timeout
 # A higher timeout is suggested if you're going to create a lot of nodes
 # for reducing the TCP traffic
-PERIODIC_OP_TIMEOUT = 2500
\ No newline at end of file
+PERIODIC_OP_TIMEOUT = 2500
+
+# The following setting specifies the network engine used by the nodes:
+# "threads" uses dedicated threads for every node's server, connections
+# and periodic operations, while "asyncio" runs all the nodes of the
+# process on a single shared event loop (suggested for a lot of nodes).
+# "loopback" doesn't use TCP at all: the messages are delivered in memory
+# between the nodes of this process, so the network can't be reached
+# from other processes (suggested for benchmarks and simulations)
+NETWORK_ENGINE = "threads"
+
+# The following settings specify how the messages received by a node
+# are processed with the "threads" network engine: the number of worker
+# threads, the max number of messages waiting in queue, and what to do
+# when the queue is full: "reject" answers with an error, while
+# "backpressure" stops reading from the connection until there's room
+WORKER_POOL_SIZE = 16
+WORKER_QUEUE_SIZE = 256
+OVERLOAD_POLICY = "reject"
+
+# The following setting specifies how the nodes serialize the messages
+# they send: "binary" uses a compact schema-driven binary format, while
+# "pickle" uses the Python pickle module. Every node can decode both
+MESSAGE_CODEC = "binary"
+
+# The following setting specifies the max number of incoming connections
+# waiting to be accepted by the server of a node
+SERVER_BACKLOG = 128
+
+# The following setting specifies whether the nodes running on the same
+# host talk to each other through Unix domain sockets instead of TCP.
+# Every node still listens on its TCP port too
+UNIX_SOCKETS = True
+
+# The following settings specify how a node retries a message that
+# couldn't be delivered: the wait after the first failed attempt (in ms),
+# doubled at every attempt and randomized, how many consecutive messages
+# that still failed after all their attempts mark the destination as
+# unreachable (0 disables the check),
+# and after how long (in ms) an unreachable destination is tried again.
+# Messages to an unreachable destination fail immediately
+SEND_RETRY_BACKOFF = 10
+CIRCUIT_BREAKER_THRESHOLD = 3
+CIRCUIT_BREAKER_RESET_TIMEOUT = 2000
+
+# The following settings specify whether the nodes compress the messages
+# carrying files: "none", "zlib" (fast) or "lzma" (slower, smaller), and
+# the minimum size in bytes of a message to be compressed. Every node can
+# decompress both, whatever its own setting
+MESSAGE_COMPRESSION = "none"
+COMPRESSION_THRESHOLD = 4096
+
+# The following settings limit the requests of a node: how many requests
+# it may have sent and still be waiting for, in total and towards the same
+# node, and how many received requests it processes at once. Requests over
+# the last limit (counted separately for maintenance and user requests)
+# are answered "busy" and retried later by their sender, with an
+# exponential backoff. 0 disables a limit
+MAX_INFLIGHT_REQUESTS = 256
+MAX_INFLIGHT_REQUESTS_PER_DESTINATION = 32
+MAX_INBOUND_REQUESTS = 256
+
+# The following setting specifies how many worker threads of a node are
+# reserved to the maintenance messages (stabilize, fix finger, check
+# predecessor, lookups): the other threads, at least one, process the
+# file requests of the users. Each kind of traffic has its own queue, and
+# its own connections towards every other node, so that heavy traffic of
+# one kind doesn't delay the other
+MAINTENANCE_WORKERS = 4
+
+# The following settings specify how a node looks up the successor of a
+# key: "recursive" forwards the lookup from node to node until the
+# successor, while with "iterative" the node asks every node on the path
+# for the next hops and drives the lookup itself, so that no node waits
+# for the rest of the path. An iterative lookup queries up to
+# LOOKUP_PARALLELISM nodes at once (1 to 8) and waits for each of them at
+# most LOOKUP_HOP_TIMEOUT ms; when they all fail it goes on from the other
+# nodes it already knows, without starting again. With "forwarded" the
+# lookup is forwarded from node to node without anyone waiting, and the
+# node responsible for the key answers the node that started it directly;
+# a lost lookup is repeated recursively
+LOOKUP_MODE = "recursive"
+LOOKUP_PARALLELISM = 1
+LOOKUP_HOP_TIMEOUT = 500
+
+# Every node remembers the owners of the keys it resolved for the file
+# operations (at most LOOKUP_CACHE_SIZE of them, 0 to disable the cache, for
+# LOOKUP_CACHE_TTL ms), so that the next operations on the same keys cost a
+# single request. The cache is emptied when the neighbours of the node
+# change, and a cached owner that isn't responsible for a key anymore
+# refuses the request, which is then sent after a new lookup
+LOOKUP_CACHE_SIZE = 1024
+LOOKUP_CACHE_TTL = 30000
+
+# The following settings specify how a joining node fills its finger
+# table: "sequential" looks up its 160 fingers one at a time, while
+# "parallel" looks up to JOIN_PARALLELISM of them at once (1 to 32) and
+# skips the fingers whose start falls before the previous finger, since
+# they point to the same node. Every node reports how long its join took
+JOIN_MODE = "sequential"
+JOIN_PARALLELISM = 8
\ No newline at end of file
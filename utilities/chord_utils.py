@@ -5,6 +5,19 @@ from exceptions.exceptions import InvalidPeriodicOperationsTimeoutError
 
 CONST_M = 160  # number of table entries (aka fingers)
 
+# *********** MODALITÀ DI RICERCA DEL SUCCESSORE *********
+LOOKUP_MODE_RECURSIVE = "recursive"  # la ricerca viene inoltrata di nodo in nodo fino al successore della key
+LOOKUP_MODE_ITERATIVE = "iterative"  # il nodo che avvia la ricerca interroga direttamente ogni nodo del percorso
+LOOKUP_MODE_FORWARDED = "forwarded"  # la ricerca viene inoltrata senza attese, il responsabile risponde a chi l'ha avviata
+LOOKUP_MODES = (LOOKUP_MODE_RECURSIVE, LOOKUP_MODE_ITERATIVE, LOOKUP_MODE_FORWARDED)
+LOOKUP_MAX_NEXT_HOPS = 8  # massimo numero di nodi indicati da un nodo per proseguire una ricerca iterativa
+LOOKUP_MAX_HOPS = CONST_M  # oltre questo numero di passi una ricerca iterativa o inoltrata viene interrotta
+
+# *********** MODALITÀ DI INGRESSO NELLA RETE *********
+JOIN_MODE_SEQUENTIAL = "sequential"  # i finger vengono cercati uno alla volta
+JOIN_MODE_PARALLEL = "parallel"  # i finger vengono cercati contemporaneamente, saltando quelli già noti
+JOIN_MODES = (JOIN_MODE_SEQUENTIAL, JOIN_MODE_PARALLEL)
+
 
 def hash_function(input_string):
     """
@@ -40,6 +53,22 @@ def compute_finger(node_id, index):
     return (node_id + 2 ** (index - 1)) % (2 ** CONST_M)
 
 
+def is_in_ring_interval(key, start, end):
+    """
+    Funzione che verifica se una key cade nell'intervallo (start, end] dell'anello, anche se questo passa per lo zero.
+    Se start ed end coincidono, l'intervallo è l'intero anello.
+
+    :param key: la chiave da verificare
+    :param start: inizio dell'intervallo (escluso)
+    :param end: fine dell'intervallo (inclusa)
+    :return: True se la key cade nell'intervallo, False altrimenti
+    """
+
+    if start < end:
+        return start < key <= end
+    return key > start or key <= end
+
+
 def periodic_op_timeout_is_valid(periodic_operations_timeout):
     """
     Funzione per verificare se il timeout delle operazioni periodiche è valido o meno
@@ -51,3 +80,19 @@ def periodic_op_timeout_is_valid(periodic_operations_timeout):
         assert 100 <= periodic_operations_timeout <= 300000
     except AssertionError:
         raise InvalidPeriodicOperationsTimeoutError
+
+
+def advance_lookup(lookup_step, argument):
+    """
+    Funzione per far avanzare una ricerca del successore di una key, scritta come generatore che restituisce
+    (yield) il prossimo nodo a cui inoltrare la ricerca, fino a restituirne (return) il risultato
+
+    :param lookup_step: metodo send o throw del generatore
+    :param argument: risposta dell'inoltro precedente (send) o eccezione da sollevare nel generatore (throw)
+    :return: la tupla (ricerca terminata, risultato della ricerca o prossimo nodo a cui inoltrarla)
+    """
+
+    try:
+        return False, lookup_step(argument)
+    except StopIteration as lookup_result:
+        return True, lookup_result.value